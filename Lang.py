@@ -1,59 +1,60 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, fields
 from typing import List
+import weakref
 
 # 1.1 Language AST (Abstract Syntax Tree)
 # EXPRESSÕES
 
-@dataclass
+@dataclass(slots=True)
 class Expr:
     pass
 
-@dataclass
+@dataclass(slots=True)
 class Var(Expr):
     name: str
 
-@dataclass
+@dataclass(slots=True)
 class IntLit(Expr):
     value: int
 
-@dataclass
+@dataclass(slots=True)
 class BoolLit(Expr):
     value: bool
 
-@dataclass
+@dataclass(slots=True)
 class BinOp(Expr):
     op: str  # '+', '-', '*', '/', '==', '&&', '||', '<', etc.
     left: Expr
     right: Expr
 
-@dataclass
+@dataclass(slots=True)
 class UnaryOp(Expr):
     op: str  # 'not', '-' (negativo)
     expr: Expr
 
 # INSTRUÇÕES
 
-@dataclass
+@dataclass(slots=True)
 class Stmt:
     pass
 
-@dataclass
+@dataclass(slots=True)
 class Assign(Stmt):
     var: str
     expr: Expr
 
-@dataclass
+@dataclass(slots=True)
 class If(Stmt):
     condition: Expr
     then_branch: List[Stmt]
     else_branch: List[Stmt]
 
-@dataclass
+@dataclass(slots=True)
 class While(Stmt):
     condition: Expr
     body: List[Stmt]
 
-@dataclass
+@dataclass(slots=True)
 class For(Stmt):
     var: str
     start: Expr
@@ -61,32 +62,116 @@ class For(Stmt):
     body: List[Stmt]
 
 # FUNÇÕES
-@dataclass
+@dataclass(slots=True)
 class FunctionDef(Stmt):
     name: str
     params: List[str]
     body: List[Stmt]
 
-@dataclass
+@dataclass(slots=True)
 class FunctionCall(Expr):
     name: str
     args: List[Expr]
 
-@dataclass
+@dataclass(slots=True)
 class Return(Stmt):
     expr: Expr
 
-@dataclass
+@dataclass(slots=True)
 class Print(Stmt):
     expr: Expr
 
 
 # RAIZ DO PROGRAMA
-@dataclass
+@dataclass(slots=True)
 class Program:
     body: List[Stmt]
 
 
+# Extra : Nós partilhados (hash-consing)
+# HashCons constrói nós imutáveis e únicos: dois nós com a mesma estrutura são o
+# mesmo objeto, pelo que == passa a ser uma comparação de identidade e o hash
+# estrutural é calculado uma única vez. Os nós partilhados continuam a ser
+# instâncias das classes acima (isinstance, pretty printing, evaluate, ...);
+# as listas (blocos, parâmetros, argumentos) passam a tuplos. Quem junta blocos
+# (ex: then_branch + else_branch) tem de os converter com list(), porque um pass
+# pode deixar um ramo partilhado (tuplo) ao lado de um ramo novo (lista).
+# As subclasses partilhadas não são importáveis pelo nome (Lang.Assign é a
+# classe base), por isso o pickle guarda a classe base e os campos e volta a
+# construir o nó com hash_cons.make: no mesmo processo devolve o mesmo objeto.
+
+def frozen_setattr(self, name, value):
+    raise AttributeError(f"Nó {type(self).__name__} partilhado é imutável")
+
+def unpickle_node(cls, *values):
+    return hash_cons.make(cls, *values)
+
+def interned_class(cls):
+    names = [field.name for field in fields(cls)]
+    namespace = {
+        "__slots__": ("_hash", "__weakref__"),
+        "__module__": cls.__module__,
+        "__qualname__": cls.__qualname__,
+        "__setattr__": frozen_setattr,
+        "__delattr__": frozen_setattr,
+        "__eq__": lambda self, other: self is other,
+        "__ne__": lambda self, other: self is not other,
+        "__hash__": lambda self: self._hash,
+        "__copy__": lambda self: self,
+        "__deepcopy__": lambda self, memo: self,
+        "__reduce__": lambda self: (unpickle_node, (cls,) + tuple(getattr(self, name) for name in names)),
+    }
+    return type(cls.__name__, (cls,), namespace)
+
+INTERNED = {cls: interned_class(cls) for cls in
+            (Var, IntLit, BoolLit, BinOp, UnaryOp, FunctionCall,
+             Assign, If, While, For, FunctionDef, Return, Print)}
+INTERNED_CLASSES = tuple(INTERNED.values())
+
+
+class HashCons:
+    def __init__(self):
+        # Entradas sem referências externas desaparecem (ex: mutantes descartados)
+        self.table = weakref.WeakValueDictionary()
+
+    def __len__(self) -> int:
+        return len(self.table)
+
+    def make(self, cls, *values):
+        values = tuple(tuple(v) if isinstance(v, list) else v for v in values)
+        # Os filhos já são únicos (hash em cache, == por identidade) e servem de
+        # chave diretamente; só os literais precisam do tipo (True e 1 são diferentes)
+        key = (cls, type(values[0])) + values if cls in (IntLit, BoolLit) else (cls,) + values
+        node = self.table.get(key)
+        if node is not None:
+            return node
+
+        interned = INTERNED[cls]
+        node = object.__new__(interned)
+        for field, value in zip(fields(cls), values):
+            object.__setattr__(node, field.name, value)
+        object.__setattr__(node, "_hash", hash((cls.__name__,) + values))
+        self.table[key] = node
+        return node
+
+    def intern(self, node):
+        if isinstance(node, INTERNED_CLASSES):
+            return node
+        if isinstance(node, list):
+            return tuple(self.intern(n) for n in node)
+        if not isinstance(node, (Expr, Stmt)):
+            return node
+        return self.make(type(node), *[self.intern(getattr(node, f.name)) for f in fields(node)])
+
+    def intern_program(self, prog: Program) -> Program:
+        return Program([self.intern(s) for s in prog.body])
+
+hash_cons = HashCons()
+
+def intern_program(prog: Program) -> Program:
+    return hash_cons.intern_program(prog)
+
+
 # EXEMPLOS DE USO
 programa1 = Program([
     Assign("y", IntLit(0)),
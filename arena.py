@@ -0,0 +1,453 @@
+from array import array
+from typing import List, Dict, Optional
+from Lang import *
+from evaluate import Inputs, Returned, BINOPS, UNOPS, unknown_op
+
+# Extra : AST em arena (struct-of-arrays)
+# Cada nó é uma posição em arrays paralelos em vez de um objeto Python:
+#   kind  — tipo do nó (K_*)
+#   a     — nome/operador (índice na tabela de strings) ou valor de um literal
+#   b     — If: nº de instruções do ramo then; FunctionDef: posição da lista
+#           de parâmetros em `params`; literais: 1 se o valor está em `consts`
+#   first, count — filhos, como um intervalo em `kids`
+# Os nós são guardados em pós-ordem (os filhos antes do pai), por isso a maior
+# parte das travessias é um ciclo simples sobre os índices.
+# Filhos por tipo:
+#   BinOp [left, right]       UnaryOp [expr]      FunctionCall [args...]
+#   Assign [expr]             If [cond, then..., else...]
+#   While [cond, body...]     For [start, end, body...]
+#   FunctionDef [body...]     Return [expr]       Print [expr]
+
+K_VAR = 0
+K_INT = 1
+K_BOOL = 2
+K_BINOP = 3
+K_UNOP = 4
+K_CALL = 5
+K_ASSIGN = 6
+K_IF = 7
+K_WHILE = 8
+K_FOR = 9
+K_DEF = 10
+K_RETURN = 11
+K_PRINT = 12
+
+KIND_CLASSES = [Var, IntLit, BoolLit, BinOp, UnaryOp, FunctionCall,
+                Assign, If, While, For, FunctionDef, Return, Print]
+KIND_OF = {cls: k for k, cls in enumerate(KIND_CLASSES)}
+STMT_KINDS = range(K_ASSIGN, K_PRINT + 1)
+
+INT64_MIN = -2 ** 63
+INT64_MAX = 2 ** 63 - 1
+
+
+class ProgramArena:
+    def __init__(self):
+        self.kind = array("B")
+        self.a = array("q")
+        self.b = array("q")
+        self.first = array("i")
+        self.count = array("i")
+        self.kids = array("i")
+        self.params = array("i")  # [n, nome1, ..., nomeN] por FunctionDef
+        self.strings: List[str] = []
+        self.string_ids: Dict[str, int] = {}
+        self.consts: list = []    # literais que não cabem em int64 ou com tipo inesperado
+        self.root_first = 0
+        self.root_count = 0
+
+    def __len__(self) -> int:
+        return len(self.kind)
+
+    def nbytes(self) -> int:
+        arrays = (self.kind, self.a, self.b, self.first, self.count, self.kids, self.params)
+        return sum(arr.itemsize * len(arr) for arr in arrays)
+
+    def string(self, s: str) -> int:
+        i = self.string_ids.get(s)
+        if i is None:
+            i = self.string_ids[s] = len(self.strings)
+            self.strings.append(s)
+        return i
+
+    def add(self, kind: int, a: int = 0, b: int = 0, kids=()) -> int:
+        self.kind.append(kind)
+        self.a.append(a)
+        self.b.append(b)
+        self.first.append(len(self.kids))
+        self.count.append(len(kids))
+        self.kids.extend(kids)
+        return len(self.kind) - 1
+
+    def add_literal(self, kind: int, value) -> int:
+        exact = bool if kind == K_BOOL else int
+        if type(value) is exact and INT64_MIN <= value <= INT64_MAX:
+            return self.add(kind, int(value))
+        self.consts.append(value)
+        return self.add(kind, len(self.consts) - 1, 1)
+
+    def literal(self, i: int):
+        if self.b[i]:
+            return self.consts[self.a[i]]
+        return bool(self.a[i]) if self.kind[i] == K_BOOL else self.a[i]
+
+    def add_params(self, names: List[str]) -> int:
+        pos = len(self.params)
+        self.params.append(len(names))
+        self.params.extend(self.string(p) for p in names)
+        return pos
+
+    def param_names(self, i: int) -> List[str]:
+        pos = self.b[i]
+        return [self.strings[s] for s in self.params[pos + 1:pos + 1 + self.params[pos]]]
+
+    def children(self, i: int):
+        f = self.first[i]
+        return self.kids[f:f + self.count[i]]
+
+    def root(self):
+        return self.kids[self.root_first:self.root_first + self.root_count]
+
+    # Conversão a partir de / para Lang.Program
+    @staticmethod
+    def from_program(prog: Program) -> "ProgramArena":
+        arena = ProgramArena()
+        results = []  # índices dos nós já convertidos
+        stack = [(s, False) for s in reversed(prog.body)]
+        while stack:
+            node, ready = stack.pop()
+            subnodes = arena.subnodes(node)
+            if not ready:
+                # Pós-ordem sem recursão: o nó volta à pilha depois dos filhos
+                stack.append((node, True))
+                stack.extend((c, False) for c in reversed(subnodes))
+                continue
+            kids = results[len(results) - len(subnodes):]
+            del results[len(results) - len(subnodes):]
+            results.append(arena.add_node(node, kids))
+
+        arena.root_first = len(arena.kids)
+        arena.root_count = len(results)
+        arena.kids.extend(results)
+        return arena
+
+    @staticmethod
+    def subnodes(node) -> list:
+        if isinstance(node, BinOp):
+            return [node.left, node.right]
+        elif isinstance(node, UnaryOp):
+            return [node.expr]
+        elif isinstance(node, FunctionCall):
+            return list(node.args)
+        elif isinstance(node, (Assign, Return, Print)):
+            return [node.expr]
+        elif isinstance(node, If):
+            return [node.condition] + list(node.then_branch) + list(node.else_branch)
+        elif isinstance(node, While):
+            return [node.condition] + list(node.body)
+        elif isinstance(node, For):
+            return [node.start, node.end] + list(node.body)
+        elif isinstance(node, FunctionDef):
+            return list(node.body)
+        return []
+
+    def add_node(self, node, kids) -> int:
+        kind = KIND_OF.get(type(node))
+        if kind is None:
+            kind = next(k for cls, k in KIND_OF.items() if isinstance(node, cls))
+        if kind in (K_INT, K_BOOL):
+            return self.add_literal(kind, node.value)
+        if kind in (K_VAR, K_CALL, K_DEF):
+            b = self.add_params(node.params) if kind == K_DEF else 0
+            return self.add(kind, self.string(node.name), b, kids)
+        if kind in (K_BINOP, K_UNOP):
+            return self.add(kind, self.string(node.op), 0, kids)
+        if kind in (K_ASSIGN, K_FOR):
+            return self.add(kind, self.string(node.var), 0, kids)
+        if kind == K_IF:
+            return self.add(kind, 0, len(node.then_branch), kids)
+        return self.add(kind, 0, 0, kids)
+
+    def to_program(self) -> Program:
+        nodes = [None] * len(self.kind)
+        strings = self.strings
+        for i in range(len(self.kind)):
+            k = self.kind[i]
+            kids = [nodes[c] for c in self.children(i)]
+            if k == K_VAR:
+                nodes[i] = Var(strings[self.a[i]])
+            elif k == K_INT:
+                nodes[i] = IntLit(self.literal(i))
+            elif k == K_BOOL:
+                nodes[i] = BoolLit(self.literal(i))
+            elif k == K_BINOP:
+                nodes[i] = BinOp(strings[self.a[i]], kids[0], kids[1])
+            elif k == K_UNOP:
+                nodes[i] = UnaryOp(strings[self.a[i]], kids[0])
+            elif k == K_CALL:
+                nodes[i] = FunctionCall(strings[self.a[i]], kids)
+            elif k == K_ASSIGN:
+                nodes[i] = Assign(strings[self.a[i]], kids[0])
+            elif k == K_IF:
+                n_then = self.b[i]
+                nodes[i] = If(kids[0], kids[1:1 + n_then], kids[1 + n_then:])
+            elif k == K_WHILE:
+                nodes[i] = While(kids[0], kids[1:])
+            elif k == K_FOR:
+                nodes[i] = For(strings[self.a[i]], kids[0], kids[1], kids[2:])
+            elif k == K_DEF:
+                nodes[i] = FunctionDef(strings[self.a[i]], self.param_names(i), kids)
+            elif k == K_RETURN:
+                nodes[i] = Return(kids[0])
+            elif k == K_PRINT:
+                nodes[i] = Print(kids[0])
+        return Program([nodes[i] for i in self.root()])
+
+    def empty_like(self) -> "ProgramArena":
+        # Nova arena com a mesma tabela de strings e os mesmos literais grandes
+        arena = ProgramArena()
+        arena.strings = list(self.strings)
+        arena.string_ids = dict(self.string_ids)
+        arena.consts = list(self.consts)
+        arena.params = array("i", self.params)
+        return arena
+
+    def compact(self) -> "ProgramArena":
+        # Remove nós inalcançáveis (ex: subárvores eliminadas pela simplificação)
+        n = len(self.kind)
+        live = bytearray(n)
+        for r in self.root():
+            live[r] = 1
+        for i in range(n - 1, -1, -1):  # os pais vêm sempre depois dos filhos
+            if live[i]:
+                for c in self.children(i):
+                    live[c] = 1
+        if live.count(0) == 0:
+            return self
+
+        out = self.empty_like()
+        remap = array("i", bytes(4 * n))
+        for i in range(n):
+            if live[i]:
+                remap[i] = out.add(self.kind[i], self.a[i], self.b[i], [remap[c] for c in self.children(i)])
+        root = [remap[r] for r in self.root()]
+        out.root_first = len(out.kids)
+        out.root_count = len(root)
+        out.kids.extend(root)
+        return out
+
+    # Contagens (equivalentes a optimization.instructions e optimization.names)
+    def instructions(self) -> dict[str, int]:
+        counts = [0] * len(KIND_CLASSES)
+        for k in self.kind:
+            counts[k] += 1
+        return {KIND_CLASSES[k].__name__: counts[k] for k in STMT_KINDS if counts[k]}
+
+    def names(self) -> list[str]:
+        result = set()
+        for i in range(len(self.kind)):
+            k = self.kind[i]
+            if k == K_ASSIGN or k == K_FOR:
+                result.add(self.strings[self.a[i]])
+            elif k == K_DEF:
+                result.add(self.strings[self.a[i]])
+                result.update(self.param_names(i))
+        return sorted(result)
+
+    # Simplificação (as mesmas regras de optimization.opt)
+    def simplify(self) -> "ProgramArena":
+        n = len(self.kind)
+        kind, a, strings = self.kind, self.a, self.strings
+
+        # Print e argumentos de chamadas não são simplificados por opt: essas
+        # subárvores são copiadas tal como estão
+        verbatim = bytearray(n)
+        for i in range(n - 1, -1, -1):
+            if verbatim[i] or kind[i] == K_PRINT or kind[i] == K_CALL:
+                for c in self.children(i):
+                    verbatim[c] = 1
+
+        out = self.empty_like()
+        new = array("i", bytes(4 * n))   # índice simplificado de cada nó
+        copy = array("i", bytes(4 * n))  # índice da cópia literal (só nós em `verbatim`)
+        for i in range(n):
+            k = kind[i]
+            kids = self.children(i)
+            if verbatim[i]:
+                copy[i] = out.add(k, a[i], self.b[i], [copy[c] for c in kids])
+                continue
+            if k == K_BINOP:
+                new[i] = out.simplify_binop(strings[a[i]], new[kids[0]], new[kids[1]])
+            elif k == K_UNOP:
+                new[i] = out.simplify_unop(strings[a[i]], new[kids[0]])
+            elif k == K_CALL or k == K_PRINT:
+                new[i] = out.add(k, a[i], self.b[i], [copy[c] for c in kids])
+            else:
+                new[i] = out.add(k, a[i], self.b[i], [new[c] for c in kids])
+
+        root = [new[r] for r in self.root()]
+        out.root_first = len(out.kids)
+        out.root_count = len(root)
+        out.kids.extend(root)
+        return out.compact()
+
+    def int_value(self, i: int):
+        return self.literal(i) if self.kind[i] == K_INT else None
+
+    def bool_value(self, i: int):
+        return self.literal(i) if self.kind[i] == K_BOOL else None
+
+    def simplify_binop(self, op: str, left: int, right: int) -> int:
+        lv, rv = self.int_value(left), self.int_value(right)
+        lb, rb = self.bool_value(left), self.bool_value(right)
+
+        if op == "+":
+            if lv is not None and lv == 0: return right
+            if rv is not None and rv == 0: return left
+        if op == "-":
+            if lv is not None and lv == 0: return self.add(K_UNOP, self.string("-"), 0, [right])
+            if rv is not None and rv == 0: return left
+        if op == "*":
+            if lv is not None:
+                if lv == 1: return right
+                if lv == 0: return self.add_literal(K_INT, 0)
+            if rv is not None:
+                if rv == 1: return left
+                if rv == 0: return self.add_literal(K_INT, 0)
+        if op == "/":
+            if rv is not None and rv == 1: return left
+            if lv is not None and lv == 0: return self.add_literal(K_INT, 0)
+            if rv is not None and rv == 0:
+                raise ZeroDivisionError("Divisão por zero")
+
+        if lv is not None and rv is not None:
+            if op == "+": return self.add_literal(K_INT, lv + rv)
+            elif op == "-": return self.add_literal(K_INT, lv - rv)
+            elif op == "*": return self.add_literal(K_INT, lv * rv)
+            elif op == "/": return self.add_literal(K_INT, lv // rv)
+
+        if op == "&&":
+            if lb is not None: return right if lb else self.add_literal(K_BOOL, False)
+            if rb is not None: return left if rb else self.add_literal(K_BOOL, False)
+        if op == "||":
+            if lb is not None: return self.add_literal(K_BOOL, True) if lb else right
+            if rb is not None: return self.add_literal(K_BOOL, True) if rb else left
+
+        return self.add(K_BINOP, self.string(op), 0, [left, right])
+
+    def simplify_unop(self, op: str, inner: int) -> int:
+        value = self.bool_value(inner)
+        if op == "not" and value is not None:
+            return self.add_literal(K_BOOL, not value)
+        return self.add(K_UNOP, self.string(op), 0, [inner])
+
+
+# Interpretador sobre a arena (mesma semântica que evaluate)
+class ArenaEvaluator:
+    def __init__(self, arena: ProgramArena):
+        self.arena = arena
+        self.kind = arena.kind
+        self.a = arena.a
+        self.first = arena.first
+        self.count = arena.count
+        self.kids = arena.kids
+        self.names = arena.strings
+        self.binops = [BINOPS.get(s, unknown_op) for s in arena.strings]
+        self.unops = [UNOPS.get(s, unknown_op) for s in arena.strings]
+
+    def expr(self, i: int, env: dict, func_env: dict):
+        k = self.kind[i]
+        if k == K_VAR:
+            return env[self.names[self.a[i]]]
+        elif k == K_BINOP:
+            f = self.first[i]
+            l = self.expr(self.kids[f], env, func_env)
+            r = self.expr(self.kids[f + 1], env, func_env)
+            return self.binops[self.a[i]](l, r)
+        elif k == K_INT or k == K_BOOL:
+            return self.arena.literal(i)
+        elif k == K_UNOP:
+            return self.unops[self.a[i]](self.expr(self.kids[self.first[i]], env, func_env))
+        elif k == K_CALL:
+            name = self.names[self.a[i]]
+            func = func_env.get(name)
+            if func is None:
+                raise Exception(f"Função '{name}' não definida")
+            params, body_first, body_count = func
+            if len(params) != self.count[i]:
+                raise Exception(f"Número de argumentos incorreto em '{name}'")
+
+            new_env = {}  # Ambiente local para a função
+            f = self.first[i]
+            for j, param in enumerate(params):
+                new_env[param] = self.expr(self.kids[f + j], env, func_env)
+
+            completion = self.block(body_first, body_count, new_env, func_env)
+            if completion is not None:
+                return completion.value
+            raise Exception(f"Função '{name}' não retornou valor")
+        return None
+
+    def block(self, first: int, count: int, env: dict, func_env: dict):
+        kids = self.kids
+        for j in range(first, first + count):
+            completion = self.stmt(kids[j], env, func_env)
+            if completion is not None:
+                return completion
+        return None
+
+    def stmt(self, i: int, env: dict, func_env: dict):
+        k = self.kind[i]
+        f = self.first[i]
+        kids = self.kids
+        if k == K_ASSIGN:
+            env[self.names[self.a[i]]] = self.expr(kids[f], env, func_env)
+
+        elif k == K_IF:
+            n_then = self.arena.b[i]
+            if self.expr(kids[f], env, func_env):
+                return self.block(f + 1, n_then, env, func_env)
+            return self.block(f + 1 + n_then, self.count[i] - 1 - n_then, env, func_env)
+
+        elif k == K_WHILE:
+            while self.expr(kids[f], env, func_env):
+                completion = self.block(f + 1, self.count[i] - 1, env, func_env)
+                if completion is not None:
+                    return completion
+
+        elif k == K_FOR:
+            var = self.names[self.a[i]]
+            start = self.expr(kids[f], env, func_env)
+            end = self.expr(kids[f + 1], env, func_env)
+            for v in range(start, end):
+                env[var] = v
+                completion = self.block(f + 2, self.count[i] - 2, env, func_env)
+                if completion is not None:
+                    return completion
+
+        elif k == K_DEF:
+            func_env[self.names[self.a[i]]] = (self.arena.param_names(i), f, self.count[i])
+
+        elif k == K_RETURN:
+            return Returned(self.expr(kids[f], env, func_env))
+
+        elif k == K_PRINT:
+            val = self.expr(kids[f], env, func_env)
+            if self.kind[kids[f]] == K_INT:
+                print(f"Instr: {val}")
+            else:
+                print(val)
+
+
+def evaluate_arena(arena: ProgramArena, inputs: Inputs) -> int:
+    env = {var: val for var, val in inputs}
+    evaluator = ArenaEvaluator(arena)
+
+    completion = evaluator.block(arena.root_first, arena.root_count, env, {})
+    if completion is not None:
+        return completion.value
+
+    if "result" in env:
+        return env["result"]
+    else:
+        raise Exception("No return or 'result' variable found.")
@@ -0,0 +1,265 @@
+from typing import List, Tuple, Optional
+from Lang import *
+from evaluate import Inputs, evaluate
+
+try:
+    import numpy as np
+except ImportError:  # NumPy é opcional: sem ele todas as lanes seguem o caminho escalar
+    np = None
+
+# Extra : Avaliação vetorizada de um programa sobre muitos inputs
+# Cada variável é um array NumPy com uma posição (lane) por vetor de inputs.
+# Os ramos de If são executados com máscaras e os ciclos repetem-se enquanto
+# houver lanes ativas. Tudo o que não é vetorizável de forma exata (chamadas de
+# funções, print, divisão por zero, overflow de int64, tipos mistos, ...) retira
+# as lanes afetadas da execução vetorial; essas lanes são depois avaliadas
+# individualmente com evaluate, pelo que os resultados são sempre os mesmos.
+
+INT_LIMIT = 2 ** 62   # margem para + e - não saírem de int64
+MUL_LIMIT = 2 ** 31   # margem para * não sair de int64
+
+
+def truthy(v):
+    return v if v.dtype == bool else v != 0
+
+def as_int(v):
+    return v.astype(np.int64) if v.dtype == bool else v
+
+
+class BatchRun:
+    def __init__(self, n: int, fuel: Optional[int] = None):
+        self.n = n
+        self.fuel = fuel
+        self.alive = np.ones(n, dtype=bool)      # lanes ainda em execução vetorial
+        self.fallback = np.zeros(n, dtype=bool)  # lanes a avaliar com evaluate
+        self.returned = np.zeros(n, dtype=bool)
+        self.steps = np.zeros(n, dtype=np.int64)  # fuel gasto por lane, como em Budget
+        self.results = [None] * n
+        self.env = {}  # nome → [valores, máscara de lanes onde está definida]
+
+    def eject(self, mask):
+        mask = mask & self.alive
+        self.fallback |= mask
+        self.alive &= ~mask
+
+    def tick(self, mask):
+        # Uma iteração de ciclo: as lanes que esgotam o fuel vão para evaluate,
+        # que lança ExecutionTimeout no mesmo ponto
+        if self.fuel is None:
+            return mask
+        self.steps += mask
+        self.eject(mask & (self.steps > self.fuel))
+        return mask & self.alive
+
+    def zeros(self):
+        return np.zeros(self.n, dtype=np.int64)
+
+    def load_inputs(self, inputs_matrix: List[Inputs]):
+        columns = {}
+        for lane, inputs in enumerate(inputs_matrix):
+            for var, val in dict(inputs).items():
+                columns.setdefault(var, {})[lane] = val
+
+        for var, lanes in columns.items():
+            is_int = any(type(v) is int for v in lanes.values())
+            values = np.zeros(self.n, dtype=np.int64 if is_int else bool)
+            defined = np.zeros(self.n, dtype=bool)
+            for lane, val in lanes.items():
+                if type(val) is (int if is_int else bool) and -INT_LIMIT < val < INT_LIMIT:
+                    values[lane] = val
+                    defined[lane] = True
+                else:
+                    self.fallback[lane] = True
+                    self.alive[lane] = False
+            self.env[var] = [values, defined]
+
+    def assign(self, name: str, value, mask):
+        entry = self.env.get(name)
+        if entry is None:
+            self.env[name] = [value.copy(), mask.copy()]
+            return
+        values, defined = entry
+        if values.dtype != value.dtype:
+            # Uma variável tem um único tipo em todas as lanes
+            if (defined & ~mask & self.alive).any():
+                self.eject(mask)
+                return
+            values = values.astype(value.dtype)
+        entry[0] = np.where(mask, value, values)
+        entry[1] = defined | mask
+
+    def eval_expr(self, expr: Expr, mask):
+        if isinstance(expr, BoolLit):
+            return np.full(self.n, bool(expr.value))
+
+        elif isinstance(expr, IntLit):
+            if type(expr.value) is bool:
+                return np.full(self.n, expr.value)
+            if -INT_LIMIT < expr.value < INT_LIMIT:
+                return np.full(self.n, expr.value, dtype=np.int64)
+            self.eject(mask)
+            return self.zeros()
+
+        elif isinstance(expr, Var):
+            entry = self.env.get(expr.name)
+            if entry is None:
+                self.eject(mask)
+                return self.zeros()
+            values, defined = entry
+            self.eject(mask & ~defined)
+            return values
+
+        elif isinstance(expr, BinOp):
+            l = self.eval_expr(expr.left, mask)
+            r = self.eval_expr(expr.right, mask)
+            return self.binop(expr.op, l, r, mask & self.alive)
+
+        elif isinstance(expr, UnaryOp):
+            v = self.eval_expr(expr.expr, mask)
+            mask = mask & self.alive
+            if expr.op == "not":
+                return ~truthy(v)
+            if expr.op == "-":
+                v = as_int(v)
+                self.eject(mask & (np.abs(v) >= INT_LIMIT))
+                return -v
+            self.eject(mask)
+            return self.zeros()
+
+        else:
+            # FunctionCall: cada lane pode seguir um caminho diferente dentro da função
+            self.eject(mask)
+            return self.zeros()
+
+    def binop(self, op: str, l, r, mask):
+        if op in ("+", "-", "*", "/"):
+            l = as_int(l)
+            r = as_int(r)
+            limit = MUL_LIMIT if op == "*" else INT_LIMIT
+            self.eject(mask & ((np.abs(l) >= limit) | (np.abs(r) >= limit)))
+            if op == "+": return l + r
+            if op == "-": return l - r
+            if op == "*": return l * r
+            self.eject(mask & (r == 0))  # ZeroDivisionError fica para o caminho escalar
+            return np.floor_divide(l, np.where(r == 0, 1, r))
+        if op == "==": return l == r
+        if op == "!=": return l != r
+        if op == "<": return l < r
+        if op == ">": return l > r
+        if op in ("&&", "||"):
+            if l.dtype != r.dtype:
+                # "l and r" devolveria tipos diferentes em lanes diferentes
+                self.eject(mask)
+                return l
+            if op == "&&":
+                return np.where(truthy(l), r, l)
+            return np.where(truthy(l), l, r)
+        # Operador desconhecido: evaluate devolve None
+        self.eject(mask)
+        return self.zeros()
+
+    def exec_block(self, stmts: List[Stmt], mask):
+        for s in stmts:
+            mask = mask & self.alive
+            if not mask.any():
+                return
+            self.exec_stmt(s, mask)
+
+    def exec_stmt(self, stmt: Stmt, mask):
+        if isinstance(stmt, Assign):
+            value = self.eval_expr(stmt.expr, mask)
+            self.assign(stmt.var, value, mask & self.alive)
+
+        elif isinstance(stmt, If):
+            cond = truthy(self.eval_expr(stmt.condition, mask))
+            mask = mask & self.alive
+            self.exec_block(stmt.then_branch, mask & cond)
+            self.exec_block(stmt.else_branch, mask & ~cond)
+
+        elif isinstance(stmt, While):
+            while True:
+                mask = mask & self.alive
+                if not mask.any():
+                    break
+                cond = truthy(self.eval_expr(stmt.condition, mask))
+                mask = mask & self.alive & cond
+                if not mask.any():
+                    break
+                mask = self.tick(mask)
+                if not mask.any():
+                    break
+                self.exec_block(stmt.body, mask)
+
+        elif isinstance(stmt, For):
+            start = as_int(self.eval_expr(stmt.start, mask))
+            end = as_int(self.eval_expr(stmt.end, mask))
+            k = 0
+            while True:
+                i = start + k
+                loop = mask & self.alive & (i < end)
+                if not loop.any():
+                    break
+                loop = self.tick(loop)
+                if not loop.any():
+                    break
+                self.assign(stmt.var, i, loop)
+                self.exec_block(stmt.body, loop)
+                k += 1
+
+        elif isinstance(stmt, Return):
+            value = self.eval_expr(stmt.expr, mask)
+            mask = mask & self.alive
+            for lane in np.nonzero(mask)[0]:
+                self.results[lane] = value[lane].item()
+            self.returned |= mask
+            self.alive &= ~mask
+
+        elif isinstance(stmt, Print):
+            # A ordem das linhas impressas só é garantida no caminho escalar
+            self.eject(mask)
+
+        # FunctionDef: só afeta chamadas, que já seguem o caminho escalar
+
+    def finish(self):
+        # Lanes que terminaram sem return usam a variável result
+        entry = self.env.get("result")
+        if entry is not None:
+            values, defined = entry
+            done = self.alive & defined
+            for lane in np.nonzero(done)[0]:
+                self.results[lane] = values[lane].item()
+            self.returned |= done
+            self.alive &= ~done
+        self.eject(self.alive)
+
+
+def evaluate_batch(program: Program, inputs_matrix: List[Inputs], fuel: Optional[int] = None) -> list:
+    # Devolve um resultado por vetor de inputs; se evaluate lançaria uma exceção,
+    # a posição correspondente contém essa exceção
+    n = len(inputs_matrix)
+    if np is None or n == 0:
+        fallback = range(n)
+        results = [None] * n
+    else:
+        run = BatchRun(n, fuel)
+        run.load_inputs(inputs_matrix)
+        run.exec_block(program.body, run.alive.copy())
+        run.finish()
+        fallback = np.nonzero(run.fallback)[0]
+        results = run.results
+
+    for lane in fallback:
+        try:
+            results[lane] = evaluate(program, inputs_matrix[lane], fuel)
+        except Exception as e:
+            results[lane] = e
+    return results
+
+
+def run_tests_batch(ast: Program, testCases: List[Tuple[Inputs, int]], fuel: Optional[int] = None) -> List[bool]:
+    results = evaluate_batch(ast, [inputs for inputs, _ in testCases], fuel)
+    return [not isinstance(result, Exception) and result == expected
+            for result, (_, expected) in zip(results, testCases)]
+
+def run_test_suite_batch(ast: Program, testCases: List[Tuple[Inputs, int]], fuel: Optional[int] = None) -> bool:
+    return all(run_tests_batch(ast, testCases, fuel))
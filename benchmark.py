@@ -0,0 +1,135 @@
+from Lang import *
+from evaluate import *
+from parser import parse_code
+import timeit, sys
+
+# Microbenchmarks do interpretador
+# Programas recursivos e com muitas chamadas, onde cada return atravessa a pilha.
+
+fib_source = """
+def fib(n):
+    if (n < 2):
+        return n
+    else:
+        return (fib((n - 1)) + fib((n - 2)))
+return fib(n)
+"""
+
+calls_source = """
+def inc(a):
+    return (a + 1)
+s = 0
+for i in range(0, n):
+    s = inc(s)
+return s
+"""
+
+depth_source = """
+def down(n):
+    if (n == 0):
+        return 0
+    else:
+        return (down((n - 1)) + 1)
+return down(n)
+"""
+
+benchmarks = [
+    ("fib recursivo", fib_source, [("n", 18)]),
+    ("chamadas em ciclo", calls_source, [("n", 20000)]),
+    ("recursão profunda", depth_source, [("n", 800)]),
+]
+
+
+# Referência: caminho de return com exceções (versão anterior do interpretador)
+class ReturnException(Exception):
+    def __init__(self, value):
+        self.value = value
+
+def legacy_eval_expr(expr, env, func_env):
+    if isinstance(expr, FunctionCall):
+        func_def = func_env.get(expr.name)
+        if not func_def:
+            raise Exception(f"Função '{expr.name}' não definida")
+        if len(func_def.params) != len(expr.args):
+            raise Exception(f"Número de argumentos incorreto em '{expr.name}'")
+        new_env = {}
+        for param, arg_expr in zip(func_def.params, expr.args):
+            new_env[param] = legacy_eval_expr(arg_expr, env, func_env)
+        try:
+            for stmt in func_def.body:
+                legacy_eval_stmt(stmt, new_env, func_env)
+        except ReturnException as ret:
+            return ret.value
+        raise Exception(f"Função '{expr.name}' não retornou valor")
+    elif isinstance(expr, BinOp):
+        l = legacy_eval_expr(expr.left, env, func_env)
+        r = legacy_eval_expr(expr.right, env, func_env)
+        if expr.op == "+": return l + r
+        if expr.op == "-": return l - r
+        if expr.op == "*": return l * r
+        if expr.op == "/": return l // r
+        if expr.op == "==": return l == r
+        if expr.op == "!=": return l != r
+        if expr.op == "<": return l < r
+        if expr.op == ">": return l > r
+        if expr.op == "&&": return l and r
+        if expr.op == "||": return l or r
+    elif isinstance(expr, UnaryOp):
+        v = legacy_eval_expr(expr.expr, env, func_env)
+        if expr.op == "not": return not v
+        if expr.op == "-": return -v
+    else:
+        return eval_expr(expr, env, func_env)
+
+def legacy_eval_stmt(stmt, env, func_env):
+    if isinstance(stmt, Assign):
+        env[stmt.var] = legacy_eval_expr(stmt.expr, env, func_env)
+    elif isinstance(stmt, If):
+        branch = stmt.then_branch if legacy_eval_expr(stmt.condition, env, func_env) else stmt.else_branch
+        for s in branch:
+            legacy_eval_stmt(s, env, func_env)
+    elif isinstance(stmt, While):
+        while legacy_eval_expr(stmt.condition, env, func_env):
+            for s in stmt.body:
+                legacy_eval_stmt(s, env, func_env)
+    elif isinstance(stmt, For):
+        start = legacy_eval_expr(stmt.start, env, func_env)
+        end = legacy_eval_expr(stmt.end, env, func_env)
+        for i in range(start, end):
+            env[stmt.var] = i
+            for s in stmt.body:
+                legacy_eval_stmt(s, env, func_env)
+    elif isinstance(stmt, FunctionDef):
+        func_env[stmt.name] = stmt
+    elif isinstance(stmt, Return):
+        raise ReturnException(legacy_eval_expr(stmt.expr, env, func_env))
+
+def legacy_evaluate(ast, inputs):
+    env = {var: val for var, val in inputs}
+    func_env = {}
+    try:
+        for stmt in ast.body:
+            legacy_eval_stmt(stmt, env, func_env)
+    except ReturnException as ret:
+        return ret.value
+    return env["result"]
+
+
+def bench(fn, prog, inputs, repeat=5):
+    return min(timeit.repeat(lambda: fn(prog, inputs), number=1, repeat=repeat))
+
+def run_benchmarks(engines):
+    print(f"{'programa':<20}" + "".join(f"{name:>16}" for name, _ in engines))
+    for nome, source, inputs in benchmarks:
+        prog = parse_code(source)
+        tempos = [bench(fn, prog, inputs) for _, fn in engines]
+        print(f"{nome:<20}" + "".join(f"{t * 1000:>14.2f}ms" for t in tempos))
+
+
+def main():
+    sys.setrecursionlimit(20000)
+    print("======================== Return com exceções vs sinal de conclusão ========================")
+    run_benchmarks([("exceções", legacy_evaluate), ("evaluate", evaluate)])
+
+if __name__ == "__main__":
+    main()
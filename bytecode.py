@@ -0,0 +1,279 @@
+from array import array
+from typing import List, Dict, Union
+from Lang import *
+from evaluate import Inputs, BINOPS, UNOPS, unknown_op
+
+# Extra : Bytecode e máquina virtual com slots
+# As variáveis são resolvidas para índices (slots) em tempo de compilação e
+# cada função tem o seu próprio frame. As instruções são pares (opcode, arg)
+# guardados num array de inteiros.
+
+LOAD_CONST = 0
+LOAD = 1
+STORE = 2
+BINARY = 3
+UNARY = 4
+JUMP = 5
+JUMP_IF_FALSE = 6
+FOR_SETUP = 7
+FOR_ITER = 8
+GET_FUNC = 9
+CALL = 10
+RETURN = 11
+PRINT = 12
+DEF_FUNC = 13
+HALT = 14
+
+BINOP_NAMES = list(BINOPS)
+UNOP_NAMES = list(UNOPS)
+
+
+class Unbound:
+    def __repr__(self):
+        return "<unbound>"
+
+UNBOUND = Unbound()
+
+
+class CodeObject:
+    def __init__(self, name: str, params: List[str]):
+        self.name = name
+        self.params = params
+        self.code = array("i")
+        self.consts: List[object] = []
+        self.slots: Dict[str, int] = {}
+        for p in params:
+            self.slot(p)
+
+    def slot(self, name: str) -> int:
+        if name not in self.slots:
+            self.slots[name] = len(self.slots)
+        return self.slots[name]
+
+    def const(self, value) -> int:
+        # Procura por identidade de tipo para não confundir True com 1
+        for i, c in enumerate(self.consts):
+            if type(c) is type(value) and c == value:
+                return i
+        self.consts.append(value)
+        return len(self.consts) - 1
+
+    def emit(self, op: int, arg: int = 0) -> int:
+        self.code.append(op)
+        self.code.append(arg)
+        return len(self.code) - 2
+
+    def patch(self, pos: int, target: int):
+        self.code[pos + 1] = target
+
+    def here(self) -> int:
+        return len(self.code)
+
+
+class BytecodeProgram:
+    def __init__(self, main: CodeObject, functions: List[CodeObject]):
+        self.main = main
+        self.functions = functions  # indexadas pelo argumento de DEF_FUNC
+
+
+class BytecodeCompiler:
+    def __init__(self):
+        self.functions: List[CodeObject] = []
+
+    def compile_program(self, prog: Program) -> BytecodeProgram:
+        main = CodeObject("<main>", [])
+        main.slot("result")  # necessário para o fallback de evaluate
+        self.compile_block(prog.body, main)
+        main.emit(HALT)
+        return BytecodeProgram(main, self.functions)
+
+    def compile_block(self, stmts: List[Stmt], co: CodeObject):
+        for s in stmts:
+            self.compile_stmt(s, co)
+
+    def compile_stmt(self, stmt: Stmt, co: CodeObject):
+        if isinstance(stmt, Assign):
+            self.compile_expr(stmt.expr, co)
+            co.emit(STORE, co.slot(stmt.var))
+
+        elif isinstance(stmt, If):
+            self.compile_expr(stmt.condition, co)
+            jump_else = co.emit(JUMP_IF_FALSE)
+            self.compile_block(stmt.then_branch, co)
+            jump_end = co.emit(JUMP)
+            co.patch(jump_else, co.here())
+            self.compile_block(stmt.else_branch, co)
+            co.patch(jump_end, co.here())
+
+        elif isinstance(stmt, While):
+            start = co.here()
+            self.compile_expr(stmt.condition, co)
+            jump_end = co.emit(JUMP_IF_FALSE)
+            self.compile_block(stmt.body, co)
+            co.emit(JUMP, start)
+            co.patch(jump_end, co.here())
+
+        elif isinstance(stmt, For):
+            self.compile_expr(stmt.start, co)
+            self.compile_expr(stmt.end, co)
+            co.emit(FOR_SETUP)
+            start = co.here()
+            # FOR_ITER guarda o slot da variável; o destino de saída vem a seguir
+            co.emit(FOR_ITER, co.slot(stmt.var))
+            jump_end = co.emit(JUMP)
+            self.compile_block(stmt.body, co)
+            co.emit(JUMP, start)
+            co.patch(jump_end, co.here())
+
+        elif isinstance(stmt, FunctionDef):
+            fco = CodeObject(stmt.name, stmt.params)
+            self.compile_block(stmt.body, fco)
+            fco.emit(HALT)
+            self.functions.append(fco)
+            co.emit(DEF_FUNC, len(self.functions) - 1)
+
+        elif isinstance(stmt, Return):
+            self.compile_expr(stmt.expr, co)
+            co.emit(RETURN)
+
+        elif isinstance(stmt, Print):
+            self.compile_expr(stmt.expr, co)
+            co.emit(PRINT, 1 if isinstance(stmt.expr, IntLit) else 0)
+
+    def compile_expr(self, expr: Expr, co: CodeObject):
+        if isinstance(expr, (IntLit, BoolLit)):
+            co.emit(LOAD_CONST, co.const(expr.value))
+        elif isinstance(expr, Var):
+            co.emit(LOAD, co.slot(expr.name))
+        elif isinstance(expr, BinOp):
+            self.compile_expr(expr.left, co)
+            self.compile_expr(expr.right, co)
+            op = BINOP_NAMES.index(expr.op) if expr.op in BINOPS else -1
+            co.emit(BINARY, op)
+        elif isinstance(expr, UnaryOp):
+            self.compile_expr(expr.expr, co)
+            op = UNOP_NAMES.index(expr.op) if expr.op in UNOPS else -1
+            co.emit(UNARY, op)
+        elif isinstance(expr, FunctionCall):
+            # GET_FUNC valida nome e aridade antes de avaliar os argumentos, como eval_expr
+            co.emit(GET_FUNC, co.const((expr.name, len(expr.args))))
+            for arg in expr.args:
+                self.compile_expr(arg, co)
+            co.emit(CALL, len(expr.args))
+        else:
+            co.emit(LOAD_CONST, co.const(None))
+
+
+def compile_bytecode(prog: Program) -> BytecodeProgram:
+    return BytecodeCompiler().compile_program(prog)
+
+
+BINOP_FUNCS = [BINOPS[op] for op in BINOP_NAMES]
+UNOP_FUNCS = [UNOPS[op] for op in UNOP_NAMES]
+
+def unbound_error(co: CodeObject, slot: int):
+    for name, i in co.slots.items():
+        if i == slot:
+            return KeyError(name)
+    return KeyError(slot)
+
+def run_code(bp: BytecodeProgram, co: CodeObject, frame: list, func_env: dict):
+    # Devolve (True, valor) se houve return, (False, None) caso contrário
+    code = co.code
+    consts = co.consts
+    stack = []
+    push = stack.append
+    pop = stack.pop
+    pc = 0
+
+    while True:
+        op = code[pc]
+        arg = code[pc + 1]
+        pc += 2
+
+        if op == LOAD:
+            v = frame[arg]
+            if v is UNBOUND:
+                raise unbound_error(co, arg)
+            push(v)
+        elif op == LOAD_CONST:
+            push(consts[arg])
+        elif op == STORE:
+            frame[arg] = pop()
+        elif op == BINARY:
+            r = pop()
+            l = pop()
+            push(BINOP_FUNCS[arg](l, r) if arg >= 0 else unknown_op(l, r))
+        elif op == JUMP_IF_FALSE:
+            if not pop():
+                pc = arg
+        elif op == JUMP:
+            pc = arg
+        elif op == FOR_ITER:
+            try:
+                frame[arg] = next(stack[-1])
+            except StopIteration:
+                pop()
+            else:
+                pc += 2  # salta o JUMP de saída
+        elif op == FOR_SETUP:
+            end = pop()
+            start = pop()
+            push(iter(range(start, end)))
+        elif op == UNARY:
+            v = pop()
+            push(UNOP_FUNCS[arg](v) if arg >= 0 else unknown_op(v))
+        elif op == GET_FUNC:
+            name, nargs = consts[arg]
+            fco = func_env.get(name)
+            if not fco:
+                raise Exception(f"Função '{name}' não definida")
+            if len(fco.params) != nargs:
+                raise Exception(f"Número de argumentos incorreto em '{name}'")
+            push(fco)
+        elif op == CALL:
+            args = stack[len(stack) - arg:]
+            del stack[len(stack) - arg:]
+            fco = pop()
+            new_frame = [UNBOUND] * len(fco.slots)
+            for i, a in enumerate(args):
+                new_frame[fco.slots[fco.params[i]]] = a
+            returned, value = run_code(bp, fco, new_frame, func_env)
+            if not returned:
+                raise Exception(f"Função '{fco.name}' não retornou valor")
+            push(value)
+        elif op == RETURN:
+            return True, pop()
+        elif op == PRINT:
+            val = pop()
+            if arg:
+                print(f"Instr: {val}")
+            else:
+                print(val)
+        elif op == DEF_FUNC:
+            fco = bp.functions[arg]
+            func_env[fco.name] = fco
+        elif op == HALT:
+            return False, None
+
+
+def evaluate_bytecode(bp: Union[Program, BytecodeProgram], inputs: Inputs) -> int:
+    if isinstance(bp, Program):
+        bp = compile_bytecode(bp)
+
+    main = bp.main
+    frame = [UNBOUND] * len(main.slots)
+    for var, val in inputs:
+        # Entradas que o programa nunca referencia não precisam de slot
+        if var in main.slots:
+            frame[main.slots[var]] = val
+
+    returned, value = run_code(bp, main, frame, {})
+    if returned:
+        return value
+
+    result = frame[main.slots["result"]]
+    if result is not UNBOUND:
+        return result
+    else:
+        raise Exception("No return or 'result' variable found.")
@@ -0,0 +1,254 @@
+from collections import OrderedDict
+from typing import List, Dict, Union, Callable
+import hashlib, re
+from Lang import *
+from evaluate import Inputs
+from optimization import header_exprs, expr_vars
+
+# Extra : Geração de código Python
+# O Program é traduzido para código-fonte Python e compilado com compile().
+# For, While, If, FunctionDef e Return passam a ser construções nativas, pelo
+# que deixa de haver travessia da árvore e sinais de retorno entre blocos.
+
+PY_BINOPS = {
+    "+": "+",
+    "-": "-",
+    "*": "*",
+    "/": "//",
+    "==": "==",
+    "!=": "!=",
+    "<": "<",
+    ">": ">",
+}
+
+def lang_and(l, r):
+    return l and r
+
+def lang_or(l, r):
+    return l or r
+
+def lang_none(*args):
+    # Operadores desconhecidos avaliam os operandos e devolvem None (como eval_expr)
+    return None
+
+def lang_get_func(funcs: dict, name: str, nargs: int):
+    func = funcs.get(name)
+    if not func:
+        raise Exception(f"Função '{name}' não definida")
+    fn, nparams = func
+    if nparams != nargs:
+        raise Exception(f"Número de argumentos incorreto em '{name}'")
+    return fn
+
+RUNTIME = {
+    "__and": lang_and,
+    "__or": lang_or,
+    "__none": lang_none,
+    "__get": lang_get_func,
+}
+
+
+def py_name(name: str) -> str:
+    # Prefixo evita colisões com palavras reservadas e nomes do runtime
+    return "v_" + name
+
+
+class PythonGenerator:
+    def __init__(self):
+        self.functions: List[str] = []
+
+    def gen_expr(self, expr: Expr) -> str:
+        if isinstance(expr, IntLit):
+            return f"({expr.value!r})"
+        elif isinstance(expr, BoolLit):
+            return "True" if expr.value else "False"
+        elif isinstance(expr, Var):
+            return py_name(expr.name)
+        elif isinstance(expr, BinOp):
+            l = self.gen_expr(expr.left)
+            r = self.gen_expr(expr.right)
+            if expr.op in PY_BINOPS:
+                return f"({l} {PY_BINOPS[expr.op]} {r})"
+            if expr.op in ("&&", "||"):
+                # eval_expr avalia sempre os dois operandos; o curto-circuito
+                # nativo só é seguro quando o lado direito é um literal
+                if isinstance(expr.right, (IntLit, BoolLit)):
+                    return f"({l} {'and' if expr.op == '&&' else 'or'} {r})"
+                return f"{'__and' if expr.op == '&&' else '__or'}({l}, {r})"
+            return f"__none({l}, {r})"
+        elif isinstance(expr, UnaryOp):
+            v = self.gen_expr(expr.expr)
+            if expr.op == "not":
+                return f"(not {v})"
+            if expr.op == "-":
+                return f"(-{v})"
+            return f"__none({v})"
+        elif isinstance(expr, FunctionCall):
+            args = "".join(", " + self.gen_expr(a) for a in expr.args)
+            return f"__get(__funcs, {expr.name!r}, {len(expr.args)})(__funcs{args})"
+        else:
+            return "None"
+
+    def gen_block(self, stmts: List[Stmt], level: int) -> List[str]:
+        lines = []
+        for s in stmts:
+            lines.extend(self.gen_stmt(s, level))
+        if not lines:
+            lines.append("    " * level + "pass")
+        return lines
+
+    def gen_stmt(self, stmt: Stmt, level: int) -> List[str]:
+        pad = "    " * level
+        if isinstance(stmt, Assign):
+            return [f"{pad}{py_name(stmt.var)} = {self.gen_expr(stmt.expr)}"]
+        elif isinstance(stmt, If):
+            return [f"{pad}if {self.gen_expr(stmt.condition)}:"] \
+                + self.gen_block(stmt.then_branch, level + 1) \
+                + [f"{pad}else:"] \
+                + self.gen_block(stmt.else_branch, level + 1)
+        elif isinstance(stmt, While):
+            return [f"{pad}while {self.gen_expr(stmt.condition)}:"] \
+                + self.gen_block(stmt.body, level + 1)
+        elif isinstance(stmt, For):
+            start = self.gen_expr(stmt.start)
+            end = self.gen_expr(stmt.end)
+            return [f"{pad}for {py_name(stmt.var)} in range({start}, {end}):"] \
+                + self.gen_block(stmt.body, level + 1)
+        elif isinstance(stmt, FunctionDef):
+            fn = self.gen_function(stmt)
+            return [f"{pad}__funcs[{stmt.name!r}] = ({fn}, {len(stmt.params)})"]
+        elif isinstance(stmt, Return):
+            return [f"{pad}return {self.gen_expr(stmt.expr)}"]
+        elif isinstance(stmt, Print):
+            val = self.gen_expr(stmt.expr)
+            if isinstance(stmt.expr, IntLit):
+                return [f"{pad}print(f'Instr: {{{val}}}')"]
+            return [f"{pad}print({val})"]
+        else:
+            return []
+
+    def gen_function(self, func: FunctionDef) -> str:
+        # Todas as funções Lang ficam ao nível do módulo gerado: não podem ver
+        # as variáveis de quem as chama, tal como em eval_expr
+        index = len(self.functions)
+        fn = f"__fn_{index}"
+        self.functions.append("")  # reserva o índice para funções aninhadas
+
+        if len(set(func.params)) == len(func.params):
+            params = [py_name(p) for p in func.params]
+            prologue = []
+        else:
+            # Parâmetros repetidos: o último argumento prevalece
+            params = [f"__p{i}" for i in range(len(func.params))]
+            prologue = [f"    {py_name(p)} = __p{i}" for i, p in enumerate(func.params)]
+
+        lines = [f"def {fn}({', '.join(['__funcs'] + params)}):"] \
+            + prologue \
+            + self.gen_block(func.body, 1) \
+            + [f"    raise Exception({f'Função {func.name!r} não retornou valor'!r})"]
+        self.functions[index] = "\n".join(lines)
+        return fn
+
+    def gen_program(self, prog: Program) -> str:
+        read = sorted(program_vars(prog) | {"result"})
+        lines = ["def __lang_main(__inputs):", "    __funcs = {}"]
+        for name in read:
+            lines.append(f"    if {name!r} in __inputs: {py_name(name)} = __inputs[{name!r}]")
+        lines += self.gen_block(prog.body, 1)
+        lines += [
+            "    try:",
+            f"        return {py_name('result')}",
+            "    except NameError:",
+            "        raise Exception(\"No return or 'result' variable found.\") from None",
+        ]
+        return "\n\n".join(self.functions + ["\n".join(lines)]) + "\n"
+
+
+def program_vars(prog: Program) -> set:
+    # Variáveis do nível principal que podem vir das Inputs
+    found = set()
+
+    def visit(stmts):
+        for s in stmts:
+            if isinstance(s, FunctionDef):
+                continue  # o corpo usa um ambiente próprio
+            for expr in header_exprs(s):
+                found.update(expr_vars(expr))
+            if isinstance(s, If):
+                visit(s.then_branch)
+                visit(s.else_branch)
+            elif isinstance(s, (While, For)):
+                visit(s.body)
+
+    visit(prog.body)
+    return found
+
+
+def python_source(prog: Program) -> str:
+    return PythonGenerator().gen_program(prog)
+
+
+def structural_hash(prog: Program) -> str:
+    # repr dos dataclasses é estrutural e determinístico
+    return hashlib.sha256(repr(prog).encode("utf-8")).hexdigest()
+
+
+class CodeCache:
+    def __init__(self, maxsize: int = 256):
+        self.maxsize = maxsize
+        self.entries: "OrderedDict[str, Callable]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str):
+        fn = self.entries.get(key)
+        if fn is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return fn
+
+    def put(self, key: str, fn: Callable):
+        self.entries[key] = fn
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def info(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses,
+                "size": len(self.entries), "maxsize": self.maxsize}
+
+code_cache = CodeCache()
+
+
+def compile_python(prog: Program, cache: CodeCache = code_cache) -> Callable:
+    key = structural_hash(prog)
+    fn = cache.get(key) if cache is not None else None
+    if fn is not None:
+        return fn
+
+    code = compile(python_source(prog), f"<lang {key[:12]}>", "exec")
+    namespace = dict(RUNTIME)
+    exec(code, namespace)
+    fn = namespace["__lang_main"]
+    if cache is not None:
+        cache.put(key, fn)
+    return fn
+
+
+def evaluate_python(prog: Union[Program, Callable], inputs: Inputs) -> int:
+    fn = compile_python(prog) if isinstance(prog, Program) else prog
+    try:
+        return fn({var: val for var, val in inputs})
+    except NameError as e:
+        # Variável Lang por atribuir: o mesmo KeyError de eval_expr
+        match = re.search(r"'v_(\w+)'", str(e))
+        if match:
+            raise KeyError(match.group(1)) from None
+        raise
@@ -1,18 +1,85 @@
-from typing import List, Tuple, Dict, Union
+from typing import List, Tuple, Dict, Union, Callable, Optional
 from Lang import *
-import random, sys
+from optimization import pure_functions
+from collections import OrderedDict
+import random, sys, operator, time
 from io import StringIO
 
 # 1.5 Software Testing
 
 Inputs = List[Tuple[str, int]]
 
-class ReturnException(Exception):
+# Sinal de conclusão de uma instrução: None (normal) ou Returned (return com valor)
+class Returned:
+    __slots__ = ("value",)
+
     def __init__(self, value):
         self.value = value
 
+# Limite de execução: fuel conta iterações de ciclos e chamadas de funções,
+# timeout é o tempo máximo (em segundos) de uma execução.
+# A cache de memoização (MemoCache) viaja no mesmo objeto: um argumento extra
+# em cada chamada recursiva de eval_expr/eval_stmt torna fib ~20% mais lento.
+class ExecutionTimeout(Exception):
+    pass
+
+class Budget:
+    __slots__ = ("fuel", "deadline", "memo")
+
+    def __init__(self, fuel: Optional[int] = None, timeout: Optional[float] = None, memo=None):
+        self.fuel = fuel
+        self.deadline = time.monotonic() + timeout if timeout is not None else None
+        self.memo = memo
+
+    def tick(self):
+        if self.fuel is not None:
+            self.fuel -= 1
+            if self.fuel < 0:
+                raise ExecutionTimeout("Limite de passos de execução esgotado")
+        if self.deadline is not None and time.monotonic() > self.deadline:
+            raise ExecutionTimeout("Tempo limite de execução excedido")
+
+# Memoização de chamadas a funções puras (ver pure_functions), numa cache LRU
+# indexada pela definição da função e pelos argumentos
+class MemoCache:
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.pure = set()
+        self.program = None
+        self.hits = 0
+        self.misses = 0
+
+    def analyze(self, ast: Program):
+        if self.program is not ast:
+            self.program = ast
+            self.pure = pure_functions(ast)
+
+    def key(self, func_def: FunctionDef, args: list):
+        # O tipo entra na chave para não confundir True com 1
+        return (id(func_def),) + tuple((type(a), a) for a in args)
+
+    def get(self, func_def: FunctionDef, key):
+        entry = self.entries.get(key)
+        if entry is None or entry[0] is not func_def:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return entry
+
+    def put(self, func_def: FunctionDef, key, value):
+        self.entries[key] = (func_def, value)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    def info(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses,
+                "size": len(self.entries), "maxsize": self.maxsize}
+
 # 1. Evaluation
-def eval_expr(expr: Expr, env: Dict[str, Union[int, bool]], func_env: dict) -> Union[int, bool]:
+def eval_expr(expr: Expr, env: Dict[str, Union[int, bool]], func_env: dict, budget: Optional[Budget] = None) -> Union[int, bool]:
     if isinstance(expr, IntLit):
         return expr.value
     elif isinstance(expr, BoolLit):
@@ -20,8 +87,8 @@ def eval_expr(expr: Expr, env: Dict[str, Union[int, bool]], func_env: dict) -> U
     elif isinstance(expr, Var):
         return env[expr.name]
     elif isinstance(expr, BinOp):
-        l = eval_expr(expr.left, env, func_env)
-        r = eval_expr(expr.right, env, func_env)
+        l = eval_expr(expr.left, env, func_env, budget)
+        r = eval_expr(expr.right, env, func_env, budget)
         if expr.op == "+": return l + r
         if expr.op == "-": return l - r
         if expr.op == "*": return l * r
@@ -33,7 +100,7 @@ def eval_expr(expr: Expr, env: Dict[str, Union[int, bool]], func_env: dict) -> U
         if expr.op == "&&": return l and r
         if expr.op == "||": return l or r
     elif isinstance(expr, UnaryOp):
-        v = eval_expr(expr.expr, env, func_env)
+        v = eval_expr(expr.expr, env, func_env, budget)
         if expr.op == "not": return not v
         if expr.op == "-": return -v
     elif isinstance(expr, FunctionCall):
@@ -44,51 +111,81 @@ def eval_expr(expr: Expr, env: Dict[str, Union[int, bool]], func_env: dict) -> U
         if len(func_def.params) != len(expr.args):
             raise Exception(f"Número de argumentos incorreto em '{expr.name}'")
 
+        if budget is not None:
+            budget.tick()
+
         new_env = {}  # Ambiente local para a função
 
         for param, arg_expr in zip(func_def.params, expr.args):
-            new_env[param] = eval_expr(arg_expr, env, func_env)
-
-        try:
-            for stmt in func_def.body:
-                eval_stmt(stmt, new_env, func_env)
-        except ReturnException as ret:
-            return ret.value
+            new_env[param] = eval_expr(arg_expr, env, func_env, budget)
+
+        key = None
+        memo = budget.memo if budget is not None else None
+        if memo is not None and expr.name in memo.pure:
+            key = memo.key(func_def, [new_env[p] for p in func_def.params])
+            entry = memo.get(func_def, key)
+            if entry is not None:
+                return entry[1]
+
+        for stmt in func_def.body:
+            completion = eval_stmt(stmt, new_env, func_env, budget)
+            if completion is not None:
+                if key is not None:
+                    memo.put(func_def, key, completion.value)
+                return completion.value
 
         raise Exception(f"Função '{expr.name}' não retornou valor")
 
 
-def eval_stmt(stmt: Stmt, env: Dict[str, Union[int, bool]], func_env: dict):
+def eval_block(stmts: List[Stmt], env: Dict[str, Union[int, bool]], func_env: dict, budget: Optional[Budget] = None):
+    for s in stmts:
+        completion = eval_stmt(s, env, func_env, budget)
+        if completion is not None:
+            return completion
+    return None
+
+
+def eval_stmt(stmt: Stmt, env: Dict[str, Union[int, bool]], func_env: dict, budget: Optional[Budget] = None):
     if isinstance(stmt, Assign):
-        env[stmt.var] = eval_expr(stmt.expr, env, func_env)
+        env[stmt.var] = eval_expr(stmt.expr, env, func_env, budget)
     
     elif isinstance(stmt, If):
-        cond = eval_expr(stmt.condition, env, func_env)
+        cond = eval_expr(stmt.condition, env, func_env, budget)
         branch = stmt.then_branch if cond else stmt.else_branch
         for s in branch:
-            eval_stmt(s, env, func_env)
+            completion = eval_stmt(s, env, func_env, budget)
+            if completion is not None:
+                return completion
     
     elif isinstance(stmt, While):
-        while eval_expr(stmt.condition, env, func_env):
+        while eval_expr(stmt.condition, env, func_env, budget):
+            if budget is not None:
+                budget.tick()
             for s in stmt.body:
-                eval_stmt(s, env, func_env)
+                completion = eval_stmt(s, env, func_env, budget)
+                if completion is not None:
+                    return completion
     
     elif isinstance(stmt, For):
-        start = eval_expr(stmt.start, env, func_env)
-        end = eval_expr(stmt.end, env, func_env)
+        start = eval_expr(stmt.start, env, func_env, budget)
+        end = eval_expr(stmt.end, env, func_env, budget)
         for i in range(start, end):
+            if budget is not None:
+                budget.tick()
             env[stmt.var] = i
             for s in stmt.body:
-                eval_stmt(s, env, func_env)
+                completion = eval_stmt(s, env, func_env, budget)
+                if completion is not None:
+                    return completion
    
     elif isinstance(stmt, FunctionDef):
         func_env[stmt.name] = stmt
 
     elif isinstance(stmt, Return):
-        raise ReturnException(eval_expr(stmt.expr, env, func_env))
+        return Returned(eval_expr(stmt.expr, env, func_env, budget))
 
     elif isinstance(stmt, Print):
-        val = eval_expr(stmt.expr, env, func_env)
+        val = eval_expr(stmt.expr, env, func_env, budget)
         if isinstance(stmt.expr, IntLit):
             print(f"Instr: {val}")
         else:
@@ -98,15 +195,385 @@ def eval_stmt(stmt: Stmt, env: Dict[str, Union[int, bool]], func_env: dict):
     elif isinstance(stmt, FunctionDef):
         raise NotImplementedError("Function definitions not yet supported")
 
-def evaluate(ast: Program, inputs: Inputs) -> int:
+def evaluate(ast: Program, inputs: Inputs, fuel: Optional[int] = None, timeout: Optional[float] = None,
+             memo: Optional[MemoCache] = None, profiler=None) -> int:
+    if profiler is not None:
+        # Modo de profiling (ver profiler.py): corre a versão instrumentada em closures
+        if fuel is not None or timeout is not None or memo is not None:
+            raise Exception("O profiler não suporta fuel, timeout nem memo")
+        return evaluate_compiled(profiler.compile(ast), inputs)
+
     env = {var: val for var, val in inputs}
     func_env = {} # Novo ambiente para funções
+    budget = None
+    if fuel is not None or timeout is not None or memo is not None:
+        budget = Budget(fuel, timeout, memo)
+    if memo is not None:
+        memo.analyze(ast)
     
-    try:
-        for stmt in ast.body:
-            eval_stmt(stmt, env, func_env)
-    except ReturnException as ret:
-        return ret.value
+    completion = eval_block(ast.body, env, func_env, budget)
+    if completion is not None:
+        return completion.value
+
+    if "result" in env:
+        return env["result"]
+    else:
+        raise Exception("No return or 'result' variable found.")
+
+# Extra : Compilação para closures
+# A AST é percorrida uma única vez e transformada em funções Python aninhadas,
+# com os operadores já resolvidos. Cada closure recebe (env, func_env) e as
+# instruções devolvem o mesmo sinal de conclusão que eval_stmt.
+
+BINOPS = {
+    "+": operator.add,
+    "-": operator.sub,
+    "*": operator.mul,
+    "/": operator.floordiv,
+    "==": operator.eq,
+    "!=": operator.ne,
+    "<": operator.lt,
+    ">": operator.gt,
+    "&&": lambda l, r: l and r,
+    "||": lambda l, r: l or r,
+}
+
+UNOPS = {
+    "not": operator.not_,
+    "-": operator.neg,
+}
+
+def unknown_op(*args):
+    # eval_expr devolve None para operadores desconhecidos (ex: "<=" criado por mutate_expr)
+    return None
+
+def compile_expr(expr: Expr, profiler=None) -> Callable:
+    fn = compile_expr_node(expr, profiler)
+    return fn if profiler is None else profiler.wrap_node(expr, fn)
+
+def compile_expr_node(expr: Expr, profiler=None) -> Callable:
+    if isinstance(expr, (IntLit, BoolLit)):
+        value = expr.value
+        return lambda env, func_env: value
+
+    elif isinstance(expr, Var):
+        name = expr.name
+        return lambda env, func_env: env[name]
+
+    elif isinstance(expr, BinOp):
+        f = BINOPS.get(expr.op, unknown_op)
+        # Casos frequentes (variável com literal) evitam uma chamada por operando;
+        # com o profiler ativo cada operando tem de ser um nó medido
+        if profiler is None and isinstance(expr.left, Var) and isinstance(expr.right, (IntLit, BoolLit)):
+            name, value = expr.left.name, expr.right.value
+            return lambda env, func_env: f(env[name], value)
+        if profiler is None and isinstance(expr.left, Var) and isinstance(expr.right, Var):
+            lname, rname = expr.left.name, expr.right.name
+            return lambda env, func_env: f(env[lname], env[rname])
+        left = compile_expr(expr.left, profiler)
+        right = compile_expr(expr.right, profiler)
+        return lambda env, func_env: f(left(env, func_env), right(env, func_env))
+
+    elif isinstance(expr, UnaryOp):
+        f = UNOPS.get(expr.op, unknown_op)
+        inner = compile_expr(expr.expr, profiler)
+        return lambda env, func_env: f(inner(env, func_env))
+
+    elif isinstance(expr, FunctionCall):
+        name = expr.name
+        args = [compile_expr(a, profiler) for a in expr.args]
+        nargs = len(args)
+
+        def call(env, func_env):
+            func = func_env.get(name)
+            if not func:
+                raise Exception(f"Função '{name}' não definida")
+            params, body = func
+            if len(params) != nargs:
+                raise Exception(f"Número de argumentos incorreto em '{name}'")
+
+            new_env = {}  # Ambiente local para a função
+            for param, arg in zip(params, args):
+                new_env[param] = arg(env, func_env)
+
+            completion = body(new_env, func_env)
+            if completion is not None:
+                return completion.value
+
+            raise Exception(f"Função '{name}' não retornou valor")
+        return call
+
+    else:
+        return lambda env, func_env: None
+
+
+def compile_block(stmts: List[Stmt], profiler=None) -> Callable:
+    compiled = tuple(compile_stmt(s, profiler) for s in stmts)
+    if len(compiled) == 1:
+        return compiled[0]
+
+    def block(env, func_env):
+        for s in compiled:
+            completion = s(env, func_env)
+            if completion is not None:
+                return completion
+    return block
+
+
+def compile_stmt(stmt: Stmt, profiler=None) -> Callable:
+    fn = compile_stmt_node(stmt, profiler)
+    return fn if profiler is None else profiler.wrap_node(stmt, fn)
+
+def compile_stmt_node(stmt: Stmt, profiler=None) -> Callable:
+    if isinstance(stmt, Assign):
+        var = stmt.var
+        expr = compile_expr(stmt.expr, profiler)
+
+        def assign(env, func_env):
+            env[var] = expr(env, func_env)
+        return assign
+
+    elif isinstance(stmt, If):
+        cond = compile_expr(stmt.condition, profiler)
+        then_branch = compile_block(stmt.then_branch, profiler)
+        else_branch = compile_block(stmt.else_branch, profiler)
+
+        def if_(env, func_env):
+            if cond(env, func_env):
+                return then_branch(env, func_env)
+            else:
+                return else_branch(env, func_env)
+        return if_
+
+    elif isinstance(stmt, While):
+        cond = compile_expr(stmt.condition, profiler)
+        body = compile_block(stmt.body, profiler)
+
+        def while_(env, func_env):
+            while cond(env, func_env):
+                completion = body(env, func_env)
+                if completion is not None:
+                    return completion
+        return while_
+
+    elif isinstance(stmt, For):
+        var = stmt.var
+        start = compile_expr(stmt.start, profiler)
+        end = compile_expr(stmt.end, profiler)
+        body = compile_block(stmt.body, profiler)
+
+        def for_(env, func_env):
+            for i in range(start(env, func_env), end(env, func_env)):
+                env[var] = i
+                completion = body(env, func_env)
+                if completion is not None:
+                    return completion
+        return for_
+
+    elif isinstance(stmt, FunctionDef):
+        name = stmt.name
+        body = compile_block(stmt.body, profiler)
+        if profiler is not None:
+            body = profiler.wrap_frame(name, body)
+        func = (stmt.params, body)
+
+        def def_(env, func_env):
+            func_env[name] = func
+        return def_
+
+    elif isinstance(stmt, Return):
+        expr = compile_expr(stmt.expr, profiler)
+
+        def return_(env, func_env):
+            return Returned(expr(env, func_env))
+        return return_
+
+    elif isinstance(stmt, Print):
+        expr = compile_expr(stmt.expr, profiler)
+        is_marker = isinstance(stmt.expr, IntLit)
+
+        def print_(env, func_env):
+            val = expr(env, func_env)
+            if is_marker:
+                print(f"Instr: {val}")
+            else:
+                print(val)
+        return print_
+
+    else:
+        return lambda env, func_env: None
+
+
+def compile_program(ast: Program, profiler=None) -> Callable:
+    # profiler (opcional): envolve cada nó e cada corpo de função com medições
+    return compile_block(ast.body, profiler)
+
+def evaluate_compiled(compiled: Union[Program, Callable], inputs: Inputs) -> int:
+    if isinstance(compiled, Program):
+        compiled = compile_program(compiled)
+
+    env = {var: val for var, val in inputs}
+
+    completion = compiled(env, {})
+    if completion is not None:
+        return completion.value
+
+    if "result" in env:
+        return env["result"]
+    else:
+        raise Exception("No return or 'result' variable found.")
+
+# Extra : Avaliação com pilha explícita
+# Não usa a pilha de Python: expressões muito profundas (ex: somas geradas com
+# milhares de termos) e recursão Lang profunda não provocam RecursionError.
+# A profundidade de chamadas Lang é limitada por max_depth.
+
+class CallDepthExceeded(Exception):
+    def __init__(self, name, depth):
+        super().__init__(f"Profundidade máxima de chamadas ({depth}) excedida em '{name}'")
+        self.name = name
+        self.depth = depth
+
+# Tarefas da pilha de trabalho
+T_EXPR, T_STMT, T_BINOP, T_UNOP, T_CALL, T_FRAME, T_STORE, T_BRANCH, \
+    T_WHILE, T_FOR_INIT, T_FOR_NEXT, T_RETURN, T_PRINT = range(13)
+
+def evaluate_iterative(ast: Program, inputs: Inputs, max_depth: int = 10000) -> int:
+    env = {var: val for var, val in inputs}
+    func_env = {}
+    values = []
+    tasks = [(T_STMT, s) for s in reversed(ast.body)]
+    push = tasks.append
+    depth = 0
+
+    while tasks:
+        task = tasks.pop()
+        kind = task[0]
+
+        if kind == T_EXPR:
+            expr = task[1]
+            if isinstance(expr, (IntLit, BoolLit)):
+                values.append(expr.value)
+            elif isinstance(expr, Var):
+                values.append(env[expr.name])
+            elif isinstance(expr, BinOp):
+                push((T_BINOP, expr.op))
+                push((T_EXPR, expr.right))
+                push((T_EXPR, expr.left))
+            elif isinstance(expr, UnaryOp):
+                push((T_UNOP, expr.op))
+                push((T_EXPR, expr.expr))
+            elif isinstance(expr, FunctionCall):
+                func_def = func_env.get(expr.name)
+                if not func_def:
+                    raise Exception(f"Função '{expr.name}' não definida")
+                if len(func_def.params) != len(expr.args):
+                    raise Exception(f"Número de argumentos incorreto em '{expr.name}'")
+                push((T_CALL, func_def))
+                for arg in reversed(expr.args):
+                    push((T_EXPR, arg))
+            else:
+                values.append(None)
+
+        elif kind == T_BINOP:
+            r = values.pop()
+            l = values.pop()
+            values.append(BINOPS.get(task[1], unknown_op)(l, r))
+
+        elif kind == T_UNOP:
+            values.append(UNOPS.get(task[1], unknown_op)(values.pop()))
+
+        elif kind == T_STMT:
+            stmt = task[1]
+            if isinstance(stmt, Assign):
+                push((T_STORE, stmt.var))
+                push((T_EXPR, stmt.expr))
+            elif isinstance(stmt, If):
+                push((T_BRANCH, stmt))
+                push((T_EXPR, stmt.condition))
+            elif isinstance(stmt, While):
+                push((T_WHILE, stmt))
+                push((T_EXPR, stmt.condition))
+            elif isinstance(stmt, For):
+                push((T_FOR_INIT, stmt))
+                push((T_EXPR, stmt.end))
+                push((T_EXPR, stmt.start))
+            elif isinstance(stmt, FunctionDef):
+                func_env[stmt.name] = stmt
+            elif isinstance(stmt, Return):
+                push((T_RETURN,))
+                push((T_EXPR, stmt.expr))
+            elif isinstance(stmt, Print):
+                push((T_PRINT, isinstance(stmt.expr, IntLit)))
+                push((T_EXPR, stmt.expr))
+
+        elif kind == T_STORE:
+            env[task[1]] = values.pop()
+
+        elif kind == T_BRANCH:
+            stmt = task[1]
+            branch = stmt.then_branch if values.pop() else stmt.else_branch
+            for s in reversed(branch):
+                push((T_STMT, s))
+
+        elif kind == T_WHILE:
+            if values.pop():
+                stmt = task[1]
+                push((T_STMT, stmt))  # volta a testar a condição depois do corpo
+                for s in reversed(stmt.body):
+                    push((T_STMT, s))
+
+        elif kind == T_FOR_INIT:
+            end = values.pop()
+            start = values.pop()
+            push((T_FOR_NEXT, task[1], iter(range(start, end))))
+
+        elif kind == T_FOR_NEXT:
+            _, stmt, it = task
+            for i in it:
+                env[stmt.var] = i
+                push(task)
+                for s in reversed(stmt.body):
+                    push((T_STMT, s))
+                break
+
+        elif kind == T_CALL:
+            func_def = task[1]
+            depth += 1
+            if depth > max_depth:
+                raise CallDepthExceeded(func_def.name, max_depth)
+            new_env = {}  # Ambiente local para a função
+            nargs = len(func_def.params)
+            args = values[len(values) - nargs:]
+            del values[len(values) - nargs:]
+            for param, value in zip(func_def.params, args):
+                new_env[param] = value
+            push((T_FRAME, func_def.name, env))
+            env = new_env
+            for s in reversed(func_def.body):
+                push((T_STMT, s))
+
+        elif kind == T_FRAME:
+            # O corpo da função terminou sem return
+            raise Exception(f"Função '{task[1]}' não retornou valor")
+
+        elif kind == T_RETURN:
+            # Descarta o resto da função (ou do programa) até à moldura da chamada
+            while tasks:
+                task = tasks.pop()
+                if task[0] == T_FRAME:
+                    env = task[2]
+                    depth -= 1
+                    break
+            else:
+                return values.pop()
+
+        elif kind == T_PRINT:
+            val = values.pop()
+            if task[1]:
+                print(f"Instr: {val}")
+            else:
+                print(val)
 
     if "result" in env:
         return env["result"]
@@ -114,17 +581,31 @@ def evaluate(ast: Program, inputs: Inputs) -> int:
         raise Exception("No return or 'result' variable found.")
 
 # 2. Test 
-def runTest(ast: Program, testCase: Tuple[Inputs, int]) -> bool:
+def runTest(ast: Program, testCase: Tuple[Inputs, int], fuel: Optional[int] = None, timeout: Optional[float] = None) -> bool:
+    return run_test_outcome(ast, testCase, fuel, timeout) == "pass"
+
+# Resultado de um teste: "pass", "fail" ou "timeout" (fuel ou tempo esgotado)
+def run_test_outcome(ast: Program, testCase: Tuple[Inputs, int], fuel: Optional[int] = None, timeout: Optional[float] = None) -> str:
     inputs, expected = testCase
     try:
-        result = evaluate(ast, inputs)
-        return result == expected
+        result = evaluate(ast, inputs, fuel, timeout)
+        return "pass" if result == expected else "fail"
+    except ExecutionTimeout:
+        return "timeout"
     except:
-        return False
+        return "fail"
 
 # 3. Test Suite
-def runTestSuite(ast: Program, testCases: List[Tuple[Inputs, int]]) -> bool:
-    return all(runTest(ast, case) for case in testCases)
+def runTestSuite(ast: Program, testCases: List[Tuple[Inputs, int]], fuel: Optional[int] = None, timeout: Optional[float] = None) -> bool:
+    return all(runTest(ast, case, fuel, timeout) for case in testCases)
+
+def run_test_suite_outcome(ast: Program, testCases: List[Tuple[Inputs, int]], fuel: Optional[int] = None, timeout: Optional[float] = None) -> str:
+    # Pára no primeiro teste que não passa, tal como runTestSuite
+    for case in testCases:
+        outcome = run_test_outcome(ast, case, fuel, timeout)
+        if outcome != "pass":
+            return outcome
+    return "pass"
 
 # 5. Mutation Testing
 def mutate_expr(expr: Expr) -> Expr:
@@ -224,7 +705,7 @@ def collect_used_vars(program: Program) -> set:
             visit_expr(stmt.expr)
         elif isinstance(stmt, If):
             visit_expr(stmt.condition)
-            for s in stmt.then_branch + stmt.else_branch:
+            for s in list(stmt.then_branch) + list(stmt.else_branch):
                 visit_stmt(s)
         elif isinstance(stmt, While):
             visit_expr(stmt.condition)
@@ -261,7 +742,7 @@ def collect_mutable_stmts(program: Program) -> List[Stmt]:
 
         # desce recursivamente
         if isinstance(stmt, If):
-            for s in stmt.then_branch + stmt.else_branch:
+            for s in list(stmt.then_branch) + list(stmt.else_branch):
                 visit(s)
         elif isinstance(stmt, While):
             for s in stmt.body:
@@ -319,6 +800,23 @@ def mutate(program: Program) -> Program:
 
     return Program([replace(s) for s in program.body])
 
+# Análise de mutação: um mutante que esgota o fuel/tempo conta como morto,
+# mas é reportado à parte em "timeout"
+def mutation_analysis(program: Program, testCases: List[Tuple[Inputs, int]], n_mutants: int = 10,
+                      fuel: Optional[int] = 10000, timeout: Optional[float] = None) -> Dict[str, int]:
+    report = {"mutants": 0, "killed": 0, "survived": 0, "timeout": 0}
+    for _ in range(n_mutants):
+        mutant = mutate(program)
+        outcome = run_test_suite_outcome(mutant, testCases, fuel, timeout)
+        report["mutants"] += 1
+        if outcome == "pass":
+            report["survived"] += 1
+        else:
+            report["killed"] += 1
+            if outcome == "timeout":
+                report["timeout"] += 1
+    return report
+
 
 # 8. Instrumentation
 def instrumentation(ast: Program) -> Program:
@@ -350,7 +848,7 @@ def instrumentation(ast: Program) -> Program:
     new_body, _ = instrument_block(ast.body, 0)
     return Program(new_body)
 
-def instrumentedTestSuite(ast: Program, testCases: List[Tuple[Inputs, int]]) -> bool:
+def instrumentedTestSuite(ast: Program, testCases: List[Tuple[Inputs, int]], fuel: Optional[int] = None, timeout: Optional[float] = None) -> bool:
     instrumented_ast = instrumentation(ast)
     all_passed = True
 
@@ -360,7 +858,7 @@ def instrumentedTestSuite(ast: Program, testCases: List[Tuple[Inputs, int]]) ->
         sys.stdout = output
 
         try:
-            result = evaluate(instrumented_ast, inputs)
+            result = evaluate(instrumented_ast, inputs, fuel, timeout)
         except:
             result = None
         finally:
@@ -377,7 +875,7 @@ def instrumentedTestSuite(ast: Program, testCases: List[Tuple[Inputs, int]]) ->
     return all_passed
 
 # Extra : Spectrum Based Fault Localization
-def collect_spectrum_data(program, test_suite):
+def collect_spectrum_data(program, test_suite, fuel=None, timeout=None):
     results = []
     instrumented_program = instrumentation(program)
     for inputs, expected in test_suite:
@@ -385,7 +883,7 @@ def collect_spectrum_data(program, test_suite):
         sys_stdout_backup = sys.stdout
         sys.stdout = output
         try:
-            result = evaluate(instrumented_program, inputs)
+            result = evaluate(instrumented_program, inputs, fuel, timeout)
             passed = (result == expected)
         except:
             passed = False
@@ -429,7 +927,7 @@ def compute_ochiai(spectrum_data):
     return sorted(scores.items(), key=lambda x: -x[1])
 
 
-def spectrum_based_fault_localization(program, test_suite):
-    spectrum_data = collect_spectrum_data(program, test_suite)
+def spectrum_based_fault_localization(program, test_suite, fuel=None, timeout=None):
+    spectrum_data = collect_spectrum_data(program, test_suite, fuel, timeout)
     ochiai_scores = compute_ochiai(spectrum_data)
     return ochiai_scores
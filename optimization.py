@@ -1,5 +1,7 @@
 from Lang import *
 from collections import Counter
+from typing import List, Tuple, Dict, Callable, Optional
+import time
 
 
 # 1.4 Optimization and Refactoring
@@ -54,46 +56,67 @@ def simplify_expr(expr: Expr) -> Expr:
             if isinstance(left, BoolLit): return BoolLit(True) if left.value else right
             if isinstance(right, BoolLit): return BoolLit(True) if right.value else left
 
+        if left is expr.left and right is expr.right:
+            return expr  # nada mudou: reutiliza o nó
         return BinOp(expr.op, left, right)
 
     elif isinstance(expr, UnaryOp):
         inner = simplify_expr(expr.expr)
         if expr.op == "not" and isinstance(inner, BoolLit):
             return BoolLit(not inner.value)
-        return UnaryOp(expr.op, inner)
+        return expr if inner is expr.expr else UnaryOp(expr.op, inner)
 
     else:
         return expr
 
+# As funções de simplificação devolvem o próprio nó quando nada muda, para não
+# reconstruir a árvore toda (e para o gestor de passes saber se houve mudanças).
+# Os nós reconstruídos levam sempre listas, mesmo que o bloco original seja um
+# tuplo de nós partilhados (hash-consing)
+def unchanged(new: list, old: list) -> bool:
+    return len(new) == len(old) and all(a is b for a, b in zip(new, old))
+
+def simplify_block(stmts: List[Stmt]) -> List[Stmt]:
+    new = [simplify_stmt(s) for s in stmts]
+    return stmts if unchanged(new, stmts) else new
+
 def simplify_stmt(stmt: Stmt) -> Stmt:
     if isinstance(stmt, Assign):
-        return Assign(stmt.var, simplify_expr(stmt.expr))
+        expr = simplify_expr(stmt.expr)
+        return stmt if expr is stmt.expr else Assign(stmt.var, expr)
     elif isinstance(stmt, If):
+        cond = simplify_expr(stmt.condition)
+        then_branch = simplify_block(stmt.then_branch)
+        else_branch = simplify_block(stmt.else_branch)
+        if cond is stmt.condition and then_branch is stmt.then_branch and else_branch is stmt.else_branch:
+            return stmt
         return If(
-            condition=simplify_expr(stmt.condition),
-            then_branch=[simplify_stmt(s) for s in stmt.then_branch],
-            else_branch=[simplify_stmt(s) for s in stmt.else_branch]
+            condition=cond,
+            then_branch=list(then_branch),
+            else_branch=list(else_branch)
         )
     elif isinstance(stmt, While):
+        cond = simplify_expr(stmt.condition)
+        body = simplify_block(stmt.body)
+        if cond is stmt.condition and body is stmt.body:
+            return stmt
         return While(
-            condition=simplify_expr(stmt.condition),
-            body=[simplify_stmt(s) for s in stmt.body]
+            condition=cond,
+            body=list(body)
         )
     elif isinstance(stmt, For):
-        return For(
-            stmt.var,
-            simplify_expr(stmt.start),
-            simplify_expr(stmt.end),
-            [simplify_stmt(s) for s in stmt.body]
-        )
+        start = simplify_expr(stmt.start)
+        end = simplify_expr(stmt.end)
+        body = simplify_block(stmt.body)
+        if start is stmt.start and end is stmt.end and body is stmt.body:
+            return stmt
+        return For(stmt.var, start, end, list(body))
     elif isinstance(stmt, FunctionDef):
-        return FunctionDef(
-            stmt.name,
-            stmt.params,
-            [simplify_stmt(s) for s in stmt.body]
-        )
+        body = simplify_block(stmt.body)
+        return stmt if body is stmt.body else FunctionDef(stmt.name, stmt.params, list(body))
     elif isinstance(stmt, Return):
-        return Return(simplify_expr(stmt.expr))
+        expr = simplify_expr(stmt.expr)
+        return stmt if expr is stmt.expr else Return(expr)
     else:
         return stmt
     
@@ -109,69 +132,81 @@ def refactor_expr(expr: Expr) -> Expr:
                 return left
             else:
                 return UnaryOp("not", left)
+        if left is expr.left and right is expr.right:
+            return expr
         return BinOp(expr.op, left, right)
 
     elif isinstance(expr, UnaryOp):
-        return UnaryOp(expr.op, refactor_expr(expr.expr))
+        inner = refactor_expr(expr.expr)
+        return expr if inner is expr.expr else UnaryOp(expr.op, inner)
 
     elif isinstance(expr, FunctionCall):
-        return FunctionCall(expr.name, [refactor_expr(arg) for arg in expr.args])
+        args = [refactor_expr(arg) for arg in expr.args]
+        return expr if unchanged(args, expr.args) else FunctionCall(expr.name, args)
 
     else:
         return expr
 
 
+def refactor_block(stmts: List[Stmt]) -> List[Stmt]:
+    # Um if com condição constante é substituído pelas instruções do ramo escolhido
+    new = []
+    changed = False
+    for s in stmts:
+        refactored = refactor_stmt(s)
+        if isinstance(refactored, list):
+            new.extend(refactored)
+            changed = True
+        else:
+            new.append(refactored)
+            changed = changed or refactored is not s
+    return new if changed else stmts
+
 def refactor_stmt(stmt: Stmt) -> Stmt:
     if isinstance(stmt, Assign):
-        return Assign(stmt.var, refactor_expr(stmt.expr))
+        expr = refactor_expr(stmt.expr)
+        return stmt if expr is stmt.expr else Assign(stmt.var, expr)
     elif isinstance(stmt, If):
         cond = refactor_expr(stmt.condition)
 
-        then_branch = [refactor_stmt(s) for s in stmt.then_branch]
-        else_branch = [refactor_stmt(s) for s in stmt.else_branch]
+        then_branch = refactor_block(stmt.then_branch)
+        else_branch = refactor_block(stmt.else_branch)
 
         # if True: then x else y  →  apenas x
         if isinstance(cond, BoolLit):
-            return then_branch if cond.value else else_branch
+            return list(then_branch) if cond.value else list(else_branch)
 
-        return If(cond, then_branch, else_branch)
+        if cond is stmt.condition and then_branch is stmt.then_branch and else_branch is stmt.else_branch:
+            return stmt
+        return If(cond, list(then_branch), list(else_branch))
 
     elif isinstance(stmt, While):
-        return While(
-            refactor_expr(stmt.condition),
-            [refactor_stmt(s) for s in stmt.body]
-        )
+        cond = refactor_expr(stmt.condition)
+        body = refactor_block(stmt.body)
+        return stmt if cond is stmt.condition and body is stmt.body else While(cond, list(body))
 
     elif isinstance(stmt, For):
-        return For(
-            stmt.var,
-            refactor_expr(stmt.start),
-            refactor_expr(stmt.end),
-            [refactor_stmt(s) for s in stmt.body]
-        )
+        start = refactor_expr(stmt.start)
+        end = refactor_expr(stmt.end)
+        body = refactor_block(stmt.body)
+        if start is stmt.start and end is stmt.end and body is stmt.body:
+            return stmt
+        return For(stmt.var, start, end, list(body))
 
     elif isinstance(stmt, FunctionDef):
-        return FunctionDef(
-            stmt.name,
-            stmt.params,
-            [refactor_stmt(s) for s in stmt.body]
-        )
+        body = refactor_block(stmt.body)
+        return stmt if body is stmt.body else FunctionDef(stmt.name, stmt.params, list(body))
 
     elif isinstance(stmt, Return):
-        return Return(refactor_expr(stmt.expr))
+        expr = refactor_expr(stmt.expr)
+        return stmt if expr is stmt.expr else Return(expr)
 
     else:
         return stmt
 
 def refactor(prog: Program) -> Program:
-    stmts = []
-    for s in prog.body:
-        refactored = refactor_stmt(s)
-        if isinstance(refactored, list):
-            stmts.extend(refactored)
-        else:
-            stmts.append(refactored)
-    return Program(stmts)
+    body = refactor_block(prog.body)
+    return prog if body is prog.body else Program(body)
 
 def names(prog: Program) -> list[str]:
     result = set()
@@ -185,7 +220,7 @@ def names(prog: Program) -> list[str]:
             for s in stmt.body:
                 visit_stmt(s)
         elif isinstance(stmt, If):
-            for s in stmt.then_branch + stmt.else_branch:
+            for s in list(stmt.then_branch) + list(stmt.else_branch):
                 visit_stmt(s)
         elif isinstance(stmt, While):
             for s in stmt.body:
@@ -211,7 +246,7 @@ def instructions(prog: Program) -> dict[str, int]:
             for s in stmt.body:
                 visit_stmt(s)
         elif isinstance(stmt, If):
-            for s in stmt.then_branch + stmt.else_branch:
+            for s in list(stmt.then_branch) + list(stmt.else_branch):
                 visit_stmt(s)
         elif isinstance(stmt, While):
             for s in stmt.body:
@@ -251,7 +286,7 @@ def detect_smells(prog: Program) -> dict[str, int]:
             if stmt.then_branch == stmt.else_branch:
                 smells["branches iguais em if"] += 1
             visit_expr(stmt.condition)
-            for s in stmt.then_branch + stmt.else_branch:
+            for s in list(stmt.then_branch) + list(stmt.else_branch):
                 visit_stmt(s)
 
         elif isinstance(stmt, While):
@@ -283,4 +318,1128 @@ def detect_smells(prog: Program) -> dict[str, int]:
     return dict(smells)
 
 def opt(prog: Program) -> Program:
-    return Program([simplify_stmt(stmt) for stmt in prog.body])
+    body = simplify_block(prog.body)
+    return prog if body is prog.body else Program(body)
+
+# Funções puras: sem print, sem definir funções, só leem parâmetros e variáveis
+# locais, e só chamam funções puras. Nomes definidos mais de uma vez não contam,
+# porque a definição em vigor depende da execução.
+def pure_functions(prog: Program) -> set[str]:
+    defs = {}
+
+    def collect(stmts):
+        for s in stmts:
+            if isinstance(s, FunctionDef):
+                defs.setdefault(s.name, []).append(s)
+                collect(s.body)
+            elif isinstance(s, If):
+                collect(s.then_branch)
+                collect(s.else_branch)
+            elif isinstance(s, (While, For)):
+                collect(s.body)
+
+    def visit_expr(expr, reads, calls):
+        if isinstance(expr, Var):
+            reads.add(expr.name)
+        elif isinstance(expr, BinOp):
+            visit_expr(expr.left, reads, calls)
+            visit_expr(expr.right, reads, calls)
+        elif isinstance(expr, UnaryOp):
+            visit_expr(expr.expr, reads, calls)
+        elif isinstance(expr, FunctionCall):
+            calls.add(expr.name)
+            for arg in expr.args:
+                visit_expr(arg, reads, calls)
+
+    def visit_body(stmts, reads, writes, calls):
+        # Devolve False se encontrar um efeito lateral
+        for s in stmts:
+            if isinstance(s, (Print, FunctionDef)):
+                return False
+            elif isinstance(s, Assign):
+                writes.add(s.var)
+                visit_expr(s.expr, reads, calls)
+            elif isinstance(s, Return):
+                visit_expr(s.expr, reads, calls)
+            elif isinstance(s, If):
+                visit_expr(s.condition, reads, calls)
+                if not (visit_body(s.then_branch, reads, writes, calls)
+                        and visit_body(s.else_branch, reads, writes, calls)):
+                    return False
+            elif isinstance(s, While):
+                visit_expr(s.condition, reads, calls)
+                if not visit_body(s.body, reads, writes, calls):
+                    return False
+            elif isinstance(s, For):
+                writes.add(s.var)
+                visit_expr(s.start, reads, calls)
+                visit_expr(s.end, reads, calls)
+                if not visit_body(s.body, reads, writes, calls):
+                    return False
+        return True
+
+    collect(prog.body)
+
+    calls_of = {}
+    for name, ds in defs.items():
+        if len(ds) != 1:
+            continue
+        reads, writes, calls = set(), set(), set()
+        if visit_body(ds[0].body, reads, writes, calls) and reads <= writes | set(ds[0].params):
+            calls_of[name] = calls
+
+    pure = set(calls_of)
+    changed = True
+    while changed:
+        changed = False
+        for name in list(pure):
+            if not calls_of[name] <= pure:
+                pure.discard(name)
+                changed = True
+    return pure
+
+
+# Extra : Gestor de passes
+# Corre os passes registados, por ordem, até nenhum mudar o programa (ponto fixo)
+# ou até max_iterations voltas. Cada pass é uma função Program → Program que
+# devolve o próprio programa quando não muda nada; um pass que reconstrói a
+# árvore sem mudanças também é detetado (comparação estrutural), mas custa mais.
+# Para cada execução de um pass fica registado se mudou o programa, o tempo e a
+# variação do número de nós.
+
+def count_nodes(prog: Program) -> int:
+    def expr_nodes(expr) -> int:
+        if isinstance(expr, BinOp):
+            return 1 + expr_nodes(expr.left) + expr_nodes(expr.right)
+        elif isinstance(expr, UnaryOp):
+            return 1 + expr_nodes(expr.expr)
+        elif isinstance(expr, FunctionCall):
+            return 1 + sum(expr_nodes(arg) for arg in expr.args)
+        return 1
+
+    def block_nodes(stmts) -> int:
+        return sum(stmt_nodes(s) for s in stmts)
+
+    def stmt_nodes(stmt) -> int:
+        if isinstance(stmt, (Assign, Return, Print)):
+            return 1 + expr_nodes(stmt.expr)
+        elif isinstance(stmt, If):
+            return 1 + expr_nodes(stmt.condition) + block_nodes(stmt.then_branch) + block_nodes(stmt.else_branch)
+        elif isinstance(stmt, While):
+            return 1 + expr_nodes(stmt.condition) + block_nodes(stmt.body)
+        elif isinstance(stmt, For):
+            return 1 + expr_nodes(stmt.start) + expr_nodes(stmt.end) + block_nodes(stmt.body)
+        elif isinstance(stmt, FunctionDef):
+            return 1 + block_nodes(stmt.body)
+        return 1
+
+    return block_nodes(prog.body)
+
+
+class PassRun:
+    __slots__ = ("iteration", "name", "changed", "time", "nodes_before", "nodes_after", "error")
+
+    def __init__(self, iteration: int, name: str, changed: bool, time: float, nodes_before: int, nodes_after: int,
+                 error: Optional[Exception] = None):
+        self.iteration = iteration
+        self.name = name
+        self.changed = changed
+        self.time = time
+        self.nodes_before = nodes_before
+        self.nodes_after = nodes_after
+        self.error = error
+
+    @property
+    def delta(self) -> int:
+        return self.nodes_after - self.nodes_before
+
+
+class PassManager:
+    def __init__(self, max_iterations: int = 10):
+        self.max_iterations = max_iterations
+        self.passes: List[Tuple[str, Callable[[Program], Program]]] = []
+        self.runs: List[PassRun] = []
+        self.iterations = 0
+        self.converged = False
+
+    def register(self, name: str, fn: Callable[[Program], Program]) -> "PassManager":
+        self.passes.append((name, fn))
+        return self
+
+    def run(self, prog: Program) -> Program:
+        self.runs = []
+        self.converged = False
+        nodes = count_nodes(prog)
+        for iteration in range(1, self.max_iterations + 1):
+            self.iterations = iteration
+            changed = False
+            for name, fn in self.passes:
+                start = time.perf_counter()
+                error = None
+                try:
+                    result = fn(prog)
+                except Exception as e:
+                    # Um pass que falha não pode estragar um programa válido: fica o último bom
+                    result, error = prog, e
+                elapsed = time.perf_counter() - start
+                # Um programa igual ao anterior não conta como mudança (e fica o anterior)
+                pass_changed = result is not prog and result != prog
+                after = count_nodes(result) if pass_changed else nodes
+                self.runs.append(PassRun(iteration, name, pass_changed, elapsed, nodes, after, error))
+                if pass_changed:
+                    prog, nodes, changed = result, after, True
+            if not changed:
+                self.converged = True
+                break
+        return prog
+
+    def summary(self) -> Dict[str, Dict[str, object]]:
+        # Totais por pass, pela ordem de registo
+        totals = {name: {"runs": 0, "changes": 0, "failures": 0, "time": 0.0, "delta": 0} for name, _ in self.passes}
+        for run in self.runs:
+            entry = totals[run.name]
+            entry["runs"] += 1
+            entry["changes"] += run.changed
+            entry["failures"] += run.error is not None
+            entry["time"] += run.time
+            entry["delta"] += run.delta
+        return totals
+
+    def table(self) -> str:
+        lines = [f"{'pass':<16}{'execuções':>10}{'mudanças':>10}{'falhas':>8}{'tempo (ms)':>12}{'Δ nós':>8}"]
+        for name, entry in self.summary().items():
+            lines.append(f"{name:<16}{entry['runs']:>10}{entry['changes']:>10}{entry['failures']:>8}"
+                         f"{entry['time'] * 1000:>12.3f}{entry['delta']:>8}")
+        state = "ponto fixo" if self.converged else "limite de iterações"
+        lines.append(f"{self.iterations} iterações ({state})")
+        return "\n".join(lines)
+
+
+# Extra : Eliminação de código morto (liveness)
+# Análise de variáveis vivas para trás: uma atribuição a uma variável que não é
+# lida antes de voltar a ser escrita é removida, assim como o código depois de um
+# return (ou de um if em que os dois ramos fazem return). No fim do programa
+# `result` está viva (evaluate devolve-a quando não há return); no fim do corpo de
+# uma função nada está vivo. Nos ciclos as variáveis vivas à entrada do corpo
+# juntam-se às da saída até não mudarem (ponto fixo).
+# Só se remove uma atribuição se a expressão não puder falhar nem ter efeitos:
+# sem chamadas, só operadores conhecidos, divisão apenas por um literal diferente
+# de zero e só variáveis que já estão definidas. Uma variável fica definida depois
+# de ser atribuída ou lida com sucesso (o ambiente nunca apaga variáveis), o que é
+# calculado por uma análise para a frente antes da remoção.
+# Um if com um só ramo vazio, ou um ciclo que tem de ficar (ex: limites com
+# chamadas) com o corpo vazio, mantém o bloco vazio: é escrito como `pass`.
+
+SAFE_BINOPS = {"+", "-", "*", "==", "!=", "<", ">", "&&", "||"}
+SAFE_UNOPS = {"not", "-"}
+
+def expr_vars(expr: Expr) -> set:
+    if isinstance(expr, Var):
+        return {expr.name}
+    elif isinstance(expr, BinOp):
+        return expr_vars(expr.left) | expr_vars(expr.right)
+    elif isinstance(expr, UnaryOp):
+        return expr_vars(expr.expr)
+    elif isinstance(expr, FunctionCall):
+        return set().union(*[expr_vars(arg) for arg in expr.args])
+    return set()
+
+def is_safe(expr: Expr, defined: set) -> bool:
+    # A avaliação não pode falhar, imprimir nem deixar de terminar
+    if isinstance(expr, (IntLit, BoolLit)):
+        return True
+    elif isinstance(expr, Var):
+        return expr.name in defined
+    elif isinstance(expr, BinOp):
+        if expr.op == "/":
+            divisor = expr.right
+            if not (isinstance(divisor, IntLit) and type(divisor.value) is int and divisor.value != 0):
+                return False
+        elif expr.op not in SAFE_BINOPS:
+            return False
+        return is_safe(expr.left, defined) and is_safe(expr.right, defined)
+    elif isinstance(expr, UnaryOp):
+        return expr.op in SAFE_UNOPS and is_safe(expr.expr, defined)
+    return False
+
+def always_returns(stmt: Stmt) -> bool:
+    if isinstance(stmt, Return):
+        return True
+    if isinstance(stmt, If):
+        return any(always_returns(s) for s in stmt.then_branch) and any(always_returns(s) for s in stmt.else_branch)
+    return False
+
+
+def defined_before(stmts: List[Stmt], defined: set, before: Dict[int, set]) -> set:
+    # Guarda em before[id(instrução)] as variáveis definidas antes de cada
+    # instrução e devolve as definidas no fim do bloco
+    for s in stmts:
+        known = before.get(id(s))
+        # Um nó partilhado (hash-consing) fica com a interseção dos contextos
+        before[id(s)] = set(defined) if known is None else known & defined
+        if isinstance(s, Assign):
+            defined = defined | expr_vars(s.expr) | {s.var}
+        elif isinstance(s, (Return, Print)):
+            defined = defined | expr_vars(s.expr)
+        elif isinstance(s, If):
+            defined = defined | expr_vars(s.condition)
+            defined = defined_before(s.then_branch, defined, before) & defined_before(s.else_branch, defined, before)
+        elif isinstance(s, While):
+            # O corpo pode não correr; nas iterações seguintes só há mais variáveis definidas
+            defined = defined | expr_vars(s.condition)
+            defined_before(s.body, defined, before)
+        elif isinstance(s, For):
+            defined = defined | expr_vars(s.start) | expr_vars(s.end)
+            defined_before(s.body, defined | {s.var}, before)
+        elif isinstance(s, FunctionDef):
+            defined_before(s.body, set(s.params), before)
+    return defined
+
+
+def dce_block(stmts: List[Stmt], live_out: set, before: Dict[int, set]) -> Tuple[List[Stmt], set]:
+    # Devolve o bloco sem código morto e as variáveis vivas à entrada
+    end = len(stmts)
+    for i, s in enumerate(stmts):
+        if always_returns(s):
+            end = i + 1  # o resto do bloco nunca corre
+            break
+
+    live = live_out
+    new = []
+    for s in reversed(stmts[:end]):
+        kept, live = dce_stmt(s, live, before)
+        if kept is not None:
+            new.append(kept)
+    new.reverse()
+    return (stmts if unchanged(new, stmts) else new), live
+
+def dce_loop(body: List[Stmt], live: set, before: Dict[int, set], loop_var: str = None) -> Tuple[List[Stmt], set]:
+    # Variáveis vivas no início de cada iteração: as da saída do ciclo mais as do corpo
+    while True:
+        new_body, body_live = dce_block(body, live, before)
+        if loop_var is not None:
+            body_live = body_live - {loop_var}  # o for atribui a variável antes do corpo
+        if body_live <= live:
+            return new_body, live
+        live = live | body_live
+
+def dce_stmt(stmt: Stmt, live: set, before: Dict[int, set]) -> Tuple[Optional[Stmt], set]:
+    defined = before.get(id(stmt), set())
+    if isinstance(stmt, Assign):
+        if stmt.var not in live and is_safe(stmt.expr, defined):
+            return None, live
+        if isinstance(stmt.expr, Var) and stmt.expr.name == stmt.var and stmt.var in defined:
+            return None, live  # x = x não muda nada
+        return stmt, (live - {stmt.var}) | expr_vars(stmt.expr)
+
+    elif isinstance(stmt, Return):
+        return stmt, expr_vars(stmt.expr)
+
+    elif isinstance(stmt, Print):
+        return stmt, live | expr_vars(stmt.expr)
+
+    elif isinstance(stmt, If):
+        then_branch, then_live = dce_block(stmt.then_branch, live, before)
+        else_branch, else_live = dce_block(stmt.else_branch, live, before)
+        if not then_branch and not else_branch and is_safe(stmt.condition, defined):
+            return None, live
+        cond_vars = expr_vars(stmt.condition)
+        if then_branch is stmt.then_branch and else_branch is stmt.else_branch:
+            return stmt, then_live | else_live | cond_vars
+        return If(stmt.condition, then_branch, else_branch), then_live | else_live | cond_vars
+
+    elif isinstance(stmt, While):
+        body, head = dce_loop(stmt.body, live | expr_vars(stmt.condition), before)
+        return (stmt if body is stmt.body else While(stmt.condition, body)), head
+
+    elif isinstance(stmt, For):
+        body, head = dce_loop(stmt.body, live, before, stmt.var)
+        if (not body and stmt.var not in live
+                and is_safe(stmt.start, defined) and is_safe(stmt.end, defined)):
+            return None, live
+        new = stmt if body is stmt.body else For(stmt.var, stmt.start, stmt.end, body)
+        return new, head | expr_vars(stmt.start) | expr_vars(stmt.end)
+
+    elif isinstance(stmt, FunctionDef):
+        # O corpo tem um ambiente próprio: não lê nem escreve variáveis de fora
+        body, _ = dce_block(stmt.body, set(), before)
+        return (stmt if body is stmt.body else FunctionDef(stmt.name, stmt.params, body)), live
+
+    return stmt, live
+
+def dead_code_elimination(prog: Program) -> Program:
+    before: Dict[int, set] = {}
+    defined_before(prog.body, set(), before)
+    body, _ = dce_block(prog.body, {"result"}, before)
+    return prog if body is prog.body else Program(body)
+
+
+# Extra : Propagação de constantes (SCCP)
+# Percorre o programa para a frente com o ambiente das variáveis de valor
+# conhecido em todos os caminhos (o mesmo valor e o mesmo tipo: 1 e True são
+# diferentes). Substitui as leituras dessas variáveis por literais e calcula as
+# operações com operandos constantes com a semântica de eval_expr (as que falham,
+# como a divisão por zero, ficam para a execução). Um divisor que vale 0 não é
+# substituído: simplify rejeita `x / 0`, mesmo num ramo que nunca corre. Um if
+# com condição constante é substituído pelo ramo escolhido e um ciclo que nunca
+# corre é removido (o ramo de um if onde estava pode ficar vazio: pass).
+# À cabeça de While/For o ambiente é a junção da entrada com o fim do corpo,
+# repetida até não mudar; o corpo reescrito é o da última volta (a que chegou ao
+# ponto fixo). A cabeça só perde variáveis, por isso cada ciclo recomeça da
+# junção da entrada com a última cabeça que calculou (heads): um ciclo dentro de
+# outro não refaz as voltas todas de cada vez que o de fora dá uma volta, e o
+# custo deixa de crescer exponencialmente com a profundidade.
+# Depois de um return (ou de um while que nunca termina)
+# o resto do bloco não é alcançável e é removido.
+# print(x) com x constante continua a ler x: print(5) escreveria "Instr: 5".
+
+FOLD_BINOPS = {
+    "+": lambda l, r: l + r,
+    "-": lambda l, r: l - r,
+    "*": lambda l, r: l * r,
+    "/": lambda l, r: l // r,
+    "==": lambda l, r: l == r,
+    "!=": lambda l, r: l != r,
+    "<": lambda l, r: l < r,
+    ">": lambda l, r: l > r,
+    "&&": lambda l, r: l and r,
+    "||": lambda l, r: l or r,
+}
+FOLD_UNOPS = {
+    "not": lambda v: not v,
+    "-": lambda v: -v,
+}
+
+def constant(value) -> Optional[Expr]:
+    if type(value) is bool:
+        return BoolLit(value)
+    if type(value) is int:
+        return IntLit(value)
+    return None
+
+def is_constant(expr: Expr) -> bool:
+    return isinstance(expr, (IntLit, BoolLit))
+
+def fold_expr(expr: Expr, env: Dict[str, object]) -> Expr:
+    if isinstance(expr, Var):
+        return constant(env[expr.name]) if expr.name in env else expr
+
+    elif isinstance(expr, BinOp):
+        left = fold_expr(expr.left, env)
+        right = fold_expr(expr.right, env)
+        if is_constant(left) and is_constant(right) and expr.op in FOLD_BINOPS:
+            try:
+                folded = constant(FOLD_BINOPS[expr.op](left.value, right.value))
+            except Exception:
+                folded = None  # ex: divisão por zero fica para a execução
+            if folded is not None:
+                return folded
+        if expr.op == "/" and is_constant(right) and right.value == 0:
+            right = expr.right  # fica para a execução (ver acima)
+        if left is expr.left and right is expr.right:
+            return expr
+        return BinOp(expr.op, left, right)
+
+    elif isinstance(expr, UnaryOp):
+        inner = fold_expr(expr.expr, env)
+        if is_constant(inner) and expr.op in FOLD_UNOPS:
+            folded = constant(FOLD_UNOPS[expr.op](inner.value))
+            if folded is not None:
+                return folded
+        return expr if inner is expr.expr else UnaryOp(expr.op, inner)
+
+    elif isinstance(expr, FunctionCall):
+        # A chamada fica (pode imprimir ou falhar); só os argumentos são propagados
+        args = [fold_expr(arg, env) for arg in expr.args]
+        return expr if unchanged(args, expr.args) else FunctionCall(expr.name, args)
+
+    return expr
+
+def join_env(a: Optional[dict], b: Optional[dict]) -> Optional[dict]:
+    # None: o caminho não chega aqui (terminou com return)
+    if a is None:
+        return b
+    if b is None:
+        return a
+    return {name: value for name, value in a.items()
+            if name in b and type(b[name]) is type(value) and b[name] == value}
+
+
+def cp_block(stmts: List[Stmt], env: Optional[dict], heads: dict) -> Tuple[List[Stmt], Optional[dict]]:
+    new = []
+    for s in stmts:
+        if env is None:
+            break  # código inalcançável
+        result, env = cp_stmt(s, env, heads)
+        if isinstance(result, list):
+            new.extend(result)
+        else:
+            new.append(result)
+    return (stmts if unchanged(new, stmts) else new), env
+
+def cp_loop(loop: Stmt, head: dict, heads: dict, loop_var: str = None):
+    # Devolve a cabeça no ponto fixo, o corpo reescrito e o ambiente no fim do corpo
+    if id(loop) in heads:
+        head = join_env(head, heads[id(loop)])
+    while True:
+        body, end = cp_block(loop.body, dict(head), heads)
+        new_head = join_env(head, end) if end is not None else head
+        if loop_var is not None:
+            new_head.pop(loop_var, None)
+        if len(new_head) == len(head):
+            heads[id(loop)] = head
+            return head, body, end
+        head = new_head
+
+def cp_stmt(stmt: Stmt, env: dict, heads: dict):
+    if isinstance(stmt, Assign):
+        expr = fold_expr(stmt.expr, env)
+        if is_constant(expr):
+            env[stmt.var] = expr.value
+        else:
+            env.pop(stmt.var, None)
+        return (stmt if expr is stmt.expr else Assign(stmt.var, expr)), env
+
+    elif isinstance(stmt, Print):
+        expr = fold_expr(stmt.expr, env)
+        if isinstance(expr, IntLit) and not isinstance(stmt.expr, IntLit):
+            expr = stmt.expr
+        return (stmt if expr is stmt.expr else Print(expr)), env
+
+    elif isinstance(stmt, Return):
+        expr = fold_expr(stmt.expr, env)
+        return (stmt if expr is stmt.expr else Return(expr)), None
+
+    elif isinstance(stmt, If):
+        cond = fold_expr(stmt.condition, env)
+        if is_constant(cond):
+            branch, env = cp_block(stmt.then_branch if cond.value else stmt.else_branch, env, heads)
+            return list(branch), env
+        then_branch, then_env = cp_block(stmt.then_branch, dict(env), heads)
+        else_branch, else_env = cp_block(stmt.else_branch, dict(env), heads)
+        env = join_env(then_env, else_env)
+        if cond is stmt.condition and then_branch is stmt.then_branch and else_branch is stmt.else_branch:
+            return stmt, env
+        return If(cond, then_branch, else_branch), env
+
+    elif isinstance(stmt, While):
+        cond = fold_expr(stmt.condition, env)
+        if is_constant(cond) and not cond.value:
+            return [], env  # nunca corre
+        head, body, _ = cp_loop(stmt, dict(env), heads)
+        cond = fold_expr(stmt.condition, head)
+        # Com a condição sempre verdadeira o ciclo só sai por return
+        exit_env = None if is_constant(cond) and cond.value else head
+        if cond is stmt.condition and body is stmt.body:
+            return stmt, exit_env
+        return While(cond, body), exit_env
+
+    elif isinstance(stmt, For):
+        start = fold_expr(stmt.start, env)
+        end = fold_expr(stmt.end, env)
+        known = is_constant(start) and is_constant(end)
+        if known and end.value <= start.value:
+            return [], env  # intervalo vazio
+        entry = dict(env)
+        entry.pop(stmt.var, None)
+        _, body, end_env = cp_loop(stmt, entry, heads, stmt.var)
+        # Com iterações garantidas sai-se sempre depois do corpo
+        exit_env = end_env if known else join_env(env, end_env)
+        if start is stmt.start and end is stmt.end and body is stmt.body:
+            return stmt, exit_env
+        return For(stmt.var, start, end, body), exit_env
+
+    elif isinstance(stmt, FunctionDef):
+        # Os parâmetros são desconhecidos e o corpo não vê as variáveis de fora
+        body, _ = cp_block(stmt.body, {}, heads)
+        return (stmt if body is stmt.body else FunctionDef(stmt.name, stmt.params, body)), env
+
+    return stmt, env
+
+def constant_propagation(prog: Program) -> Program:
+    # heads: id(ciclo) → última cabeça calculada (os nós vivem até ao fim da análise)
+    body, _ = cp_block(prog.body, {}, {})
+    return prog if body is prog.body else Program(body)
+
+
+# Extra : Eliminação de subexpressões comuns (numeração de valores)
+# available guarda, para cada expressão pura (sem chamadas) já calculada, a
+# variável que tem o seu valor; a tabela passa de cada instrução para as
+# seguintes e para os blocos dentro delas (que elas dominam) e uma entrada morre
+# quando um dos operandos ou a própria variável é escrita. Uma expressão
+# disponível é substituída pela variável, ex: `y = (a + b)` ... `(a + b)` → `y`.
+# Uma expressão repetida na mesma instrução (ou na condição de um if e num dos
+# ramos) é calculada antes numa variável temporária. Numa condição de while a
+# temporária é calculada antes do ciclo e de novo no fim do corpo.
+# Só se antecipam expressões que não podem falhar (is_safe), por isso calculá-las
+# mais cedo não se nota. As temporárias chamam-se _cse0, _cse1, ... e nunca
+# coincidem com nomes usados no programa (incluindo entradas só lidas).
+
+def pure_key(expr: Expr):
+    # Chave estrutural de uma expressão; None se tiver chamadas a funções
+    if isinstance(expr, Var):
+        return ("var", expr.name)
+    elif isinstance(expr, IntLit):
+        return ("int", type(expr.value), expr.value)
+    elif isinstance(expr, BoolLit):
+        return ("bool", expr.value)
+    elif isinstance(expr, BinOp):
+        left, right = pure_key(expr.left), pure_key(expr.right)
+        return None if left is None or right is None else (expr.op, left, right)
+    elif isinstance(expr, UnaryOp):
+        inner = pure_key(expr.expr)
+        return None if inner is None else ("unary", expr.op, inner)
+    return None
+
+def subexpressions(expr: Expr):
+    yield expr
+    if isinstance(expr, BinOp):
+        yield from subexpressions(expr.left)
+        yield from subexpressions(expr.right)
+    elif isinstance(expr, UnaryOp):
+        yield from subexpressions(expr.expr)
+    elif isinstance(expr, FunctionCall):
+        for arg in expr.args:
+            yield from subexpressions(arg)
+
+def expr_size(expr: Expr) -> int:
+    return sum(1 for _ in subexpressions(expr))
+
+def substitute(expr: Expr, mapping: Dict[object, str]) -> Expr:
+    # Troca as subexpressões cuja chave está em mapping pela variável correspondente
+    if not mapping:
+        return expr
+    if isinstance(expr, (BinOp, UnaryOp)):
+        name = mapping.get(pure_key(expr))
+        if name is not None:
+            return Var(name)
+    if isinstance(expr, BinOp):
+        left, right = substitute(expr.left, mapping), substitute(expr.right, mapping)
+        return expr if left is expr.left and right is expr.right else BinOp(expr.op, left, right)
+    elif isinstance(expr, UnaryOp):
+        inner = substitute(expr.expr, mapping)
+        return expr if inner is expr.expr else UnaryOp(expr.op, inner)
+    elif isinstance(expr, FunctionCall):
+        args = [substitute(arg, mapping) for arg in expr.args]
+        return expr if unchanged(args, expr.args) else FunctionCall(expr.name, args)
+    return expr
+
+def header_exprs(stmt: Stmt) -> List[Expr]:
+    if isinstance(stmt, (Assign, Print, Return)):
+        return [stmt.expr]
+    elif isinstance(stmt, (If, While)):
+        return [stmt.condition]
+    elif isinstance(stmt, For):
+        return [stmt.start, stmt.end]
+    return []
+
+def with_headers(stmt: Stmt, exprs: List[Expr]) -> Stmt:
+    if unchanged(exprs, header_exprs(stmt)):
+        return stmt
+    if isinstance(stmt, Assign):
+        return Assign(stmt.var, exprs[0])
+    elif isinstance(stmt, Print):
+        return Print(exprs[0])
+    elif isinstance(stmt, Return):
+        return Return(exprs[0])
+    elif isinstance(stmt, If):
+        return If(exprs[0], stmt.then_branch, stmt.else_branch)
+    elif isinstance(stmt, While):
+        return While(exprs[0], stmt.body)
+    return For(stmt.var, exprs[0], exprs[1], stmt.body)
+
+def assigned_vars(stmts: List[Stmt]) -> set:
+    found = set()
+    for s in stmts:
+        if isinstance(s, Assign):
+            found.add(s.var)
+        elif isinstance(s, If):
+            found |= assigned_vars(s.then_branch) | assigned_vars(s.else_branch)
+        elif isinstance(s, While):
+            found |= assigned_vars(s.body)
+        elif isinstance(s, For):
+            found.add(s.var)
+            found |= assigned_vars(s.body)
+    return found
+
+def used_names(prog: Program) -> set:
+    used = set(names(prog))
+
+    def visit(stmts):
+        for s in stmts:
+            for expr in header_exprs(s):
+                for sub in subexpressions(expr):
+                    if isinstance(sub, Var):
+                        used.add(sub.name)
+                    elif isinstance(sub, FunctionCall):
+                        used.add(sub.name)
+            if isinstance(s, If):
+                visit(s.then_branch)
+                visit(s.else_branch)
+            elif isinstance(s, (While, For, FunctionDef)):
+                visit(s.body)
+
+    visit(prog.body)
+    return used
+
+def used_before_kill(stmts: List[Stmt], key, operands: set) -> bool:
+    # A expressão volta a ser calculada no bloco antes de algum operando mudar?
+    for s in stmts:
+        # A condição de um ciclo que escreve os operandos não reutiliza nada de fora
+        if isinstance(s, While) and assigned_vars(s.body) & operands:
+            return False
+        if any(pure_key(sub) == key for expr in header_exprs(s) for sub in subexpressions(expr)):
+            return True
+        if isinstance(s, If) and (used_before_kill(s.then_branch, key, operands)
+                                  or used_before_kill(s.else_branch, key, operands)):
+            return True
+        if isinstance(s, (While, For)) and used_before_kill(s.body, key, operands):
+            return True
+        if assigned_vars([s]) & operands:
+            return False
+    return False
+
+
+class FreshNames:
+    # Nomes de temporárias (prefix0, prefix1, ...) que não existem no programa
+    def __init__(self, used: set, prefix: str):
+        self.used = set(used)
+        self.prefix = prefix
+        self.counter = 0
+
+    def fresh(self) -> str:
+        while f"{self.prefix}{self.counter}" in self.used:
+            self.counter += 1
+        name = f"{self.prefix}{self.counter}"
+        self.used.add(name)
+        return name
+
+def evaluated_first(exprs: List[Expr], key, defined: set) -> bool:
+    # A primeira ocorrência de key é calculada antes de tudo o que pode falhar ou
+    # imprimir? Nesse caso antecipá-la só muda o sítio do erro, não o erro
+    def visit(expr: Expr):
+        if pure_key(expr) == key:
+            return True
+        if isinstance(expr, BinOp):
+            children = [expr.left, expr.right]
+        elif isinstance(expr, UnaryOp):
+            children = [expr.expr]
+        elif isinstance(expr, FunctionCall):
+            # A chamada procura a função e confere os argumentos antes de os calcular
+            return False if any(visit(arg) is not None for arg in expr.args) else None
+        else:
+            return None
+        for i, child in enumerate(children):
+            found = visit(child)
+            if found is not None:
+                return found and all(is_safe(c, defined) for c in children[:i])
+        return None
+
+    for i, expr in enumerate(exprs):
+        found = visit(expr)
+        if found is not None:
+            return found and all(is_safe(e, defined) for e in exprs[:i])
+    return False
+
+
+class CommonSubexpressions:
+    def __init__(self, used: set):
+        self.fresh = FreshNames(used, "_cse").fresh
+
+    @staticmethod
+    def kill(available: dict, written: set):
+        for key in [key for key, (name, operands) in available.items() if name in written or operands & written]:
+            del available[key]
+
+    @staticmethod
+    def mapping(available: dict) -> Dict[object, str]:
+        return {key: name for key, (name, _) in available.items()}
+
+    @staticmethod
+    def candidates(exprs: List[Expr], defined: set) -> Dict[object, list]:
+        # Subexpressões que podem ser antecipadas: chave → [nó, nº de ocorrências]
+        found = {}
+        for expr in exprs:
+            for sub in subexpressions(expr):
+                if isinstance(sub, (BinOp, UnaryOp)):
+                    key = pure_key(sub)
+                    if key is not None:
+                        found.setdefault(key, [sub, 0])[1] += 1
+        return {key: entry for key, entry in found.items()
+                if is_safe(entry[0], defined) or evaluated_first(exprs, key, defined)}
+
+    def block(self, stmts: List[Stmt], available: dict, defined: set) -> List[Stmt]:
+        new = []
+        for s in stmts:
+            for out in self.stmt(s, available, defined):
+                new.append(out)
+                defined = defined_before([out], defined, {})
+        return stmts if unchanged(new, stmts) else new
+
+    def hoist(self, node: Expr, available: dict, defined: set, out: List[Stmt]) -> str:
+        # Calcula node numa temporária nova antes da instrução atual
+        temp = self.fresh()
+        # A própria atribuição pode ter repetições, ex: ((a + b) * (a + b)) + ((a + b) * (a + b))
+        for stmt in self.stmt(Assign(temp, node), available, defined):
+            out.append(stmt)
+            defined = defined_before([stmt], defined, {})
+        available[pure_key(node)] = (temp, expr_vars(node))
+        return temp
+
+    def stmt(self, stmt: Stmt, available: dict, defined: set) -> List[Stmt]:
+        # Devolve as instruções que substituem stmt e atualiza available
+        if isinstance(stmt, FunctionDef):
+            body = self.block(stmt.body, {}, set(stmt.params))
+            return [stmt if body is stmt.body else FunctionDef(stmt.name, stmt.params, list(body))]
+        if isinstance(stmt, While):
+            return self.loop(stmt, available, defined)
+
+        out = []
+        headers = [substitute(h, self.mapping(available)) for h in header_exprs(stmt)]
+        while True:
+            found = self.candidates(headers, defined)
+            repeated = [node for node, count in found.values() if count > 1]
+            if isinstance(stmt, If) and not repeated:
+                # Calculada na condição e outra vez num dos ramos
+                repeated = [node for node, _ in found.values()
+                            if used_before_kill(stmt.then_branch, pure_key(node), expr_vars(node))
+                            or used_before_kill(stmt.else_branch, pure_key(node), expr_vars(node))]
+            if not repeated:
+                break
+            node = max(repeated, key=expr_size)
+            temp = self.hoist(node, available, defined, out)
+            defined = defined | expr_vars(node) | {temp}
+            headers = [substitute(h, {pure_key(node): temp}) for h in headers]
+
+        stmt = with_headers(stmt, headers)
+        if isinstance(stmt, Assign):
+            self.kill(available, {stmt.var})
+            key = pure_key(stmt.expr)
+            if isinstance(stmt.expr, (BinOp, UnaryOp)) and key is not None and stmt.var not in expr_vars(stmt.expr):
+                available[key] = (stmt.var, expr_vars(stmt.expr))
+        elif isinstance(stmt, If):
+            inner = defined | expr_vars(stmt.condition)
+            then_branch = self.block(stmt.then_branch, dict(available), inner)
+            else_branch = self.block(stmt.else_branch, dict(available), inner)
+            self.kill(available, assigned_vars([stmt]))
+            if then_branch is not stmt.then_branch or else_branch is not stmt.else_branch:
+                stmt = If(stmt.condition, list(then_branch), list(else_branch))
+        elif isinstance(stmt, For):
+            self.kill(available, assigned_vars([stmt]))
+            inner = defined | expr_vars(stmt.start) | expr_vars(stmt.end) | {stmt.var}
+            body = self.block(stmt.body, dict(available), inner)
+            if body is not stmt.body:
+                stmt = For(stmt.var, stmt.start, stmt.end, list(body))
+        out.append(stmt)
+        return out
+
+    def loop(self, stmt: While, available: dict, defined: set) -> List[Stmt]:
+        # À cabeça do ciclo só chega o que o corpo não altera
+        self.kill(available, assigned_vars(stmt.body))
+        cond = substitute(stmt.condition, self.mapping(available))
+        out, hoisted = [], {}
+        while True:
+            found = self.candidates([cond], defined)
+            repeated = [node for node, count in found.values()
+                        if count > 1 or used_before_kill(stmt.body, pure_key(node), expr_vars(node))]
+            if not repeated:
+                break
+            node = max(repeated, key=expr_size)
+            temp = self.fresh()
+            out.append(Assign(temp, node))
+            hoisted[pure_key(node)] = (temp, expr_vars(node))
+            cond = substitute(cond, {pure_key(node): temp})
+
+        inner = dict(available)
+        inner.update(hoisted)
+        body_defined = defined | expr_vars(stmt.condition) | {temp for temp, _ in hoisted.values()}
+        body = self.block(stmt.body, inner, body_defined)
+        # As temporárias cujos operandos mudam no corpo são recalculadas no fim de cada iteração
+        written = assigned_vars(stmt.body)
+        refresh = [Assign(temp, a.expr) for a, (temp, operands) in zip(out, hoisted.values()) if operands & written]
+        if refresh:
+            body = list(body) + refresh
+        if cond is not stmt.condition or body is not stmt.body:
+            stmt = While(cond, list(body))
+        # À saída a condição acabou de ser avaliada com as temporárias atualizadas
+        available.update(hoisted)
+        out.append(stmt)
+        return out
+
+def common_subexpression_elimination(prog: Program) -> Program:
+    cse = CommonSubexpressions(used_names(prog))
+    body = cse.block(prog.body, {}, set())
+    return prog if body is prog.body else Program(body)
+
+
+# Extra : Movimento de código invariante em ciclos
+# Uma expressão cujas variáveis o ciclo não escreve tem sempre o mesmo valor e
+# passa a ser calculada uma vez, antes do ciclo (pré-cabeçalho):
+#   - subexpressões puras que não podem falhar vão para temporárias _licm0, ...;
+#   - atribuições invariantes `x = e` no início do corpo (antes de tudo o que
+#     pode falhar ou imprimir), com x escrita só aí e não lida antes no ciclo.
+# As funções têm um ambiente próprio, por isso uma chamada nunca escreve as
+# variáveis de quem chama; o que pode mudar são as funções, se o ciclo ou uma
+# função chamada nele executar um def. Só se movem chamadas a funções puras que
+# o ciclo não redefine.
+# Um ciclo pode correr zero vezes: mover uma atribuição (ou uma expressão que só
+# é segura porque a condição já leu as suas variáveis) obriga a proteger o
+# pré-cabeçalho com a condição de entrada, `if cond:` ou `if (start < end):`.
+# Isto só se faz quando essa condição não tem chamadas, porque passa a ser
+# avaliada mais uma vez.
+
+def assign_counts(stmts: List[Stmt]) -> Counter:
+    counts = Counter()
+    for s in stmts:
+        if isinstance(s, Assign):
+            counts[s.var] += 1
+        elif isinstance(s, If):
+            counts += assign_counts(s.then_branch) + assign_counts(s.else_branch)
+        elif isinstance(s, While):
+            counts += assign_counts(s.body)
+        elif isinstance(s, For):
+            counts[s.var] += 1
+            counts += assign_counts(s.body)
+    return counts
+
+def has_calls(exprs: List[Expr]) -> bool:
+    return any(isinstance(sub, FunctionCall) for expr in exprs for sub in subexpressions(expr))
+
+def substitute_block(stmts: List[Stmt], mapping: Dict[object, str]) -> List[Stmt]:
+    new = [substitute_stmt(s, mapping) for s in stmts]
+    return stmts if unchanged(new, stmts) else new
+
+def substitute_stmt(stmt: Stmt, mapping: Dict[object, str]) -> Stmt:
+    # As funções têm outro ambiente: o corpo de um def não é alterado
+    if isinstance(stmt, FunctionDef):
+        return stmt
+    stmt = with_headers(stmt, [substitute(h, mapping) for h in header_exprs(stmt)])
+    if isinstance(stmt, If):
+        then_branch = substitute_block(stmt.then_branch, mapping)
+        else_branch = substitute_block(stmt.else_branch, mapping)
+        if then_branch is not stmt.then_branch or else_branch is not stmt.else_branch:
+            return If(stmt.condition, list(then_branch), list(else_branch))
+    elif isinstance(stmt, While):
+        body = substitute_block(stmt.body, mapping)
+        if body is not stmt.body:
+            return While(stmt.condition, list(body))
+    elif isinstance(stmt, For):
+        body = substitute_block(stmt.body, mapping)
+        if body is not stmt.body:
+            return For(stmt.var, stmt.start, stmt.end, list(body))
+    return stmt
+
+
+class LoopInvariantMotion:
+    def __init__(self, prog: Program):
+        self.fresh = FreshNames(used_names(prog), "_licm").fresh
+        self.pure = pure_functions(prog)
+        self.defs: Dict[str, List[FunctionDef]] = {}
+        self.collect_defs(prog.body)
+        self.maybe_none = self.none_vars(prog.body)
+
+    def never_none(self, expr: Expr) -> bool:
+        # Operadores que o evaluate não conhece (ex: <=) e chamadas podem dar None
+        if isinstance(expr, (IntLit, BoolLit)):
+            return True
+        elif isinstance(expr, Var):
+            return expr.name not in self.maybe_none
+        elif isinstance(expr, BinOp):
+            return expr.op in FOLD_BINOPS and self.never_none(expr.left) and self.never_none(expr.right)
+        elif isinstance(expr, UnaryOp):
+            return expr.op in FOLD_UNOPS and self.never_none(expr.expr)
+        return False
+
+    def none_vars(self, stmts: List[Stmt]) -> set:
+        # Variáveis (de qualquer âmbito) que podem ficar com None; os parâmetros
+        # contam todos se algum argumento puder ser None
+        self.maybe_none = set()
+        assigns, args, params = [], [], set()
+
+        def collect(stmts):
+            for s in stmts:
+                if isinstance(s, Assign):
+                    assigns.append(s)
+                elif isinstance(s, FunctionDef):
+                    params.update(s.params)
+                for expr in header_exprs(s):
+                    args.extend(arg for sub in subexpressions(expr) if isinstance(sub, FunctionCall) for arg in sub.args)
+                for block in (s.then_branch, s.else_branch) if isinstance(s, If) else \
+                        (s.body,) if isinstance(s, (While, For, FunctionDef)) else ():
+                    collect(block)
+
+        collect(stmts)
+        size = -1
+        while size != len(self.maybe_none):
+            size = len(self.maybe_none)
+            self.maybe_none |= {s.var for s in assigns if not self.never_none(s.expr)}
+            if not all(self.never_none(arg) for arg in args):
+                self.maybe_none |= params
+        return self.maybe_none
+
+    def collect_defs(self, stmts: List[Stmt]):
+        for s in stmts:
+            if isinstance(s, FunctionDef):
+                self.defs.setdefault(s.name, []).append(s)
+                self.collect_defs(s.body)
+            elif isinstance(s, If):
+                self.collect_defs(s.then_branch)
+                self.collect_defs(s.else_branch)
+            elif isinstance(s, (While, For)):
+                self.collect_defs(s.body)
+
+    def redefined(self, stmts: List[Stmt]) -> set:
+        # Funções que o ciclo pode (re)definir, diretamente ou dentro das funções que chama
+        found, called, pending = set(), set(), [stmts]
+        while pending:
+            for s in pending.pop():
+                if isinstance(s, FunctionDef):
+                    found.add(s.name)
+                    continue
+                for expr in header_exprs(s):
+                    for sub in subexpressions(expr):
+                        if isinstance(sub, FunctionCall) and sub.name not in called:
+                            called.add(sub.name)
+                            pending.extend(d.body for d in self.defs.get(sub.name, []))
+                if isinstance(s, If):
+                    pending.extend([s.then_branch, s.else_branch])
+                elif isinstance(s, (While, For)):
+                    pending.append(s.body)
+        return found
+
+    def invariant(self, expr: Expr, variant: set, redefined: set) -> bool:
+        for sub in subexpressions(expr):
+            if isinstance(sub, Var) and sub.name in variant:
+                return False
+            if isinstance(sub, FunctionCall) and (sub.name not in self.pure or sub.name in redefined):
+                return False
+        return True
+
+    def block(self, stmts: List[Stmt], defined: set) -> List[Stmt]:
+        new = []
+        for s in stmts:
+            for out in self.stmt(s, defined):
+                new.append(out)
+                defined = defined_before([out], defined, {})
+        return stmts if unchanged(new, stmts) else new
+
+    def stmt(self, stmt: Stmt, defined: set) -> List[Stmt]:
+        if isinstance(stmt, (While, For)):
+            return self.loop(stmt, defined)
+        if isinstance(stmt, If):
+            inner = defined | expr_vars(stmt.condition)
+            then_branch = self.block(stmt.then_branch, inner)
+            else_branch = self.block(stmt.else_branch, inner)
+            if then_branch is not stmt.then_branch or else_branch is not stmt.else_branch:
+                return [If(stmt.condition, list(then_branch), list(else_branch))]
+        elif isinstance(stmt, FunctionDef):
+            body = self.block(stmt.body, set(stmt.params))
+            if body is not stmt.body:
+                return [FunctionDef(stmt.name, stmt.params, list(body))]
+        return [stmt]
+
+    def hoistable_exprs(self, exprs: List[Expr], variant: set, accept: Callable, found: Dict[object, Expr]):
+        # Subexpressões invariantes maximais sem chamadas que accept deixa antecipar
+        for expr in exprs:
+            if (isinstance(expr, (BinOp, UnaryOp)) and expr_vars(expr) and not has_calls([expr])
+                    and not expr_vars(expr) & variant and accept(expr)):
+                found.setdefault(pure_key(expr), expr)
+            elif isinstance(expr, BinOp):
+                self.hoistable_exprs([expr.left, expr.right], variant, accept, found)
+            elif isinstance(expr, UnaryOp):
+                self.hoistable_exprs([expr.expr], variant, accept, found)
+            elif isinstance(expr, FunctionCall):
+                self.hoistable_exprs(list(expr.args), variant, accept, found)
+
+    def hoistable_block(self, stmts: List[Stmt], variant: set, accept: Callable, found: Dict[object, Expr]):
+        for s in stmts:
+            if isinstance(s, FunctionDef):
+                continue
+            self.hoistable_exprs(header_exprs(s), variant, accept, found)
+            if isinstance(s, If):
+                self.hoistable_block(s.then_branch, variant, accept, found)
+                self.hoistable_block(s.else_branch, variant, accept, found)
+            elif isinstance(s, (While, For)):
+                self.hoistable_block(s.body, variant, accept, found)
+
+    def loop(self, stmt: Stmt, defined: set) -> List[Stmt]:
+        headers = header_exprs(stmt)
+        entry = defined.union(*[expr_vars(h) for h in headers])
+        body_defined = entry | {stmt.var} if isinstance(stmt, For) else entry
+        # Os ciclos interiores primeiro: o que sai deles pode sair também deste
+        body = list(self.block(stmt.body, body_defined))
+
+        counts = assign_counts(body)
+        if isinstance(stmt, For):
+            counts[stmt.var] += 1
+        redefined = self.redefined(body)
+        head_vars = entry - defined | ({stmt.var} if isinstance(stmt, For) else set())
+        # A guarda volta a avaliar a condição (ou os limites do for, que não podem dar None:
+        # range(None, 1) e None < 1 falham com mensagens diferentes)
+        guardable = not has_calls(headers) and (isinstance(stmt, While) or all(map(self.never_none, headers)))
+
+        # Atribuições invariantes no início do corpo (só com a guarda de entrada)
+        preheader, moved, rest = [], set(), []
+        prefix, read, inner = guardable, set(), body_defined
+        first = None  # primeira instrução que fica no corpo, se nada antes dela pode falhar
+        for s in body:
+            if (prefix and isinstance(s, Assign) and counts[s.var] == 1 and s.var not in head_vars
+                    and s.var not in read and s.var not in expr_vars(s.expr)
+                    and self.invariant(s.expr, set(counts) - moved, redefined)):
+                preheader.append(s)
+                moved.add(s.var)
+                continue
+            if prefix and first is None:
+                first = (s, inner)
+            prefix = prefix and isinstance(s, Assign) and is_safe(s.expr, inner)
+            if isinstance(s, Assign):
+                read |= expr_vars(s.expr)
+            rest.append(s)
+            inner = defined_before([s], inner, {})
+
+        # Subexpressões invariantes para temporárias
+        variant = set(counts) - moved
+        guarded = defined_before(preheader, entry, {}) if guardable else defined
+        found: Dict[object, Expr] = {}
+        safe = lambda expr: is_safe(expr, guarded)
+        if isinstance(stmt, While):
+            self.hoistable_exprs(headers, variant, safe, found)
+        if first is not None:
+            # Na primeira iteração a instrução calcula-a antes de tudo o resto
+            heads, before = header_exprs(first[0]), first[1]
+            self.hoistable_exprs(heads, variant, lambda expr: safe(expr)
+                                 or evaluated_first(heads, pure_key(expr), before), found)
+        self.hoistable_block(rest, variant, safe, found)
+        mapping = {key: self.fresh() for key in found}
+        preheader += [Assign(mapping[key], expr) for key, expr in found.items()]
+
+        if not preheader:
+            if unchanged(body, stmt.body):
+                return [stmt]
+            return [While(stmt.condition, body) if isinstance(stmt, While) else For(stmt.var, stmt.start, stmt.end, body)]
+
+        body = list(substitute_block(rest, mapping))
+        if isinstance(stmt, While):
+            loop, guard = While(substitute(stmt.condition, mapping), body), stmt.condition
+        else:
+            loop, guard = For(stmt.var, stmt.start, stmt.end, body), BinOp("<", stmt.start, stmt.end)
+        if moved or not all(is_safe(expr, defined) for expr in found.values()):
+            return [If(guard, preheader + [loop], [])]
+        return preheader + [loop]
+
+def loop_invariant_code_motion(prog: Program) -> Program:
+    body = LoopInvariantMotion(prog).block(prog.body, set())
+    return prog if body is prog.body else Program(list(body))
+
+
+def default_passes(max_iterations: int = 10) -> PassManager:
+    return (PassManager(max_iterations)
+            .register("simplify", opt)
+            .register("refactor", refactor)
+            .register("sccp", constant_propagation)
+            .register("licm", loop_invariant_code_motion)
+            .register("cse", common_subexpression_elimination)
+            .register("dce", dead_code_elimination))
+
+def optimize(prog: Program, max_iterations: int = 10) -> Program:
+    return default_passes(max_iterations).run(prog)
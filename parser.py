@@ -1,6 +1,27 @@
-from lark import Lark, Transformer, Token
+from lark import Lark, Transformer, Token, v_args
+from lark.exceptions import LarkError, UnexpectedInput, UnexpectedToken, UnexpectedCharacters
 from lark.indenter import Indenter
 from Lang import *
+from serialization import dump_program, load_program
+from collections import OrderedDict
+from typing import Optional, Dict, Iterable, Iterator, List, Tuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import bisect, hashlib, os, re, shutil, tempfile
+import Lang
+
+# `from parser import *` exporta os nós de Lang e o que este módulo define, mas
+# não os módulos que importa (os, re, shutil, ...)
+__all__ = [name for name in vars(Lang) if not name.startswith("_")] + [
+    "grammar", "TreeIndenter", "ASTTransformer",
+    "GRAMMAR_HASH", "private_path", "parser_cache_path", "get_parser", "LazyParser", "parser",
+    "normalize_source", "parse_code", "ParseCache",
+    "ELSE_LINE", "starts_statement", "is_blank", "read_lines", "split_statements", "iter_parse",
+    "STATEMENT_START", "FIRST_CODE", "BLOCK", "STARTS", "STARTS_SIZE", "statement_starts",
+    "common_prefix", "common_suffix", "remember_starts", "reparse",
+    "ParseResult", "MAX_GROUP", "parse_file", "parse_files", "parse_many",
+    "Span", "ParseIssue", "SourceMap", "get_span_parser", "leading_offset", "content_end",
+    "with_span", "SpanTransformer", "parse_spans", "parse_with_spans", "describe_error", "parse_recovering",
+]
 
 grammar = r"""
 %import common.CNAME -> NAME
@@ -19,13 +40,15 @@ stmt: assign_stmt
     | funcdef_stmt
     | return_stmt
     | print_stmt
+    | pass_stmt
 
 assign_stmt: IDENTIFIER "=" expr _NL
 return_stmt: "return" expr _NL
 
 funcdef_stmt: "def" IDENTIFIER "(" parameters? ")" ":" _NL _INDENT stmt+ _DEDENT
 
-if_stmt: "if" expr ":" _NL _INDENT stmt+ _DEDENT "else" ":" _NL _INDENT stmt+ _DEDENT
+if_stmt: "if" expr ":" _NL _INDENT stmt+ _DEDENT else_block
+else_block: "else" ":" _NL _INDENT stmt+ _DEDENT
 
 for_stmt: "for" IDENTIFIER "in" "range" "(" expr "," expr ")" ":" _NL _INDENT stmt+ _DEDENT
 
@@ -33,6 +56,8 @@ while_stmt: "while" expr ":" _NL _INDENT stmt+ _DEDENT
 
 print_stmt: "print" "(" expr ")" _NL
 
+pass_stmt: "pass" _NL
+
 parameters: IDENTIFIER ("," IDENTIFIER)*
 
 ?expr: expr "==" expr   -> eq
@@ -46,6 +71,7 @@ parameters: IDENTIFIER ("," IDENTIFIER)*
         | expr "&&" expr  -> and_
         | expr "||" expr  -> or_
         | "(" "not" expr ")"   -> not_
+        | "(" "-" expr ")"     -> neg
         | IDENTIFIER "(" [expr ("," expr)*] ")" -> funccall
         | NUMBER           -> number
         | IDENTIFIER       -> var
@@ -68,7 +94,7 @@ class TreeIndenter(Indenter):
 
 class ASTTransformer(Transformer):
     def start(self, stmts):
-        return Program(stmts)
+        return Program(self._filter_newlines(stmts))
 
     def number(self, n): # n[0] é o número
         return IntLit(int(n[0]))
@@ -112,6 +138,9 @@ class ASTTransformer(Transformer):
     def not_(self, args):
         return UnaryOp("not", args[0])
 
+    def neg(self, args): # (- x), como o escreve o pretty printer (-5 continua a ser um número)
+        return UnaryOp("-", args[0])
+
     def stmt(self, args):
         return args[0]    
     
@@ -125,19 +154,23 @@ class ASTTransformer(Transformer):
         return [str(p) for p in args]
 
     def _filter_newlines(self, stmts):
-        # Remove tokens _NL das listas de statements
-        return [s for s in stmts if not (isinstance(s, Token) and s.type == "_NL")]
+        # Remove tokens _NL e instruções pass (None) das listas de statements
+        return [s for s in stmts if s is not None and not (isinstance(s, Token) and s.type == "_NL")]
 
     def print_stmt(self, args):
         expr = args[0]
         return Print(expr)
 
+    def pass_stmt(self, args): # bloco vazio (ex: if sem else): não produz nenhum nó
+        return None
+
+    def else_block(self, stmts):
+        return self._filter_newlines(stmts)
+
     def if_stmt(self, args):
         cond = args[0]
-        stmts = self._filter_newlines(args[1:])
-        half = len(stmts) // 2
-        then_branch = stmts[:half]
-        else_branch = stmts[half:]
+        then_branch = self._filter_newlines(args[1:-1])
+        else_branch = args[-1]
         return If(cond, then_branch, else_branch)
     
     def for_stmt(self, args):
@@ -170,7 +203,497 @@ class ASTTransformer(Transformer):
             body = self._filter_newlines(args[1:])
         return FunctionDef(name, params, body)
 
-parser = Lark(grammar, parser='lalr', transformer=ASTTransformer(), postlex=TreeIndenter())
-
-def parse_code(code: str) -> Program:
-    return parser.parse(code.strip() + "\n")
\ No newline at end of file
+# Extra : Construção preguiçosa do parser
+# O parser LALR só é construído na primeira chamada a get_parser() (importar
+# este módulo, ou pretty_printing, já não gera as tabelas). As tabelas ficam
+# serializadas no ficheiro de cache do Lark (ver parser_cache_path), que guarda o
+# hash da gramática e é regenerado automaticamente quando `grammar` muda.
+# O Lark lê esse ficheiro com pickle, por isso fica numa diretoria do próprio
+# utilizador (~/.cache/lang) e só é usado se mais ninguém o puder escrever.
+
+GRAMMAR_HASH = hashlib.sha256(grammar.encode("utf-8")).hexdigest()
+
+def private_path(path: str) -> bool:
+    # Pertence ao utilizador atual e só ele pode escrever (sem uid, ex: Windows, não há verificação)
+    if not hasattr(os, "getuid"):
+        return True
+    info = os.stat(path)
+    return info.st_uid == os.getuid() and not info.st_mode & 0o022
+
+def parser_cache_path(name: str = "parser") -> Optional[str]:
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    directory = os.path.join(base, "lang")
+    path = os.path.join(directory, f"{name}_{GRAMMAR_HASH[:16]}.lark")
+    try:
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        if not private_path(directory) or (os.path.exists(path) and not private_path(path)):
+            return None
+    except OSError:
+        return None  # sem diretoria de cache: as tabelas são geradas em memória
+    return path
+
+_parser = None
+
+def get_parser() -> Lark:
+    global _parser
+    if _parser is None:
+        _parser = Lark(grammar, parser='lalr', transformer=ASTTransformer(), postlex=TreeIndenter(),
+                       cache=parser_cache_path() or False)
+    return _parser
+
+class LazyParser:
+    # Compatibilidade: `parser.parse(...)` continua a funcionar sem construir o
+    # parser ao importar o módulo
+    def __getattr__(self, name):
+        return getattr(get_parser(), name)
+
+parser = LazyParser()
+
+def normalize_source(code: str) -> str:
+    return code.strip() + "\n"
+
+def parse_code(code: str, cache: Optional["ParseCache"] = None) -> Program:
+    if cache is None:
+        return get_parser().parse(normalize_source(code))
+
+    source = normalize_source(code)
+    key = cache.key(source)
+    prog = cache.get(key)
+    if prog is None:
+        prog = get_parser().parse(source)
+        cache.put(key, prog)
+    return prog
+
+# Extra : Cache de parsing
+# A chave é o sha256 da gramática e do código normalizado, pelo que uma mudança
+# na gramática invalida todas as entradas. Em memória (LRU) e, opcionalmente,
+# em disco, os programas ficam no formato binário de serialization.py; cada get
+# devolve uma cópia nova, que o chamador pode alterar à vontade.
+# No disco há uma subdiretoria por versão da gramática; prune() apaga as outras.
+
+class ParseCache:
+    def __init__(self, directory: Optional[str] = None, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self.entries: "OrderedDict[str, bytes]" = OrderedDict()
+        self.directory = directory
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        if directory is not None:
+            os.makedirs(self.grammar_dir(), exist_ok=True)
+
+    def grammar_dir(self) -> str:
+        return os.path.join(self.directory, GRAMMAR_HASH[:16])
+
+    def key(self, source: str) -> str:
+        data = GRAMMAR_HASH.encode("ascii") + normalize_source(source).encode("utf-8")
+        return hashlib.sha256(data).hexdigest()
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.grammar_dir(), key + ".bin")
+
+    def remember(self, key: str, data: bytes):
+        self.entries[key] = data
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    def get(self, key: str) -> Optional[Program]:
+        data = self.entries.get(key)
+        if data is not None:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return load_program(data)
+
+        if self.directory is not None:
+            try:
+                with open(self.path(key), "rb") as f:
+                    data = f.read()
+                prog = load_program(data)
+            except FileNotFoundError:
+                pass
+            except Exception:
+                # Ficheiro corrompido ou de outra versão do formato: é descartado
+                os.remove(self.path(key))
+            else:
+                self.disk_hits += 1
+                self.remember(key, data)
+                return prog
+
+        self.misses += 1
+        return None
+
+    def put(self, key: str, prog: Program):
+        try:
+            data = dump_program(prog)
+        except Exception:
+            return  # nó que o formato binário não representa: fica sem cache
+        self.remember(key, data)
+
+        if self.directory is not None:
+            # Escrita atómica: outro processo nunca vê um ficheiro a meio
+            fd, tmp = tempfile.mkstemp(dir=self.grammar_dir(), suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, self.path(key))
+
+    def clear(self):
+        self.entries.clear()
+        self.hits = self.disk_hits = self.misses = 0
+        if self.directory is not None:
+            shutil.rmtree(self.grammar_dir(), ignore_errors=True)
+            os.makedirs(self.grammar_dir(), exist_ok=True)
+
+    def prune(self) -> int:
+        # Apaga as entradas em disco de outras versões da gramática
+        if self.directory is None:
+            return 0
+        removed = 0
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if name != GRAMMAR_HASH[:16] and os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors=True)
+                removed += 1
+        return removed
+
+    def info(self) -> Dict[str, int]:
+        return {"hits": self.hits, "disk_hits": self.disk_hits, "misses": self.misses,
+                "size": len(self.entries), "maxsize": self.maxsize}
+
+# Extra : Parsing em streaming
+# iter_parse lê o ficheiro aos bocados e devolve cada instrução de topo assim que
+# ela termina. Uma instrução de topo começa numa linha sem indentação (que não
+# seja vazia, um comentário ou o `else` de um if); nesse ponto o TreeIndenter não
+# tem níveis de indentação abertos, por isso cada instrução é analisada sozinha
+# sem perder o estado da indentação. Só o texto da instrução atual fica em
+# memória, nunca o programa inteiro.
+
+ELSE_LINE = re.compile(r"else[ \t]*:")
+
+def starts_statement(line: str) -> bool:
+    return line[:1] not in ("", " ", "\t", "\r", "#") and not ELSE_LINE.match(line)
+
+def is_blank(line: str) -> bool:
+    stripped = line.strip()
+    return not stripped or stripped[0] == "#"
+
+def read_lines(file_like, chunk_size: int) -> Iterator[str]:
+    rest = ""  # linha incompleta do fim do último bocado
+    started = False
+    while True:
+        data = file_like.read(chunk_size)
+        if not data:
+            break
+        if not started:
+            # Como em parse_code, o espaço no início do código é ignorado
+            data = data.lstrip()
+            if not data:
+                continue
+            started = True
+        lines = (rest + data).split("\n")
+        rest = lines.pop()
+        yield from lines
+    yield rest
+
+def split_statements(lines: Iterable[str]) -> Iterator[List[str]]:
+    # Agrupa as linhas por instrução de topo; as linhas vazias e os comentários
+    # ficam com a instrução anterior (os que estão antes da primeira são ignorados)
+    pending: List[str] = []
+    for line in lines:
+        if starts_statement(line):
+            if pending:
+                yield pending
+            pending = [line]
+        elif pending or not is_blank(line):
+            pending.append(line)  # um `else` sem if fica para o parser dar o erro
+    if pending:
+        yield pending
+
+def iter_parse(file_like, chunk_size: int = 1 << 16, cache: Optional[ParseCache] = None) -> Iterator[Stmt]:
+    for lines in split_statements(read_lines(file_like, chunk_size)):
+        yield from parse_code("\n".join(lines), cache).body
+
+# Extra : Reparsing incremental
+# Cada instrução de topo ocupa o texto entre duas posições de STATEMENT_START (as
+# mesmas fronteiras de split_statements). reparse procura o maior início e fim
+# comuns entre o código antigo e o novo, reutiliza (os mesmos objetos) as
+# instruções que estão inteiramente nessas zonas e só volta a analisar o texto
+# entre elas. As comparações e a procura das fronteiras são feitas pelo Python em
+# C (comparação de fatias e re), por isso uma edição de uma linha custa
+# praticamente o mesmo em ficheiros grandes e pequenos.
+# Se o programa anterior não corresponder ao código antigo (número de instruções
+# diferente) faz o parsing completo.
+
+STATEMENT_START = re.compile(r"^(?=[^ \t\r\n#])(?!else[ \t]*:)", re.M)
+FIRST_CODE = re.compile(r"^[ \t]*[^ \t\r\n#]", re.M)
+BLOCK = 4096
+
+# Posições das instruções dos últimos programas devolvidos por reparse, para a
+# edição seguinte não ter de procurar as fronteiras no ficheiro todo
+STARTS: "OrderedDict[int, tuple]" = OrderedDict()
+STARTS_SIZE = 16
+
+def statement_starts(source: str) -> List[int]:
+    starts = [m.start() for m in STATEMENT_START.finditer(source)]
+    first = FIRST_CODE.search(source)
+    if first is not None and (not starts or first.start() < starts[0]):
+        starts.insert(0, first.start())  # ex: um `else` sem if no início
+    return starts
+
+def common_prefix(a: str, b: str, limit: int) -> int:
+    i = 0
+    while i + BLOCK <= limit and a[i:i + BLOCK] == b[i:i + BLOCK]:
+        i += BLOCK
+    while i < limit and a[i] == b[i]:
+        i += 1
+    return i
+
+def common_suffix(a: str, b: str, limit: int) -> int:
+    i = 0
+    while i + BLOCK <= limit and a[len(a) - i - BLOCK:len(a) - i] == b[len(b) - i - BLOCK:len(b) - i]:
+        i += BLOCK
+    while i < limit and a[-1 - i] == b[-1 - i]:
+        i += 1
+    return i
+
+def remember_starts(prog: Program, source: str, starts: List[int]):
+    if len(starts) == len(prog.body):
+        STARTS[id(prog)] = (prog, source, starts)
+        STARTS.move_to_end(id(prog))
+        while len(STARTS) > STARTS_SIZE:
+            STARTS.popitem(last=False)
+
+def reparse(previous_program: Program, old_source: str, new_source: str,
+            cache: Optional[ParseCache] = None) -> Program:
+    old, new = old_source.lstrip(), new_source.lstrip()
+    entry = STARTS.get(id(previous_program))
+    if entry is not None and entry[0] is previous_program and entry[1] == old:
+        starts = entry[2]
+    else:
+        starts = statement_starts(old)
+    if len(starts) != len(previous_program.body):
+        prog = parse_code(new_source, cache)
+        remember_starts(prog, new, statement_starts(new))
+        return prog
+
+    if old == new:
+        return previous_program
+    limit = min(len(old), len(new))
+    prefix = common_prefix(old, new, limit)
+    suffix = common_suffix(old, new, limit - prefix)
+
+    # Instruções antes da linha alterada: a seguinte tem de começar numa linha
+    # inteiramente comum, senão a fronteira pode ter mudado
+    line_start = old.rfind("\n", 0, prefix) + 1
+    first = max(bisect.bisect_left(starts, line_start) - 1, 0)
+    # Instruções depois: começam numa linha cujo "\n" anterior também é comum
+    # (ou no início do código antigo, se no novo estiver depois de um "\n")
+    after = len(old) - suffix + 1
+    if suffix == len(old) and new[len(new) - len(old) - 1:len(new) - len(old)] == "\n":
+        after = 0
+    last = bisect.bisect_left(starts, after, lo=first)
+
+    begin = starts[first] if first < len(starts) else 0
+    end = starts[last] - len(old) + len(new) if last < len(starts) else len(new)
+    changed = new[begin:end]
+
+    body = previous_program.body[:first]
+    if not all(is_blank(line) for line in changed.split("\n")):
+        body += parse_code(changed, cache).body
+    body += previous_program.body[last:]
+    prog = Program(body)
+
+    shift = len(new) - len(old)
+    remember_starts(prog, new, starts[:first] + [begin + i for i in statement_starts(changed)]
+                    + [i + shift for i in starts[last:]])
+    return prog
+
+
+# Extra : Parsing de muitos ficheiros em paralelo
+# parse_many distribui os ficheiros por um conjunto de processos; cada processo
+# constrói o parser uma única vez (get_parser no arranque, a partir da cache de
+# tabelas) e analisa grupos de ficheiros. Os programas voltam no formato binário
+# de serialization.py (load_program para os reconstruir), que é muito mais
+# pequeno e rápido de transferir do que a AST em pickle.
+# Cada resultado é (caminho, dados, erro): um ficheiro com erro tem dados None e
+# a mensagem em erro, sem interromper os outros. Os resultados chegam pela ordem
+# em que os grupos terminam.
+
+ParseResult = Tuple[str, Optional[bytes], Optional[str]]
+
+MAX_GROUP = 64  # ficheiros por tarefa enviada a um processo
+
+def parse_file(path: str) -> ParseResult:
+    try:
+        with open(path, encoding="utf-8") as f:
+            code = f.read()
+        return path, dump_program(parse_code(code)), None
+    except Exception as e:
+        return path, None, f"{type(e).__name__}: {e}"
+
+def parse_files(paths: List[str]) -> List[ParseResult]:
+    return [parse_file(path) for path in paths]
+
+def parse_many(paths: Iterable[str], workers: Optional[int] = None) -> Iterator[ParseResult]:
+    paths = list(paths)
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(paths) <= 1:
+        for path in paths:
+            yield parse_file(path)
+        return
+
+    # Grupos pequenos o suficiente para repartir bem o trabalho entre processos
+    size = max(1, min(MAX_GROUP, len(paths) // (workers * 4)))
+    groups = [paths[i:i + size] for i in range(0, len(paths), size)]
+    with ProcessPoolExecutor(max_workers=workers, initializer=get_parser) as pool:
+        for future in as_completed([pool.submit(parse_files, group) for group in groups]):
+            yield from future.result()
+
+
+# Extra : Posições no código e recuperação de erros
+# As posições ficam numa tabela à parte (SourceMap), indexada pela identidade do
+# nó, para os nós da AST não ficarem maiores: quem não precisa delas usa
+# parse_code e não paga nada. parse_with_spans constrói a árvore do Lark com
+# propagate_positions (tabelas na mesma cache do parser principal) e converte-a
+# com SpanTransformer, cujas regras recebem o meta do Lark (v_args) e registam o
+# intervalo (linha, coluna, linha final, coluna final) de cada Expr e Stmt.
+# parse_recovering analisa cada instrução de topo separadamente (as mesmas
+# fronteiras de reparse): uma instrução com erro é descartada, o erro é guardado
+# e a análise continua na instrução seguinte, pelo que um único parsing encontra
+# os erros de todas as instruções de topo.
+
+Span = Tuple[int, int, int, int]   # linha, coluna, linha final, coluna final (a partir de 1)
+ParseIssue = Tuple[int, int, str]  # linha, coluna, mensagem
+
+class SourceMap:
+    def __init__(self):
+        self.spans: Dict[int, tuple] = {}  # id(nó) → (nó, span); o nó mantém o id válido
+
+    def add(self, node, span: Span):
+        # Um nó que só reencaminha outro (ex: stmt) fica com o intervalo mais interno
+        self.spans.setdefault(id(node), (node, span))
+
+    def span(self, node) -> Optional[Span]:
+        entry = self.spans.get(id(node))
+        return entry[1] if entry is not None and entry[0] is node else None
+
+    def line(self, node) -> Optional[int]:
+        span = self.span(node)
+        return span[0] if span is not None else None
+
+    def __len__(self) -> int:
+        return len(self.spans)
+
+
+_span_parser = None
+
+def get_span_parser() -> Lark:
+    global _span_parser
+    if _span_parser is None:
+        _span_parser = Lark(grammar, parser='lalr', postlex=TreeIndenter(), propagate_positions=True,
+                            cache=parser_cache_path("spans") or False)
+    return _span_parser
+
+def leading_offset(text: str) -> Tuple[int, int]:
+    # normalize_source retira o espaço inicial: linhas e colunas (da 1ª linha) a somar
+    leading = text[:len(text) - len(text.lstrip())]
+    return leading.count("\n"), len(leading) - leading.rfind("\n") - 1
+
+def content_end(text: str, pos: int) -> int:
+    # O intervalo de uma instrução inclui o fim de linha (e a indentação ou os
+    # comentários que se seguem): recua até ao último carácter de código
+    while pos > 0:
+        if text[pos - 1].isspace():
+            pos -= 1
+            continue
+        comment = text.find("#", text.rfind("\n", 0, pos) + 1, pos)
+        if comment < 0:
+            return pos
+        pos = comment
+    return pos
+
+def with_span(rule):
+    @v_args(meta=True)
+    def method(self, meta, children):
+        node = rule(self, children)
+        if isinstance(node, (Expr, Stmt)) and not meta.empty:
+            self.record(node, meta)
+        return node
+    return method
+
+class SpanTransformer(ASTTransformer):
+    def __init__(self, text: str, source_map: SourceMap, line_offset: int = 0, column_offset: int = 0):
+        super().__init__()
+        self.text = text
+        self.line_starts = [0] + [m.end() for m in re.finditer("\n", text)]
+        self.source_map = source_map
+        self.line_offset = line_offset
+        self.column_offset = column_offset
+
+    def position(self, line: int, column: int) -> Tuple[int, int]:
+        return line + self.line_offset, column + (self.column_offset if line == 1 else 0)
+
+    def end_position(self, pos: int) -> Tuple[int, int]:
+        # Linha do último carácter; a coluna final fica a seguir a ele (como no Lark)
+        line = bisect.bisect_right(self.line_starts, pos - 1)
+        return self.position(line, pos - self.line_starts[line - 1] + 1)
+
+    def record(self, node, meta):
+        end = content_end(self.text, meta.end_pos)
+        self.source_map.add(node, self.position(meta.line, meta.column) + self.end_position(end))
+
+# Cada regra de ASTTransformer passa a receber o meta do nó da árvore
+for name, rule in list(vars(ASTTransformer).items()):
+    if callable(rule) and not name.startswith("_"):
+        setattr(SpanTransformer, name, with_span(rule))
+
+def parse_spans(code: str, source_map: SourceMap, line_offset: int = 0) -> Program:
+    lines, column = leading_offset(code)
+    text = normalize_source(code)
+    tree = get_span_parser().parse(text)
+    return SpanTransformer(text, source_map, line_offset + lines, column).transform(tree)
+
+def parse_with_spans(code: str) -> Tuple[Program, SourceMap]:
+    source_map = SourceMap()
+    return parse_spans(code, source_map), source_map
+
+
+def describe_error(e: LarkError) -> str:
+    if isinstance(e, UnexpectedToken):
+        token = e.token
+        if token.type == "$END":
+            found = "Fim inesperado do código"
+        elif token.type == "_NL":
+            found = "Fim de linha inesperado"
+        elif token.type == "_INDENT":
+            found = "Indentação inesperada"
+        elif token.type == "_DEDENT":
+            found = "Fim de bloco inesperado"
+        else:
+            found = f"Símbolo inesperado '{token}'"
+        return f"{found}; esperado: {', '.join(sorted(e.expected))}"
+    if isinstance(e, UnexpectedCharacters):
+        return f"Carácter inesperado {e.char!r}"
+    return f"Indentação inconsistente: {e}" if type(e).__name__ == "DedentError" else str(e)
+
+def parse_recovering(code: str, source_map: Optional[SourceMap] = None) -> Tuple[Program, List[ParseIssue]]:
+    body: List[Stmt] = []
+    issues: List[ParseIssue] = []
+    starts = statement_starts(code)
+    line, previous = 1, 0
+    for i, start in enumerate(starts):
+        line += code.count("\n", previous, start)
+        previous = start
+        chunk = code[start:starts[i + 1] if i + 1 < len(starts) else len(code)]
+        try:
+            if source_map is None:
+                body += parse_code(chunk).body
+            else:
+                body += parse_spans(chunk, source_map, line - 1).body
+        except LarkError as e:
+            lines, column = leading_offset(chunk)
+            if isinstance(e, UnexpectedInput) and e.line > 0:
+                issues.append((line + lines + e.line - 1, e.column + (column if e.line == 1 else 0), describe_error(e)))
+            else:
+                issues.append((line + lines, column + 1, describe_error(e)))
+    return Program(body), issues
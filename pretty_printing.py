@@ -1,4 +1,6 @@
 from parser import *
+from itertools import chain
+from typing import Iterator, TextIO
 
 # 1.3 Pretty Printing
 
@@ -26,49 +28,76 @@ def pretty_expr(expr: Expr) -> str:
     else:
         return "???"
 
-def pretty_stmt(stmt: Stmt, level=0) -> List[str]:
+# Extra : Impressão em streaming
+# As linhas são geradas uma a uma com uma pilha explícita; cada entrada guarda o
+# nível e o prefixo de indentação já calculado, pelo que cada linha custa O(1)
+# independentemente da profundidade (antes cada nível voltava a copiar as linhas
+# de todos os níveis de baixo). Um filho do nível `level` fica com o prefixo do
+# pai mais "    " * (level + 1), como fazia indent em cada nível.
+
+class RawLine:
+    # Linha já pronta na pilha (ex: o `else:` entre os dois ramos de um If)
+    __slots__ = ("text",)
+
+    def __init__(self, text: str):
+        self.text = text
+
+def header_line(stmt: Stmt) -> str:
     if isinstance(stmt, Assign):
-        return [f"{stmt.var} = {pretty_expr(stmt.expr)}"]
-    
+        return f"{stmt.var} = {pretty_expr(stmt.expr)}"
     elif isinstance(stmt, If):
-        cond = pretty_expr(stmt.condition)
-        then_lines = sum([pretty_stmt(s, level + 1) for s in stmt.then_branch], [])
-        else_lines = sum([pretty_stmt(s, level + 1) for s in stmt.else_branch], [])
-        return [f"if {cond}:"] \
-            + indent(then_lines, level + 1) \
-            + [f"else:"] \
-            + indent(else_lines, level + 1)
-    
+        return f"if {pretty_expr(stmt.condition)}:"
     elif isinstance(stmt, While):
-        cond = pretty_expr(stmt.condition)
-        body = sum([pretty_stmt(s, level + 1) for s in stmt.body], [])
-        return [f"while {cond}:"] \
-            + indent(body, level + 1)
-    
+        return f"while {pretty_expr(stmt.condition)}:"
     elif isinstance(stmt, For):
-        start = pretty_expr(stmt.start)
-        end = pretty_expr(stmt.end)
-        body = sum([pretty_stmt(s, level + 1) for s in stmt.body], [])
-        return [f"for {stmt.var} in range({start}, {end}):"] \
-            + indent(body, level + 1)
-    
+        return f"for {stmt.var} in range({pretty_expr(stmt.start)}, {pretty_expr(stmt.end)}):"
     elif isinstance(stmt, FunctionDef):
-        header = f"def {stmt.name}({', '.join(stmt.params)}):"
-        body = sum([pretty_stmt(s, level + 1) for s in stmt.body], [])
-        return [header] + indent(body, level + 1)
-    
+        return f"def {stmt.name}({', '.join(stmt.params)}):"
     elif isinstance(stmt, Print):
-        return [f"print({pretty_expr(stmt.expr)})"]
-    
+        return f"print({pretty_expr(stmt.expr)})"
     elif isinstance(stmt, Return):
-        return [f"return {pretty_expr(stmt.expr)}"]
-    
+        return f"return {pretty_expr(stmt.expr)}"
     else:
-        return [f"# unknown statement {stmt}"]
+        return f"# unknown statement {stmt}"
+
+def block_or_pass(stmts: List[Stmt], prefix: str):
+    # Os passes podem deixar blocos vazios (ex: if sem else, ou o programa todo),
+    # que a gramática escreve como pass
+    return stmts if len(stmts) else [RawLine(prefix + "pass")]
+
+def pretty_lines(stmts: List[Stmt], level=0) -> Iterator[str]:
+    stack = [(iter(stmts), level, "")]
+    while stack:
+        items, level, prefix = stack[-1]
+        for stmt in items:
+            if isinstance(stmt, RawLine):
+                yield stmt.text
+                continue
+            yield prefix + header_line(stmt)
+
+            inner = prefix + "    " * (level + 1)
+            if isinstance(stmt, If):
+                body = chain(block_or_pass(stmt.then_branch, inner), [RawLine(prefix + "else:")],
+                             block_or_pass(stmt.else_branch, inner))
+            elif isinstance(stmt, (While, For, FunctionDef)):
+                body = iter(block_or_pass(stmt.body, inner))
+            else:
+                continue
+            stack.append((body, level + 1, inner))
+            break
+        else:
+            stack.pop()
+
+def pretty_stmt(stmt: Stmt, level=0) -> List[str]:
+    return list(pretty_lines([stmt], level))
 
 def pretty_program(prog: Program) -> str:
-    lines = sum([pretty_stmt(s, level=0) for s in prog.body], [])
-    return "\n".join(lines) + "\n"
+    return "\n".join(pretty_lines(block_or_pass(prog.body, ""))) + "\n"
+
+def write_program(prog: Program, stream: TextIO):
+    for line in pretty_lines(block_or_pass(prog.body, "")):
+        stream.write(line)
+        stream.write("\n")
 
 # Injetar __str__ no Program
-Program.__str__ = lambda self: pretty_program(self)
\ No newline at end of file
+Program.__str__ = lambda self: pretty_program(self)
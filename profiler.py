@@ -0,0 +1,131 @@
+from typing import List, Dict, Callable
+from collections import Counter
+from Lang import *
+from evaluate import compile_program
+import time
+
+# Extra : Profiler por nó da AST
+# Ativa-se com evaluate(ast, inputs, profiler=Profiler()). O programa é compilado
+# para closures (ver compile_program) com cada nó envolvido por uma medição, pelo
+# que sem profiler o interpretador não tem qualquer custo extra.
+# Os ids dos nós são atribuídos pela ordem de compilação (pós-ordem) e são os
+# mesmos em todas as execuções do mesmo programa.
+
+class NodeStats:
+    __slots__ = ("node", "label", "hits", "total", "own", "active")
+
+    def __init__(self, node, label: str):
+        self.node = node
+        self.label = label
+        self.hits = 0
+        self.total = 0.0  # tempo acumulado (inclui os filhos)
+        self.own = 0.0    # tempo próprio (exclui os filhos)
+        self.active = 0   # ativações em curso (recursão)
+
+
+def node_label(node) -> str:
+    if isinstance(node, (Assign, For)):
+        return f"{type(node).__name__} {node.var}"
+    if isinstance(node, (FunctionDef, FunctionCall, Var)):
+        return f"{type(node).__name__} {node.name}"
+    if isinstance(node, (BinOp, UnaryOp)):
+        return f"{type(node).__name__} {node.op}"
+    if isinstance(node, (IntLit, BoolLit)):
+        return f"{type(node).__name__} {node.value}"
+    return type(node).__name__
+
+
+class Profiler:
+    def __init__(self, clock: Callable[[], float] = time.perf_counter):
+        self.clock = clock
+        self.stats: List[NodeStats] = []   # indexado pelo id do nó
+        self.calls = Counter()             # função → número de chamadas
+        self.stacks = Counter()            # pilha de funções → tempo próprio
+        self.path = ["<main>"]             # pilha atual no formato "a;b;c"
+        self.child_time = [0.0]
+        self.compiled = {}
+
+    def compile(self, ast: Program) -> Callable:
+        entry = self.compiled.get(id(ast))
+        if entry is None or entry[0] is not ast:
+            entry = (ast, compile_program(ast, self))
+            self.compiled[id(ast)] = entry
+        return entry[1]
+
+    def wrap_node(self, node, fn: Callable) -> Callable:
+        stats = NodeStats(node, node_label(node))
+        self.stats.append(stats)
+        clock, child_time, path, stacks = self.clock, self.child_time, self.path, self.stacks
+
+        def profiled(env, func_env):
+            stats.hits += 1
+            stats.active += 1
+            child_time.append(0.0)
+            start = clock()
+            try:
+                return fn(env, func_env)
+            finally:
+                elapsed = clock() - start
+                own = elapsed - child_time.pop()
+                child_time[-1] += elapsed
+                stats.own += own
+                stacks[path[-1]] += own
+                stats.active -= 1
+                if stats.active == 0:
+                    # Em chamadas recursivas só conta a ativação mais externa
+                    stats.total += elapsed
+        return profiled
+
+    def wrap_frame(self, name: str, body: Callable) -> Callable:
+        calls, path = self.calls, self.path
+
+        def frame(env, func_env):
+            calls[name] += 1
+            path.append(path[-1] + ";" + name)
+            try:
+                return body(env, func_env)
+            finally:
+                path.pop()
+        return frame
+
+    def reset(self):
+        # Mantém os programas compilados (e os ids) e limpa as medições
+        for stats in self.stats:
+            stats.hits = 0
+            stats.total = 0.0
+            stats.own = 0.0
+        self.calls.clear()
+        self.stacks.clear()
+
+    def node_stats(self) -> Dict[int, Dict[str, object]]:
+        return {i: {"node": s.label, "hits": s.hits, "total": s.total, "self": s.own}
+                for i, s in enumerate(self.stats)}
+
+    # Exportação
+    def table(self, limit: int = None) -> str:
+        rows = sorted(((i, s) for i, s in enumerate(self.stats) if s.hits), key=lambda row: row[1].own, reverse=True)
+        if limit is not None:
+            rows = rows[:limit]
+        lines = [f"{'id':>5}  {'nó':<24}{'hits':>10}{'total (ms)':>14}{'próprio (ms)':>14}"]
+        for i, s in rows:
+            lines.append(f"{i:>5}  {s.label[:24]:<24}{s.hits:>10}"
+                         f"{s.total * 1000:>14.3f}{s.own * 1000:>14.3f}")
+        if self.calls:
+            lines.append("")
+            lines.append(f"{'função':<24}{'chamadas':>10}")
+            for name, n in self.calls.most_common():
+                lines.append(f"{name:<24}{n:>10}")
+        return "\n".join(lines)
+
+    def collapsed(self) -> str:
+        # Formato "pilha;de;funções valor" (flamegraph.pl, speedscope, ...), em microssegundos
+        lines = []
+        for stack, seconds in sorted(self.stacks.items()):
+            micros = round(seconds * 1e6)
+            if micros > 0:
+                lines.append(f"{stack} {micros}")
+        return "\n".join(lines)
+
+    def write_collapsed(self, path: str):
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(self.collapsed() + "\n")
@@ -0,0 +1,301 @@
+from typing import List, Dict, Iterable, Union
+from Lang import *
+import mmap, struct
+
+# Extra : Formato binário para programas
+# Programa: MAGIC, versão (varint), tabela de strings (nº de strings e, para
+# cada uma, comprimento + UTF-8) e o corpo em pré-ordem. Cada nó começa com um
+# byte de tipo; nomes e operadores são índices na tabela de strings, inteiros
+# são varints com codificação zigzag (precisão arbitrária) e listas levam o
+# comprimento à frente.
+#
+# Corpus (muitos programas num ficheiro, ex: mutantes):
+#   [0:4] CORPUS_MAGIC  [4:8] versão  [8:16] nº de programas  [16:24] posição do índice
+#   programas, um a seguir ao outro
+#   índice: nº de programas + 1 posições (uint64), a última é o fim do último programa
+# O índice permite ler um programa qualquer com mmap sem ler o ficheiro todo.
+
+MAGIC = b"LANG"
+CORPUS_MAGIC = b"LANC"
+VERSION = 1
+
+T_VAR = 0
+T_INT = 1
+T_TRUE = 2
+T_FALSE = 3
+T_BINOP = 4
+T_UNOP = 5
+T_CALL = 6
+T_ASSIGN = 7
+T_IF = 8
+T_WHILE = 9
+T_FOR = 10
+T_DEF = 11
+T_RETURN = 12
+T_PRINT = 13
+T_INT_BOOL = 14  # IntLit com valor booleano (ex: criado por mutações)
+
+CORPUS_HEADER = struct.Struct("<4sIQQ")
+OFFSET = struct.Struct("<Q")
+
+
+def write_varint(out: bytearray, n: int):
+    while n >= 0x80:
+        out.append((n & 0x7F) | 0x80)
+        n >>= 7
+    out.append(n)
+
+def write_int(out: bytearray, n: int):
+    # zigzag: 0, -1, 1, -2, ... → 0, 1, 2, 3, ...
+    write_varint(out, n * 2 if n >= 0 else -n * 2 - 1)
+
+
+class Encoder:
+    def __init__(self):
+        self.out = bytearray()
+        self.strings: Dict[str, int] = {}
+
+    def string(self, s: str):
+        i = self.strings.get(s)
+        if i is None:
+            i = self.strings[s] = len(self.strings)
+        write_varint(self.out, i)
+
+    def block(self, stmts: List[Stmt]):
+        write_varint(self.out, len(stmts))
+        for s in stmts:
+            self.node(s)
+
+    def node(self, node):
+        out = self.out
+        if isinstance(node, Var):
+            out.append(T_VAR)
+            self.string(node.name)
+        elif isinstance(node, IntLit):
+            if type(node.value) is bool:
+                out.append(T_INT_BOOL)
+                out.append(int(node.value))
+            else:
+                out.append(T_INT)
+                write_int(out, node.value)
+        elif isinstance(node, BoolLit):
+            out.append(T_TRUE if node.value else T_FALSE)
+        elif isinstance(node, BinOp):
+            out.append(T_BINOP)
+            self.string(node.op)
+            self.node(node.left)
+            self.node(node.right)
+        elif isinstance(node, UnaryOp):
+            out.append(T_UNOP)
+            self.string(node.op)
+            self.node(node.expr)
+        elif isinstance(node, FunctionCall):
+            out.append(T_CALL)
+            self.string(node.name)
+            write_varint(out, len(node.args))
+            for arg in node.args:
+                self.node(arg)
+        elif isinstance(node, Assign):
+            out.append(T_ASSIGN)
+            self.string(node.var)
+            self.node(node.expr)
+        elif isinstance(node, If):
+            out.append(T_IF)
+            self.node(node.condition)
+            self.block(node.then_branch)
+            self.block(node.else_branch)
+        elif isinstance(node, While):
+            out.append(T_WHILE)
+            self.node(node.condition)
+            self.block(node.body)
+        elif isinstance(node, For):
+            out.append(T_FOR)
+            self.string(node.var)
+            self.node(node.start)
+            self.node(node.end)
+            self.block(node.body)
+        elif isinstance(node, FunctionDef):
+            out.append(T_DEF)
+            self.string(node.name)
+            write_varint(out, len(node.params))
+            for p in node.params:
+                self.string(p)
+            self.block(node.body)
+        elif isinstance(node, Return):
+            out.append(T_RETURN)
+            self.node(node.expr)
+        elif isinstance(node, Print):
+            out.append(T_PRINT)
+            self.node(node.expr)
+        else:
+            raise Exception(f"Nó não suportado na serialização: {type(node).__name__}")
+
+
+def dump_program(prog: Program) -> bytes:
+    encoder = Encoder()
+    encoder.block(prog.body)
+
+    out = bytearray(MAGIC)
+    write_varint(out, VERSION)
+    write_varint(out, len(encoder.strings))
+    for s in encoder.strings:  # dicionários mantêm a ordem de inserção
+        data = s.encode("utf-8")
+        write_varint(out, len(data))
+        out += data
+    out += encoder.out
+    return bytes(out)
+
+
+class Decoder:
+    def __init__(self, data):
+        self.data = data
+        self.pos = 0
+        self.strings: List[str] = []
+
+    def varint(self) -> int:
+        data = self.data
+        result = shift = 0
+        while True:
+            byte = data[self.pos]
+            self.pos += 1
+            result |= (byte & 0x7F) << shift
+            if byte < 0x80:
+                return result
+            shift += 7
+
+    def int(self) -> int:
+        n = self.varint()
+        return n >> 1 if not n & 1 else -((n + 1) >> 1)
+
+    def string(self) -> str:
+        return self.strings[self.varint()]
+
+    def block(self) -> List[Stmt]:
+        return [self.node() for _ in range(self.varint())]
+
+    def node(self):
+        tag = self.data[self.pos]
+        self.pos += 1
+        if tag == T_VAR:
+            return Var(self.string())
+        elif tag == T_INT:
+            return IntLit(self.int())
+        elif tag == T_TRUE:
+            return BoolLit(True)
+        elif tag == T_FALSE:
+            return BoolLit(False)
+        elif tag == T_BINOP:
+            op = self.string()
+            left = self.node()
+            return BinOp(op, left, self.node())
+        elif tag == T_UNOP:
+            op = self.string()
+            return UnaryOp(op, self.node())
+        elif tag == T_CALL:
+            name = self.string()
+            return FunctionCall(name, [self.node() for _ in range(self.varint())])
+        elif tag == T_ASSIGN:
+            var = self.string()
+            return Assign(var, self.node())
+        elif tag == T_IF:
+            cond = self.node()
+            then_branch = self.block()
+            return If(cond, then_branch, self.block())
+        elif tag == T_WHILE:
+            cond = self.node()
+            return While(cond, self.block())
+        elif tag == T_FOR:
+            var = self.string()
+            start = self.node()
+            end = self.node()
+            return For(var, start, end, self.block())
+        elif tag == T_DEF:
+            name = self.string()
+            params = [self.string() for _ in range(self.varint())]
+            return FunctionDef(name, params, self.block())
+        elif tag == T_RETURN:
+            return Return(self.node())
+        elif tag == T_PRINT:
+            return Print(self.node())
+        elif tag == T_INT_BOOL:
+            value = bool(self.data[self.pos])
+            self.pos += 1
+            return IntLit(value)
+        else:
+            raise Exception(f"Tipo de nó desconhecido na posição {self.pos - 1}: {tag}")
+
+
+def load_program(data: Union[bytes, bytearray, memoryview]) -> Program:
+    if bytes(data[:4]) != MAGIC:
+        raise Exception("Formato inválido: não é um programa serializado")
+    decoder = Decoder(data)
+    decoder.pos = 4
+    version = decoder.varint()
+    if version != VERSION:
+        raise Exception(f"Versão do formato não suportada: {version}")
+
+    for _ in range(decoder.varint()):
+        size = decoder.varint()
+        decoder.strings.append(bytes(data[decoder.pos:decoder.pos + size]).decode("utf-8"))
+        decoder.pos += size
+    return Program(decoder.block())
+
+
+# Corpus de programas
+def dump_corpus(programs: Iterable[Program], path: str) -> int:
+    with open(path, "wb") as f:
+        f.write(CORPUS_HEADER.pack(CORPUS_MAGIC, VERSION, 0, 0))
+        offsets = []
+        for prog in programs:
+            offsets.append(f.tell())
+            f.write(dump_program(prog))
+        offsets.append(f.tell())
+
+        index = f.tell()
+        f.write(b"".join(OFFSET.pack(o) for o in offsets))
+        f.seek(0)
+        f.write(CORPUS_HEADER.pack(CORPUS_MAGIC, VERSION, len(offsets) - 1, index))
+    return len(offsets) - 1
+
+
+class CorpusReader:
+    # Abre o ficheiro com mmap; cada programa só é lido e descodificado quando pedido
+    def __init__(self, path: str):
+        self.file = open(path, "rb")
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.count, self.index = CORPUS_HEADER.unpack_from(self.map, 0)
+        if magic != CORPUS_MAGIC:
+            self.close()
+            raise Exception("Formato inválido: não é um corpus de programas")
+        if version != VERSION:
+            self.close()
+            raise Exception(f"Versão do formato não suportada: {version}")
+
+    def __len__(self) -> int:
+        return self.count
+
+    def raw(self, i: int) -> bytes:
+        if not 0 <= i < self.count:
+            raise IndexError(f"Programa {i} fora do corpus ({self.count} programas)")
+        start, = OFFSET.unpack_from(self.map, self.index + 8 * i)
+        end, = OFFSET.unpack_from(self.map, self.index + 8 * (i + 1))
+        return self.map[start:end]  # copia só este programa
+
+    def __getitem__(self, i: int) -> Program:
+        if i < 0:
+            i += self.count
+        return load_program(self.raw(i))
+
+    def __iter__(self):
+        for i in range(self.count):
+            yield self[i]
+
+    def close(self):
+        self.map.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
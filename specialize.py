@@ -0,0 +1,230 @@
+from typing import List, Tuple, Dict, Optional
+from Lang import *
+from evaluate import Inputs, BINOPS, UNOPS, runTest
+from optimization import constant, is_constant, assigned_vars, expr_vars
+
+# Extra : Especialização (avaliação parcial) de um programa
+# As variáveis com valor conhecido vivem num ambiente estático e não geram
+# código; tudo o que depende de valores desconhecidos fica no programa residual.
+# Um valor estático só é escrito no programa residual (materializado) quando o
+# código dinâmico precisa dele: antes de um ciclo dinâmico que o altera, no fim
+# dos ramos de um If dinâmico em que os valores divergem, e em `result` no fim.
+
+MAX_UNROLL = 1000  # iterações desenroladas por especialização
+
+
+class State:
+    def __init__(self, static: Dict[str, object], materialized: set):
+        self.static = static              # nome → valor conhecido
+        self.materialized = materialized  # nomes cujo valor já existe no programa residual
+        self.returned = False             # o caminho atual terminou com return
+
+    def copy(self) -> "State":
+        return State(dict(self.static), set(self.materialized))
+
+
+class Specializer:
+    def __init__(self, max_unroll: int = MAX_UNROLL):
+        self.unroll = max_unroll
+
+    # Expressões: devolve um literal quando o valor é conhecido
+    def spec_expr(self, expr: Expr, state: State) -> Expr:
+        if isinstance(expr, Var):
+            if expr.name in state.static:
+                return constant(state.static[expr.name])
+            return expr
+
+        elif isinstance(expr, BinOp):
+            left = self.spec_expr(expr.left, state)
+            right = self.spec_expr(expr.right, state)
+            if is_constant(left) and is_constant(right) and expr.op in BINOPS:
+                try:
+                    folded = constant(BINOPS[expr.op](left.value, right.value))
+                    if folded is not None:
+                        return folded
+                except Exception:
+                    pass  # ex: divisão por zero fica para a execução
+            return BinOp(expr.op, left, right)
+
+        elif isinstance(expr, UnaryOp):
+            inner = self.spec_expr(expr.expr, state)
+            if is_constant(inner) and expr.op in UNOPS:
+                try:
+                    folded = constant(UNOPS[expr.op](inner.value))
+                    if folded is not None:
+                        return folded
+                except Exception:
+                    pass
+            return UnaryOp(expr.op, inner)
+
+        elif isinstance(expr, FunctionCall):
+            # Chamadas ficam sempre no residual (podem imprimir ou falhar)
+            return FunctionCall(expr.name, [self.spec_expr(a, state) for a in expr.args])
+
+        else:
+            return expr
+
+    def flush(self, names, state: State, out: List[Stmt]):
+        for name in sorted(names):
+            if name in state.static and name not in state.materialized:
+                out.append(Assign(name, constant(state.static[name])))
+                state.materialized.add(name)
+
+    def make_dynamic(self, names, state: State, out: List[Stmt]):
+        self.flush(names, state, out)
+        for name in names:
+            state.static.pop(name, None)
+            state.materialized.discard(name)
+
+    def spec_block(self, stmts: List[Stmt], state: State, out: List[Stmt]):
+        for s in stmts:
+            if state.returned:
+                return
+            self.spec_stmt(s, state, out)
+
+    def spec_loop_body(self, body: List[Stmt], written: set, state: State) -> List[Stmt]:
+        # No fim de cada iteração as variáveis alteradas voltam a ser dinâmicas
+        inner = state.copy()
+        out = []
+        self.spec_block(body, inner, out)
+        if not inner.returned:
+            self.flush(written, inner, out)
+        return out
+
+    def spec_stmt(self, stmt: Stmt, state: State, out: List[Stmt]):
+        if isinstance(stmt, Assign):
+            value = self.spec_expr(stmt.expr, state)
+            state.materialized.discard(stmt.var)
+            if is_constant(value):
+                state.static[stmt.var] = value.value
+            else:
+                state.static.pop(stmt.var, None)
+                out.append(Assign(stmt.var, value))
+
+        elif isinstance(stmt, If):
+            cond = self.spec_expr(stmt.condition, state)
+            if is_constant(cond):
+                self.spec_block(stmt.then_branch if cond.value else stmt.else_branch, state, out)
+                return
+
+            then_state, else_state = state.copy(), state.copy()
+            then_out, else_out = [], []
+            self.spec_block(stmt.then_branch, then_state, then_out)
+            self.spec_block(stmt.else_branch, else_state, else_out)
+            self.join(state, then_state, then_out, else_state, else_out)
+            out.append(If(cond, then_out, else_out))
+
+        elif isinstance(stmt, While):
+            written = assigned_vars(stmt.body)
+            # Uma condição que o corpo não altera (ex: while True) não termina por desenrolar
+            bounded = bool(expr_vars(stmt.condition) & written)
+            while bounded and self.unroll > 0:
+                cond = self.spec_expr(stmt.condition, state)
+                if not is_constant(cond):
+                    break
+                if not cond.value:
+                    return
+                self.unroll -= 1
+                self.spec_block(stmt.body, state, out)
+                if state.returned:
+                    return
+
+            # Ciclo residual para as iterações que não foi possível desenrolar
+            self.make_dynamic(written, state, out)
+            cond = self.spec_expr(stmt.condition, state)
+            out.append(While(cond, self.spec_loop_body(stmt.body, written, state)))
+
+        elif isinstance(stmt, For):
+            start = self.spec_expr(stmt.start, state)
+            end = self.spec_expr(stmt.end, state)
+            if is_constant(start) and is_constant(end) and end.value - start.value <= self.unroll:
+                self.unroll -= max(0, end.value - start.value)
+                for i in range(start.value, end.value):
+                    state.static[stmt.var] = i
+                    state.materialized.discard(stmt.var)
+                    self.spec_block(stmt.body, state, out)
+                    if state.returned:
+                        return
+                return
+
+            # Com um intervalo vazio a variável do ciclo mantém o valor anterior
+            written = assigned_vars(stmt.body) | {stmt.var}
+            self.make_dynamic(written, state, out)
+            out.append(For(stmt.var, start, end, self.spec_loop_body(stmt.body, written, state)))
+
+        elif isinstance(stmt, FunctionDef):
+            # O corpo só vê os parâmetros, por isso não depende do ambiente estático
+            out.append(stmt)
+
+        elif isinstance(stmt, Return):
+            out.append(Return(self.spec_expr(stmt.expr, state)))
+            state.returned = True
+
+        elif isinstance(stmt, Print):
+            value = self.spec_expr(stmt.expr, state)
+            if isinstance(value, IntLit) and not isinstance(stmt.expr, IntLit):
+                # print(5) escreveria "Instr: 5"; mantém-se a expressão original
+                self.flush(expr_vars(stmt.expr), state, out)
+                value = stmt.expr
+            out.append(Print(value))
+
+        else:
+            out.append(stmt)
+
+    def join(self, state: State, then_state: State, then_out: List[Stmt], else_state: State, else_out: List[Stmt]):
+        if then_state.returned and else_state.returned:
+            state.returned = True
+            return
+        if then_state.returned or else_state.returned:
+            merged = else_state if then_state.returned else then_state
+            state.static, state.materialized = merged.static, merged.materialized
+            return
+
+        # Só continuam estáticas as variáveis com o mesmo valor (e tipo) nos dois ramos
+        static = {}
+        for name, value in then_state.static.items():
+            if name in else_state.static:
+                other = else_state.static[name]
+                if type(other) is type(value) and other == value:
+                    static[name] = value
+        self.flush(set(then_state.static) - set(static), then_state, then_out)
+        self.flush(set(else_state.static) - set(static), else_state, else_out)
+        state.static = static
+        state.materialized = {n for n in static if n in then_state.materialized and n in else_state.materialized}
+
+
+def specialize(program: Program, known_inputs: Inputs, max_unroll: int = MAX_UNROLL) -> Program:
+    static = {}
+    for var, val in known_inputs:
+        if constant(val) is None:
+            raise Exception(f"Valor não suportado para a entrada '{var}': {val!r}")
+        static[var] = val
+
+    state = State(static, set())
+    out = []
+    Specializer(max_unroll).spec_block(program.body, state, out)
+    if not state.returned:
+        # evaluate devolve `result` quando não há return
+        Specializer().flush({"result"}, state, out)
+    return Program(out)
+
+
+def run_test_suite_specialized(ast: Program, testCases: List[Tuple[Inputs, int]], static_vars: List[str],
+                               fuel: Optional[int] = None, timeout: Optional[float] = None) -> bool:
+    # Agrupa os testes pelos valores das entradas em static_vars e especializa
+    # o programa uma vez por grupo; cada teste corre só o programa residual
+    groups: Dict[tuple, List[Tuple[Inputs, int]]] = {}
+    for inputs, expected in testCases:
+        known = tuple((var, val) for var, val in inputs if var in static_vars)
+        rest = [(var, val) for var, val in inputs if var not in static_vars]
+        groups.setdefault(known, []).append((rest, expected))
+
+    for known, cases in groups.items():
+        try:
+            residual = specialize(ast, list(known))
+        except Exception:
+            # Entradas que não são int/bool: corre o programa original
+            residual, cases = ast, [(list(known) + rest, expected) for rest, expected in cases]
+        if not all(runTest(residual, case, fuel, timeout) for case in cases):
+            return False
+    return True
@@ -1,5 +1,11 @@
 from Lang import *
 from evaluate import *
+from bytecode import compile_bytecode, evaluate_bytecode
+from codegen import compile_python, evaluate_python, code_cache
+from batch import evaluate_batch, run_test_suite_batch
+from specialize import specialize, run_test_suite_specialized
+from profiler import Profiler
+from arena import ProgramArena, evaluate_arena
 from contextlib import redirect_stdout
 
 # Test suites para programa1 a programa3 (como exigido pelo enunciado para runTestSuite)
@@ -32,6 +38,8 @@ runTestSuitePrograma1 = runTestSuite(programa1, testSuite1)
 runTestSuitePrograma2 = runTestSuite(programa2, testSuite2)
 runTestSuitePrograma3 = runTestSuite(programa3, testSuite3)
 
+FUEL = 10000
+
 # Aplicar mutação aleatória ao programa1
 def testar_mutacoes():
     programas = [
@@ -44,15 +52,18 @@ def testar_mutacoes():
         mutado = mutate(prog)
         print(f"\nMutando {nome}...")
         print(mutado)
-        passou = runTestSuite(mutado, suite)
-        print(f"{nome} mutado → passou tests? {passou}")
+        # Mutantes como "x > 0" → "x <= 0" podem nunca terminar: limitar o fuel
+        resultado = run_test_suite_outcome(mutado, suite, fuel=FUEL)
+        print(f"{nome} mutado → passou tests? {resultado == 'pass'} ({resultado})")
 
         # Executar SBFL sobre o programa mutado
         print(f"\n[SBFL] Spectrum-Based Fault Localization para {nome}_mut")
-        scores = spectrum_based_fault_localization(mutado, suite)
+        scores = spectrum_based_fault_localization(mutado, suite, fuel=FUEL)
         for instr_id, score in scores:
             print(f"Instrução {instr_id}: score = {score:.4f}")
 
+        print(f"\nAnálise de mutação de {nome}: {mutation_analysis(prog, suite, 20, fuel=FUEL)}")
+
 
 
 def test_all_with_evaluate():    
@@ -99,6 +110,219 @@ def test_all_with_runTest():
                 print(f"Programa {i} - Teste {j}: erro → {e}")
 
 
+def test_all_with_evaluate_compiled():
+    test_suites = {
+        1: testSuite1,
+        2: testSuite2,
+        3: testSuite3
+    }
+
+    for i in range(1, 4):
+        prog = globals().get(f"programa{i}")
+        suite = test_suites.get(i)
+        compiled = compile_program(prog)
+
+        for j, (inputs, expected) in enumerate(suite, 1):
+            try:
+                result = evaluate_compiled(compiled, inputs)
+                reference = evaluate(prog, inputs)
+                status = "✓" if result == reference else "✗"
+                print(f"Programa {i} - Teste {j}: compilado = {result} (evaluate = {reference}) {status}")
+            except Exception as e:
+                print(f"Programa {i} - Teste {j}: erro → {e}")
+
+
+def test_all_with_evaluate_bytecode():
+    test_suites = {
+        1: testSuite1,
+        2: testSuite2,
+        3: testSuite3
+    }
+
+    for i in range(1, 4):
+        prog = globals().get(f"programa{i}")
+        suite = test_suites.get(i)
+        compiled = compile_bytecode(prog)  # reutilizado por todos os testes
+
+        for j, (inputs, expected) in enumerate(suite, 1):
+            try:
+                result = evaluate_bytecode(compiled, inputs)
+                reference = evaluate(prog, inputs)
+                status = "✓" if result == reference else "✗"
+                print(f"Programa {i} - Teste {j}: bytecode = {result} (evaluate = {reference}) {status}")
+            except Exception as e:
+                print(f"Programa {i} - Teste {j}: erro → {e}")
+
+
+def test_all_with_evaluate_python():
+    test_suites = {
+        1: testSuite1,
+        2: testSuite2,
+        3: testSuite3
+    }
+
+    for i in range(1, 4):
+        prog = globals().get(f"programa{i}")
+        suite = test_suites.get(i)
+
+        for j, (inputs, expected) in enumerate(suite, 1):
+            try:
+                result = evaluate_python(prog, inputs)  # compilado uma vez, depois vem da cache
+                reference = evaluate(prog, inputs)
+                status = "✓" if result == reference else "✗"
+                print(f"Programa {i} - Teste {j}: python = {result} (evaluate = {reference}) {status}")
+            except Exception as e:
+                print(f"Programa {i} - Teste {j}: erro → {e}")
+
+    print("Cache de código:", code_cache.info())
+
+
+def test_evaluate_iterative():
+    test_suites = {
+        1: testSuite1,
+        2: testSuite2,
+        3: testSuite3
+    }
+
+    for i in range(1, 4):
+        prog = globals().get(f"programa{i}")
+        suite = test_suites.get(i)
+
+        for j, (inputs, expected) in enumerate(suite, 1):
+            try:
+                result = evaluate_iterative(prog, inputs)
+                status = "✓" if result == expected else "✗"
+                print(f"Programa {i} - Teste {j}: resultado = {result} (esperado = {expected}) {status}")
+            except Exception as e:
+                print(f"Programa {i} - Teste {j}: erro → {e}")
+
+    # Soma gerada com 5000 termos: eval_expr esgotaria a pilha de Python
+    soma = IntLit(0)
+    for k in range(1, 5001):
+        soma = BinOp("+", soma, IntLit(k))
+    result = evaluate_iterative(Program([Return(soma)]), [])
+    print(f"Soma com 5000 termos: {result} {'✓' if result == 5000 * 5001 // 2 else '✗'}")
+
+    # Recursão Lang sem caso base termina com CallDepthExceeded
+    loop = Program([
+        FunctionDef("f", ["n"], [Return(FunctionCall("f", [Var("n")]))]),
+        Return(FunctionCall("f", [IntLit(0)]))
+    ])
+    try:
+        evaluate_iterative(loop, [], max_depth=500)
+        print("Recursão infinita: sem erro ✗")
+    except CallDepthExceeded as e:
+        print(f"Recursão infinita: {e} ✓")
+
+
+def test_evaluate_arena():
+    test_suites = {
+        1: testSuite1,
+        2: testSuite2,
+        3: testSuite3
+    }
+
+    for i in range(1, 4):
+        arena = ProgramArena.from_program(globals().get(f"programa{i}"))
+        for j, (inputs, expected) in enumerate(test_suites.get(i), 1):
+            result = evaluate_arena(arena, inputs)
+            status = "✓" if result == expected else "✗"
+            print(f"Programa {i} - Teste {j}: arena = {result} (esperado = {expected}) {status}")
+
+
+def test_evaluate_batch():
+    test_suites = {
+        1: testSuite1,
+        2: testSuite2,
+        3: testSuite3
+    }
+
+    for i in range(1, 4):
+        prog = globals().get(f"programa{i}")
+        suite = test_suites.get(i)
+        results = evaluate_batch(prog, [inputs for inputs, _ in suite])
+
+        for j, ((inputs, expected), result) in enumerate(zip(suite, results), 1):
+            status = "✓" if result == expected else "✗"
+            print(f"Programa {i} - Teste {j}: batch = {result} (esperado = {expected}) {status}")
+
+        print(f"Programa {i}: run_test_suite_batch = {run_test_suite_batch(prog, suite)} (runTestSuite = {runTestSuite(prog, suite)})")
+
+    # O fuel é um só para a execução toda: cada ciclo cabe no limite, os dois juntos não
+    incremento = Assign("i", BinOp("+", Var("i"), IntLit(1)))
+    dois_ciclos = Program([
+        Assign("i", IntLit(0)),
+        While(BinOp("<", Var("i"), IntLit(6)), [incremento]),
+        For("j", IntLit(0), IntLit(6), [incremento]),
+        Assign("result", Var("i")),
+    ])
+    lotes = evaluate_batch(dois_ciclos, [[], []], fuel=10)
+    try:
+        esperado = evaluate(dois_ciclos, [], fuel=10)
+    except ExecutionTimeout as e:
+        esperado = e
+    iguais = all(type(r) is type(esperado) for r in lotes)
+    print(f"Fuel partilhado entre ciclos: batch = {lotes[0]!r} (evaluate = {esperado!r}) {'✓' if iguais else '✗'}")
+
+
+def test_specialize():
+    print("Programa 2 especializado:")
+    print(specialize(programa2, []))
+    print("Programa 1 especializado com x = 3:")
+    print(specialize(programa1, [("x", 3)]))
+    print("Programa 3 especializado com a = 2:")
+    print(specialize(programa3, [("a", 2)]))
+
+    for i, (prog, suite, static_vars) in enumerate([(programa1, testSuite1, ["x"]),
+                                                    (programa2, testSuite2, ["sum"]),
+                                                    (programa3, testSuite3, ["a"])], 1):
+        ok = run_test_suite_specialized(prog, suite, static_vars) == runTestSuite(prog, suite)
+        print(f"Programa {i}: run_test_suite_specialized({static_vars}) {'✓' if ok else '✗'}")
+
+
+def test_profiler():
+    profiler = Profiler()
+    for inputs, expected in testSuite3:
+        result = evaluate(programa3, inputs, profiler=profiler)
+        status = "✓" if result == expected else "✗"
+        print(f"Programa 3 com profiler: {result} (esperado = {expected}) {status}")
+    print(profiler.table(limit=5))
+    print("Chamadas a check_and_add:", profiler.calls["check_and_add"])
+    print("Pilhas (formato collapsed):", [line.rsplit(" ", 1)[0] for line in profiler.collapsed().splitlines()])
+
+
+def test_memoization():
+    fib = Program([
+        FunctionDef("fib", ["n"], [
+            If(BinOp("<", Var("n"), IntLit(2)),
+               [Return(Var("n"))],
+               [Return(BinOp("+",
+                             FunctionCall("fib", [BinOp("-", Var("n"), IntLit(1))]),
+                             FunctionCall("fib", [BinOp("-", Var("n"), IntLit(2))])))])
+        ]),
+        Return(FunctionCall("fib", [Var("n")]))
+    ])
+    memo = MemoCache(maxsize=128)
+    result = evaluate(fib, [("n", 60)], memo=memo)
+    print(f"fib(60) com memoização: {result} {'✓' if result == 1548008755920 else '✗'}")
+    print("Cache:", memo.info())
+
+    memo = MemoCache()
+    ok = all(evaluate(programa3, inputs, memo=memo) == expected for inputs, expected in testSuite3)
+    print(f"Programa 3 com memoização: {'✓' if ok else '✗'} {memo.info()}")
+
+
+def test_fuel_timeout():
+    infinito = Program([
+        Assign("x", IntLit(1)),
+        While(BinOp(">", Var("x"), IntLit(0)), [Assign("x", BinOp("+", Var("x"), IntLit(1)))]),
+        Return(Var("x"))
+    ])
+    print("Ciclo infinito com fuel:", run_test_outcome(infinito, ([], 0), fuel=1000))
+    print("Ciclo infinito com timeout:", run_test_outcome(infinito, ([], 0), timeout=0.05))
+    print("Programa 1 com fuel suficiente:", run_test_outcome(programa1, testSuite1[0], fuel=100))
+
+
 def test_instrumentation_manual():
     instr = instrumentation(programa1)
     print("Programa 1 instrumentado:")
@@ -114,6 +338,21 @@ def main():
             print("\n========================  Testar runTest() ========================")
             test_all_with_runTest()
 
+            print("\n========================  Testar evaluate_compiled() ========================")
+            test_all_with_evaluate_compiled()
+
+            print("\n========================  Testar evaluate_bytecode() ========================")
+            test_all_with_evaluate_bytecode()
+
+            print("\n========================  Testar evaluate_python() ========================")
+            test_all_with_evaluate_python()
+
+            print("\n========================  Testar evaluate_iterative() ========================")
+            test_evaluate_iterative()
+
+            print("\n========================  Testar evaluate_arena() ========================")
+            test_evaluate_arena()
+
             print("\n========================  Testar runTestSuite() para os 3 programas escolhidos ========================")
             print("Programa 1:", runTestSuitePrograma1)
             print("Programa 2:", runTestSuitePrograma2)
@@ -122,6 +361,21 @@ def main():
             print("\n========================  Testar mutações aleatoriamente ========================")
             testar_mutacoes()
 
+            print("\n========================  Testar evaluate_batch() ========================")
+            test_evaluate_batch()
+
+            print("\n========================  Testar specialize() ========================")
+            test_specialize()
+
+            print("\n========================  Testar profiler ========================")
+            test_profiler()
+
+            print("\n========================  Testar memoização de funções puras ========================")
+            test_memoization()
+
+            print("\n========================  Testar fuel e timeout ========================")
+            test_fuel_timeout()
+
             print("\n========================  Testar instrumentation manualmente ========================")
             test_instrumentation_manual()
 
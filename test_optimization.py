@@ -1,7 +1,10 @@
 from Lang import *
 from pretty_printing import *
 from optimization import *
+from arena import ProgramArena
+from evaluate import evaluate, mutate
 from contextlib import redirect_stdout
+import pickle, time
 
 def analisar_programa(nome, prog):
     print(f"\n=== {nome} ===\n")
@@ -25,6 +28,222 @@ def analisar_programa(nome, prog):
     print(detect_smells(prog))
 
 
+def testar_hash_consing():
+    print("\n=== Nós partilhados (hash-consing) ===\n")
+    for nome, prog in [("programa1", programa1), ("programa2", programa2), ("programa3", programa3)]:
+        a = intern_program(prog)
+        b = intern_program(prog)
+        iguais = all(x is y for x, y in zip(a.body, b.body))
+        print(f"{nome}: nós partilhados entre duas cópias {'✓' if iguais else '✗'}")
+        print(f"{nome}: mesmos code smells {'✓' if detect_smells(a) == detect_smells(prog) else '✗'}")
+    print("IntLit(1) e BoolLit(True) distintos:", hash_cons.make(IntLit, 1) is not hash_cons.make(BoolLit, True))
+    # pickle (ex: para workers de multiprocessing) devolve os mesmos nós partilhados
+    for nome, prog in [("programa1", programa1), ("programa2", programa2), ("programa3", programa3)]:
+        partilhado = intern_program(prog)
+        lido = pickle.loads(pickle.dumps(partilhado))
+        ok = all(x is y for x, y in zip(lido.body, partilhado.body)) and lido == intern_program(prog)
+        print(f"{nome}: pickle de nós partilhados {'✓' if ok else '✗'}")
+    # Os passes misturam blocos novos (listas) com blocos partilhados (tuplos)
+    inputs = [("x", 3), ("a", 1), ("b", 2)]
+    for nome, prog in [("programa1", programa1), ("programa2", programa2), ("programa3", programa3)]:
+        partilhado = intern_program(prog)
+        otimizado = optimize(partilhado)
+        ok = names(otimizado) == names(optimize(prog)) and evaluate(otimizado, inputs) == evaluate(prog, inputs)
+        ok = ok and all(isinstance(mutate(otimizado), Program) for _ in range(5))
+        print(f"{nome}: optimize e mutate sobre nós partilhados {'✓' if ok else '✗'}")
+
+
+def testar_arena():
+    print("\n=== AST em arena ===\n")
+    for nome, prog in [("programa1", programa1), ("programa2", programa2), ("programa3", programa3)]:
+        arena = ProgramArena.from_program(prog)
+        print(f"{nome}: {len(arena)} nós, {arena.nbytes()} bytes")
+        print(f"{nome}: conversão ida e volta {'✓' if arena.to_program() == prog else '✗'}")
+        print(f"{nome}: nomes {'✓' if arena.names() == names(prog) else '✗'}, "
+              f"instruções {'✓' if arena.instructions() == instructions(prog) else '✗'}, "
+              f"simplificação {'✓' if arena.simplify().to_program() == opt(prog) else '✗'}")
+
+
+def testar_pass_manager():
+    print("\n=== Gestor de passes ===\n")
+    for nome, prog in [("programa1", programa1), ("programa2", programa2), ("programa3", programa3)]:
+        passes = default_passes()
+        otimizado = passes.run(prog)
+        print(f"{nome}:")
+        print(passes.table())
+        estavel = opt(otimizado) is otimizado and refactor(otimizado) is otimizado
+        print(f"{nome}: ponto fixo {'✓' if passes.converged and estavel else '✗'}")
+        reutilizadas = sum(any(s is o for o in otimizado.body) for s in prog.body)
+        print(f"{nome}: instruções reutilizadas sem cópia: {reutilizadas}/{len(prog.body)}")
+
+    # simplify lança ZeroDivisionError em 2 / 0: o gestor fica com o último programa bom
+    falha = Program([Assign("x", BinOp("/", IntLit(2), IntLit(0)))])
+    passes = default_passes()
+    resultado = passes.run(falha)
+    print(passes.table())
+    print(f"pass que falha não estraga o programa {'✓' if isinstance(resultado, Program) and passes.summary()['simplify']['failures'] > 0 else '✗'}")
+
+    # Um if constante num programa partilhado: o ramo (um tuplo) é inserido no bloco
+    partilhado = intern_program(Program([If(BoolLit(True), [Assign("a", IntLit(1)), Assign("b", IntLit(2))],
+                                            [Assign("a", IntLit(3))]), Assign("result", Var("a"))]))
+    corpo = refactor(partilhado).body
+    print(f"if constante com blocos partilhados {'✓' if [type(s).__name__ for s in corpo] == ['Assign'] * 3 else '✗'}")
+
+
+def testar_dce():
+    print("\n=== Eliminação de código morto ===\n")
+    inputs = [("x", 3), ("a", 1), ("b", 2)]
+    for nome, prog in [("programa1", programa1), ("programa2", programa2), ("programa3", programa3)]:
+        limpo = dead_code_elimination(prog)
+        print(f"{nome}:")
+        print(str(limpo))
+        removidas = sorted(set(names(prog)) - set(names(limpo)))
+        print(f"{nome}: variáveis removidas {removidas}")
+        print(f"{nome}: mesmo resultado {'✓' if evaluate(limpo, inputs) == evaluate(prog, inputs) else '✗'}")
+
+    # Ramos e corpos que ficam vazios continuam a ser Lang válido (pass)
+    codigo = """def f(n):
+    return n
+x = 0
+if (a > 0):
+    x = 1
+else:
+    y = 2
+for i in range(f(1), 3):
+    z = i
+result = x
+"""
+    prog = parse_code(codigo)
+    limpo = dead_code_elimination(prog)
+    print(str(limpo))
+    print(f"blocos vazios voltam a ser lidos {'✓' if parse_code(str(limpo)) == limpo else '✗'}")
+    print(f"blocos vazios: mesmo resultado {'✓' if evaluate(limpo, inputs) == evaluate(prog, inputs) else '✗'}")
+
+
+def testar_sccp():
+    print("\n=== Propagação de constantes ===\n")
+    codigo = """k = 2
+s = 0
+i = 0
+while i < 4:
+    s = (s + (k * i))
+    i = (i + 1)
+if (k > 1):
+    m = (k * 10)
+else:
+    m = 0
+result = (s + m)
+"""
+    inputs = [("x", 3), ("a", 1), ("b", 2)]
+    exemplos = [("programa1", programa1), ("programa2", programa2), ("programa3", programa3),
+                ("ciclo com constantes", parse_code(codigo))]
+    for nome, prog in exemplos:
+        propagado = constant_propagation(prog)
+        print(f"{nome}:")
+        print(str(propagado))
+        print(f"{nome}: mesmo resultado {'✓' if evaluate(propagado, inputs) == evaluate(prog, inputs) else '✗'}")
+    print("if com condição constante removido:", instructions(constant_propagation(exemplos[-1][1])).get("If", 0) == 0)
+
+    # z = 0 não passa para o divisor: simplify rejeitaria 10 / 0 num ramo que não corre
+    divisao = parse_code("z = 0\nif (c > 0):\n    r = (10 / z)\nelse:\n    r = 1\nresult = r\n")
+    passes = default_passes()
+    otimizado = passes.run(divisao)
+    falhas = sum(s["failures"] for s in passes.summary().values())
+    print(f"divisor constante 0 num ramo não executado {'✓' if falhas == 0 and evaluate(otimizado, [('c', 0)]) == 1 else '✗'}")
+
+    # Um ciclo que nunca corre é removido e deixa o ramo do if vazio
+    vazio = parse_code("k = 0\nif (a > 0):\n    while (k > 0):\n        k = (k - 1)\nelse:\n    k = 1\nresult = k\n")
+    propagado = constant_propagation(vazio)
+    print(str(propagado))
+    print(f"ramo vazio volta a ser lido {'✓' if parse_code(str(propagado)) == propagado else '✗'}")
+    print(f"ramo vazio: mesmo resultado {'✓' if all(evaluate(propagado, [('a', a)]) == evaluate(vazio, [('a', a)]) for a in (0, 1)) else '✗'}")
+
+    # 30 ciclos encaixados: cada ciclo analisa o corpo poucas vezes (antes 3^profundidade)
+    corpo = [Assign("s", BinOp("+", Var("s"), IntLit(1)))]
+    for k in reversed(range(30)):
+        contador = f"i{k}"
+        corpo = [Assign(contador, IntLit(0)),
+                 While(BinOp("<", Var(contador), Var("n")),
+                       corpo + [Assign(contador, BinOp("+", Var(contador), IntLit(1)))])]
+    fundo = Program([Assign("s", IntLit(0))] + corpo + [Assign("result", Var("s"))])
+    inicio = time.perf_counter()
+    propagado = constant_propagation(fundo)
+    rapido = time.perf_counter() - inicio < 1
+    print(f"30 ciclos encaixados {'✓' if rapido and evaluate(propagado, [('n', 1)]) == evaluate(fundo, [('n', 1)]) else '✗'}")
+
+
+def testar_cse():
+    print("\n=== Eliminação de subexpressões comuns ===\n")
+    codigo = """a = 3
+b = 2
+y = ((a + b) * (a + b))
+z = ((a + b) - 1)
+i = 0
+while (i < (a * b)):
+    print((a * b))
+    i = (i + 1)
+result = ((y + z) + i)
+"""
+    inputs = [("x", 3), ("a", 1), ("b", 2)]
+    exemplos = [("programa1", programa1), ("programa2", programa2), ("programa3", programa3),
+                ("expressões repetidas", parse_code(codigo))]
+    for nome, prog in exemplos:
+        novo = common_subexpression_elimination(prog)
+        print(f"{nome}:")
+        print(str(novo))
+        print(f"{nome}: mesmo resultado {'✓' if evaluate(novo, inputs) == evaluate(prog, inputs) else '✗'}")
+        print(f"{nome}: ponto fixo {'✓' if common_subexpression_elimination(novo) is novo else '✗'}")
+    # a e b são entradas: a primeira conta é feita de qualquer forma pela própria instrução
+    entradas = parse_code("result = ((a + b) * (a + b))\n")
+    novo = common_subexpression_elimination(entradas)
+    print(str(novo))
+    print("expressão repetida sobre entradas antecipada:",
+          instructions(novo).get("Assign", 0) == 2 and evaluate(novo, inputs) == evaluate(entradas, inputs))
+    # g não existe: o erro da chamada vem antes de (a + b) ser calculada
+    chamada = parse_code("result = (g((a + b)) * (a + b))\n")
+    print("argumentos de chamadas não antecipados:", common_subexpression_elimination(chamada) is chamada)
+
+
+def testar_licm():
+    print("\n=== Código invariante em ciclos ===\n")
+    codigo = """def dobro(v):
+    return (v * 2)
+def mostra(v):
+    print(v)
+    return v
+s = 0
+i = 0
+while (i < n):
+    k = dobro(n)
+    s = ((s + k) + (n * n))
+    i = (i + 1)
+for j in range(0, n):
+    t = mostra(n)
+    s = ((s + t) + (m / 2))
+result = s
+"""
+    prog = parse_code(codigo)
+    movido = loop_invariant_code_motion(prog)
+    print(str(movido))
+    for n in [4, 0]:
+        # com n = 0 os ciclos não correm e m nem sequer existe
+        inputs = [("n", n)] if n == 0 else [("n", n), ("m", 7)]
+        print(f"n = {n}: mesmo resultado {'✓' if evaluate(movido, inputs) == evaluate(prog, inputs) else '✗'}")
+
+    def ciclos(stmts):
+        for s in stmts:
+            if isinstance(s, (While, For)):
+                yield s
+            if isinstance(s, If):
+                yield from ciclos(s.then_branch)
+    antes = [count_nodes(Program(list(c.body))) for c in ciclos(prog.body)]
+    depois = [count_nodes(Program(list(c.body))) for c in ciclos(movido.body)]
+    print("nós nos corpos dos ciclos:", antes, "→", depois)
+    # mostra imprime, por isso a chamada fica no ciclo
+    print("chamada com efeitos não movida:", "t = mostra(n)" in "\n".join(pretty_lines(list(ciclos(movido.body))[1].body)))
+    print(f"ponto fixo {'✓' if loop_invariant_code_motion(movido) is movido else '✗'}")
+
+
 def main():
     exemplos = [(nome, obj) for nome, obj in globals().items() if nome.startswith("programa")]
 
@@ -32,6 +251,13 @@ def main():
         with redirect_stdout(f):
             for nome, prog in exemplos:
                 analisar_programa(nome, prog)
+            testar_hash_consing()
+            testar_arena()
+            testar_pass_manager()
+            testar_dce()
+            testar_sccp()
+            testar_cse()
+            testar_licm()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,7 +1,9 @@
 from Lang import *
 from parser import *
 from pretty_printing import *
-import difflib
+from serialization import dump_program, load_program, dump_corpus, CorpusReader
+from optimization import default_passes, optimize
+import difflib, io, os, tempfile
 from contextlib import redirect_stdout
 
 def show_diff(a, b):
@@ -28,9 +30,103 @@ def prop_roundtrip(ast):
         print(show_diff(ast, ast2))
         return False
 
+def prop_passes_roundtrip(ast):
+    # A saída de cada pass (e de optimize) tem de continuar a ser Lang válido,
+    # mesmo com blocos vazios (escritos como pass)
+    passes = default_passes().passes + [("optimize", optimize)]
+    resultados = [prop_roundtrip(fn(ast)) for _, fn in passes]
+    return all(resultados)
+
+# Programas cujos passes deixam blocos vazios: if sem else, ciclo removido num ramo
+BLOCOS_VAZIOS = [
+    "i = 0\ns = 0\nwhile (i < n):\n    k = (n * n)\n    s = (s + k)\n    i = (i + 1)\nresult = s\n",
+    "x = 0\nif (a > 0):\n    x = 1\nelse:\n    y = 2\nresult = x\n",
+    "k = 0\nif (a > 0):\n    while (k > 0):\n        k = (k - 1)\nelse:\n    k = 1\nresult = k\n",
+    "for x in range(f(1), 1):\n    y = 1\nresult = 0\n",
+]
+
+
+def prop_serialization_roundtrip(ast):
+    data = dump_program(ast)
+    print(f"Serializado: {len(data)} bytes")
+    ast2 = load_program(data)
+    if ast == ast2:
+        return True
+    else:
+        print("✗ ASTs diferentes!")
+        print(show_diff(ast, ast2))
+        return False
+
+def prop_parse_cache(ast, cache):
+    code = str(ast)
+    primeiro = parse_code(code, cache)
+    segundo = parse_code(code, cache)
+    print("Cache de parsing:", cache.info())
+    return primeiro == segundo == parse_code(code)
+
+def prop_iter_parse(ast):
+    code = str(ast)
+    # bocados pequenos para partir linhas e instruções a meio
+    stmts = list(iter_parse(io.StringIO(code), chunk_size=7))
+    return stmts == parse_code(code).body
+
+def prop_reparse(ast):
+    code = str(ast)
+    anterior = parse_code(code)
+    novo = "inicio = 0\n" + code
+    prog = reparse(anterior, code, novo)
+    reutilizadas = all(a is b for a, b in zip(anterior.body, prog.body[1:]))
+    return prog == parse_code(novo) and reutilizadas
+
+def prop_corpus_roundtrip(programas):
+    path = os.path.join(tempfile.mkdtemp(), "corpus.bin")
+    dump_corpus(programas, path)
+    with CorpusReader(path) as corpus:
+        ok = len(corpus) == len(programas) and all(corpus[i] == p for i, p in reversed(list(enumerate(programas))))
+    os.remove(path)
+    print("✓ Corpus OK" if ok else "✗ Corpus FALHOU")
+    return ok
+
+
+def prop_write_program(ast):
+    stream = io.StringIO()
+    write_program(ast, stream)
+    return stream.getvalue() == str(ast) == pretty_program(ast)
+
+def prop_spans(ast):
+    code = str(ast)
+    prog, posicoes = parse_with_spans(code)
+    linhas = code.split("\n")
+    # cada instrução de topo começa no início de uma linha com o mesmo texto
+    ok = prog == parse_code(code)
+    for stmt in prog.body:
+        linha, coluna, _, _ = posicoes.span(stmt)
+        ok = ok and coluna == 1 and linhas[linha - 1] == pretty_stmt(stmt)[0]
+    return ok
+
+def prop_parse_recovering():
+    code = "x = 1\ny = (x +\nprint(x)\nwhile x > 0:\n    x = x $ 1\nz = 2\n"
+    prog, erros = parse_recovering(code)
+    print("Erros encontrados:", erros)
+    return [linha for linha, _, _ in erros] == [2, 5] and len(prog.body) == 3
+
+def prop_parse_many(programas):
+    pasta = tempfile.mkdtemp()
+    caminhos = []
+    for i, prog in enumerate(programas + [None]):
+        caminhos.append(os.path.join(pasta, f"programa{i}.lang"))
+        with open(caminhos[-1], "w", encoding="utf-8") as f:
+            f.write(str(prog) if prog is not None else "x = \n")  # o último tem um erro
+    resultados = {caminho: (dados, erro) for caminho, dados, erro in parse_many(caminhos, workers=2)}
+    ok = all(load_program(resultados[c][0]) == parse_code(str(p)) for c, p in zip(caminhos, programas))
+    ok = ok and resultados[caminhos[-1]][0] is None and resultados[caminhos[-1]][1] is not None
+    print("✓ Parsing em paralelo OK" if ok else "✗ Parsing em paralelo FALHOU")
+    return ok
+
 
 def main():
     exemplos = [(nome, obj) for nome, obj in globals().items() if nome.startswith("programa")]
+    cache = ParseCache(tempfile.mkdtemp())
 
     with open("resultado_roundtrip.txt", "w", encoding="utf-8") as f:
         with redirect_stdout(f):
@@ -40,7 +136,36 @@ def main():
                 print(str(prog))
                 resultado = prop_roundtrip(prog)
                 print("✓ Roundtrip OK" if resultado else "✗ Roundtrip FALHOU")
+                resultado = prop_serialization_roundtrip(prog)
+                print("✓ Serialização OK" if resultado else "✗ Serialização FALHOU")
+                resultado = prop_parse_cache(prog, cache)
+                print("✓ Cache de parsing OK" if resultado else "✗ Cache de parsing FALHOU")
+                resultado = prop_iter_parse(prog)
+                print("✓ Parsing em streaming OK" if resultado else "✗ Parsing em streaming FALHOU")
+                resultado = prop_reparse(prog)
+                print("✓ Reparsing incremental OK" if resultado else "✗ Reparsing incremental FALHOU")
+                resultado = prop_write_program(prog)
+                print("✓ Escrita em stream OK" if resultado else "✗ Escrita em stream FALHOU")
+                resultado = prop_spans(prog)
+                print("✓ Posições no código OK" if resultado else "✗ Posições no código FALHOU")
+                resultado = prop_passes_roundtrip(prog)
+                print("✓ Roundtrip dos passes OK" if resultado else "✗ Roundtrip dos passes FALHOU")
                 print("-" * 50)
 
+            print("\nTeste de corpus serializado")
+            prop_corpus_roundtrip([prog for _, prog in exemplos])
+
+            print("\nTeste de blocos vazios")
+            for codigo in BLOCOS_VAZIOS:
+                resultado = prop_passes_roundtrip(parse_code(codigo))
+                print("✓ Roundtrip dos passes OK" if resultado else "✗ Roundtrip dos passes FALHOU")
+
+            print("\nTeste de recuperação de erros")
+            resultado = prop_parse_recovering()
+            print("✓ Recuperação de erros OK" if resultado else "✗ Recuperação de erros FALHOU")
+
+            print("\nTeste de parsing em paralelo")
+            prop_parse_many([prog for _, prog in exemplos])
+
 if __name__ == "__main__":
     main()
\ No newline at end of file